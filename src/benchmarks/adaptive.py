@@ -0,0 +1,67 @@
+# Measures the time needed to decode 20000 ILDictionaryTag messages where 90%
+# of them share the same layout, with and without the adaptive mode of
+# ILStandardTagFactory. It also measures the cost of the adaptive mode when it
+# does not help: messages with unique layouts and deeply nested dictionaries.
+# Run it from the src directory:
+#
+#   PYTHONPATH=. python benchmarks/adaptive.py
+import io
+import time
+from pyiltags.standard import (ILDictionaryTag, ILILInt64Tag, ILNullTag,
+                               ILStandardTagFactory, ILStringTag,
+                               ILTagArrayTag, ILUInt32Tag)
+
+COUNT = 20000
+DEPTH = 200
+
+
+def serialize(tags) -> bytes:
+    writer = io.BytesIO()
+    for t in tags:
+        t.serialize(writer)
+    return writer.getvalue()
+
+
+def create_message(i: int, unique: bool) -> ILDictionaryTag:
+    m = ILDictionaryTag()
+    m['node'] = ILStringTag(f'node-{i}')
+    m['sequence'] = ILUInt32Tag(i)
+    m['samples'] = ILTagArrayTag([ILILInt64Tag(i + j) for j in range(8)])
+    if unique:
+        m[f'error-{i}'] = ILNullTag()
+    elif i % 10 == 0:
+        m['error'] = ILNullTag()
+    return m
+
+
+def create_nested(depth: int) -> ILDictionaryTag:
+    m = ILDictionaryTag()
+    m['leaf'] = ILUInt32Tag(depth)
+    for _ in range(depth):
+        parent = ILDictionaryTag()
+        parent['child'] = m
+        m = parent
+    return m
+
+
+cases = (
+    ('similar layouts', COUNT,
+     serialize(create_message(i, False) for i in range(COUNT))),
+    ('unique layouts', COUNT,
+     serialize(create_message(i, True) for i in range(COUNT))),
+    (f'{DEPTH} levels deep', 200,
+     serialize(create_nested(DEPTH) for _ in range(200))),
+)
+
+for name, count, serialized in cases:
+    print(name)
+    for adaptive in (False, True):
+        f = ILStandardTagFactory(adaptive=adaptive)
+        reader = io.BytesIO(serialized)
+        start = time.perf_counter()
+        for _ in range(count):
+            f.deserialize(reader)
+        elapsed = time.perf_counter() - start
+        print(f'  adaptive={adaptive!s:>5} {elapsed * 1000:8.1f} ms, '
+              f'{f.adaptive_hits} hits, {f.adaptive_misses} misses, '
+              f'{len(f.adaptive_shapes)} shapes')
@@ -0,0 +1,37 @@
+# Compares the time and the peak memory needed to decode and serialize a
+# dictionary with a 256 MiB ILByteArrayTag from a buffer with io.BytesIO and
+# with MemoryReader. Run it from the src directory:
+#
+#   PYTHONPATH=. python benchmarks/attachment.py
+import io
+import os
+import time
+import tracemalloc
+from pyiltags.standard import (ILByteArrayTag, ILDictionaryTag,
+                               ILStandardTagFactory, ILStringTag, MemoryReader)
+
+SIZE = 256 * 2**20
+
+doc = ILDictionaryTag()
+doc['name'] = ILStringTag('attachment.bin')
+doc['data'] = ILByteArrayTag(bytes(SIZE))
+writer = io.BytesIO()
+doc.serialize(writer)
+serialized = writer.getvalue()
+del doc, writer
+
+for name, create_reader in [('BytesIO', io.BytesIO), ('MemoryReader', MemoryReader)]:
+    f = ILStandardTagFactory()
+    tracemalloc.start()
+    start = time.perf_counter()
+    tag = f.deserialize(create_reader(serialized))
+    decoded = time.perf_counter()
+    with open(os.devnull, 'wb') as out:
+        tag.serialize(out)
+    elapsed = time.perf_counter()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del tag
+    print(f'{name:>12}: decode {(decoded - start) * 1000:8.1f} ms, '
+          f'serialize {(elapsed - decoded) * 1000:8.1f} ms, '
+          f'peak {peak / 2**20:8.1f} MiB')
@@ -0,0 +1,29 @@
+# Compares the time to decode and serialize an ILTagArrayTag with 10^6
+# ILBinary64Tag elements with and without the columnar representation. Run
+# it from the src directory (NumPy is used if it is installed):
+#
+#   PYTHONPATH=. python benchmarks/column.py
+import io
+import time
+from pyiltags.standard import (ILBinary64Tag, ILStandardTagFactory,
+                               ILTagArrayTag, ILTagColumn, ILTAG_BINARY64_ID)
+
+COUNT = 1000000
+
+writer = io.BytesIO()
+ILTagArrayTag(ILTagColumn(ILTAG_BINARY64_ID,
+                          (i * 0.5 for i in range(COUNT)))).serialize(writer)
+serialized = writer.getvalue()
+print(f'Payload size: {len(serialized)} bytes')
+
+for columnar in [False, True]:
+    f = ILStandardTagFactory(columnar=columnar)
+    start = time.perf_counter()
+    tag = f.deserialize(io.BytesIO(serialized))
+    elapsed = time.perf_counter() - start
+    print(f'columnar={columnar}: deserialize {elapsed * 1000:.2f} ms')
+    start = time.perf_counter()
+    tag.serialize(io.BytesIO())
+    elapsed = time.perf_counter() - start
+    print(f'columnar={columnar}: serialize {elapsed * 1000:.2f} ms')
+    del tag
@@ -0,0 +1,70 @@
+# Measures the time needed to encode and decode 20000 dataclass instances by
+# building the tags manually and with ILDataclassMapper. Run it from the src
+# directory:
+#
+#   PYTHONPATH=. python benchmarks/dataclass.py
+import io
+import time
+from dataclasses import dataclass
+from typing import List
+from pyiltags.dataclass import *
+
+COUNT = 20000
+
+
+@dataclass
+class Reading:
+    sensor: str
+    value: float
+
+
+@dataclass
+class Report:
+    id: int
+    station: str
+    readings: List[Reading]
+
+
+def manual_encode(report: Report) -> bytes:
+    tag = ILDictionaryTag()
+    tag['id'] = ILInt64Tag(report.id)
+    tag['station'] = ILStringTag(report.station)
+    readings = ILTagArrayTag()
+    for r in report.readings:
+        t = ILDictionaryTag()
+        t['sensor'] = ILStringTag(r.sensor)
+        t['value'] = ILBinary64Tag(r.value)
+        readings.append(t)
+    tag['readings'] = readings
+    writer = io.BytesIO()
+    tag.serialize(writer)
+    return writer.getvalue()
+
+
+factory = ILStandardTagFactory()
+
+
+def manual_decode(buff: bytes) -> Report:
+    tag = factory.deserialize(io.BytesIO(buff))
+    return Report(tag['id'].value, tag['station'].value,
+                  [Reading(t['sensor'].value, t['value'].value)
+                   for t in tag['readings']])
+
+
+reports = [Report(i, f'station {i % 50}',
+                  [Reading(f's{j}', i / (j + 1)) for j in range(4)])
+           for i in range(COUNT)]
+mapper = ILDataclassMapper()
+
+for name, encode, decode in (
+        ('manual', manual_encode, manual_decode),
+        ('mapper', mapper.encode, lambda b: mapper.decode(Report, b))):
+    start = time.perf_counter()
+    encoded = [encode(r) for r in reports]
+    encode_time = time.perf_counter() - start
+    start = time.perf_counter()
+    decoded = [decode(b) for b in encoded]
+    decode_time = time.perf_counter() - start
+    assert decoded == reports
+    print(f'{name:>6} encode {encode_time * 1000:8.1f} ms, '
+          f'decode {decode_time * 1000:8.1f} ms')
@@ -0,0 +1,38 @@
+# Measures the time needed to decode 100000 messages taken from a set of 100
+# distinct ILDictionaryTag messages with and without ILCachingTagFactory.
+# Run it from the src directory:
+#
+#   PYTHONPATH=. python benchmarks/decode_cache.py
+import io
+import time
+from pyiltags.standard import (ILCachingTagFactory, ILDictionaryTag,
+                               ILILInt64Tag, ILStandardTagFactory,
+                               ILStringTag)
+
+COUNT = 100000
+DISTINCT = 100
+
+writer = io.BytesIO()
+for i in range(COUNT):
+    m = ILDictionaryTag()
+    m['node'] = ILStringTag(f'node-{i % DISTINCT}')
+    m['status'] = ILStringTag('ok')
+    m['sequence'] = ILILInt64Tag(i % DISTINCT)
+    m.serialize(writer)
+serialized = writer.getvalue()
+
+
+def decode(f) -> float:
+    reader = io.BytesIO(serialized)
+    start = time.perf_counter()
+    for _ in range(COUNT):
+        f.deserialize(reader)
+    return time.perf_counter() - start
+
+
+print(f'no cache {decode(ILStandardTagFactory()) * 1000:8.1f} ms')
+for frozen in (True, False):
+    f = ILCachingTagFactory(ILStandardTagFactory(), frozen=frozen)
+    elapsed = decode(f)
+    print(f'cache (frozen={frozen}) {elapsed * 1000:8.1f} ms, '
+          f'{f.hits} hits, {f.misses} misses')
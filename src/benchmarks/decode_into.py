@@ -0,0 +1,43 @@
+# Measures the time needed to decode 20000 ILDictionaryTag
+# messages with the same shape with deserialize() and deserialize_into().
+# Run it from the src directory:
+#
+#   PYTHONPATH=. python benchmarks/decode_into.py
+import io
+import time
+from pyiltags.standard import (ILDictionaryTag, ILILInt64Tag,
+                               ILStandardTagFactory, ILStringTag,
+                               ILTagArrayTag, ILUInt32Tag)
+
+COUNT = 20000
+
+writer = io.BytesIO()
+for i in range(COUNT):
+    m = ILDictionaryTag()
+    m['node'] = ILStringTag(f'node-{i}')
+    m['sequence'] = ILUInt32Tag(i)
+    m['samples'] = ILTagArrayTag([ILILInt64Tag(i + j) for j in range(8)])
+    m.serialize(writer)
+serialized = writer.getvalue()
+f = ILStandardTagFactory()
+
+
+def decode_new():
+    reader = io.BytesIO(serialized)
+    for _ in range(COUNT):
+        tag = f.deserialize(reader)
+
+
+def decode_into():
+    reader = io.BytesIO(serialized)
+    tag = None
+    for _ in range(COUNT):
+        tag = f.deserialize_into(reader, tag)
+
+
+for name, decode in (('deserialize', decode_new),
+                     ('deserialize_into', decode_into)):
+    start = time.perf_counter()
+    decode()
+    elapsed = time.perf_counter() - start
+    print(f'{name:>16} {elapsed * 1000:8.1f} ms')
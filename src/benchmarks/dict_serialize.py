@@ -0,0 +1,40 @@
+# Measures the time needed to compute the size and serialize an
+# ILTagArrayTag with 20000 ILStringDictionaryTag records with the same keys,
+# and single ILDictionaryTags with many distinct keys. Run it from the src
+# directory:
+#
+#   PYTHONPATH=. python benchmarks/dict_serialize.py
+import io
+import time
+from pyiltags.standard import (ILDictionaryTag, ILNullTag,
+                               ILStringDictionaryTag, ILTagArrayTag)
+
+COUNT = 20000
+KEYS = ['identifier', 'description', 'status', 'owner', 'created', 'updated']
+
+
+def measure(name: str, tag) -> None:
+    best = None
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(10):
+            writer = io.BytesIO()
+            tag.serialize(writer)
+        elapsed = (time.perf_counter() - start) / 10
+        best = elapsed if best is None else min(best, elapsed)
+    print(f'{name:<20} {best * 1000:8.1f} ms, {writer.tell()} bytes')
+
+
+records = ILTagArrayTag()
+for i in range(COUNT):
+    r = ILStringDictionaryTag()
+    for key in KEYS:
+        r[key] = f'{key}-{i % 100}'
+    records.append(r)
+measure('records', records)
+
+for count in (5000, 20000):
+    d = ILDictionaryTag()
+    for i in range(count):
+        d[f'key-{i}'] = ILNullTag()
+    measure(f'{count} keys', d)
@@ -0,0 +1,40 @@
+# Compares the time to create a modified variant of a large ILDictionaryTag
+# with copy.deepcopy() and with ILTag.evolve(). Run it from the src directory:
+#
+#   PYTHONPATH=. python benchmarks/evolve.py
+import copy
+import time
+from pyiltags.standard import (ILDictionaryTag, ILILInt64Tag, ILStringTag,
+                               ILTagArrayTag)
+
+COUNT = 10000
+
+record = ILDictionaryTag()
+for i in range(COUNT):
+    item = ILDictionaryTag()
+    item['name'] = ILStringTag(f'item {i}')
+    item['values'] = ILTagArrayTag([ILILInt64Tag(j) for j in range(10)])
+    record[f'k{i}'] = item
+
+
+
+def deepcopy_variant():
+    variant = copy.deepcopy(record)
+    variant['k5']['values'][3].value = 100
+    return variant
+
+
+def evolve_variant():
+    return record.evolve(['k5', 'values', 3], ILILInt64Tag(100))
+
+
+for name, create in [('deepcopy', deepcopy_variant), ('evolve', evolve_variant)]:
+    best = None
+    for _ in range(3):
+        start = time.perf_counter()
+        variant = create()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    assert record['k5']['values'][3].value == 3
+    assert variant['k5']['values'][3].value == 100
+    print(f'{name:>8}: {best * 1000:10.3f} ms')
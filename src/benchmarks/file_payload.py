@@ -0,0 +1,54 @@
+# Compares the time and the peak memory needed to serialize and deserialize
+# an ILByteArrayTag with a 256 MiB payload stored in a file, loading it into
+# memory and using FilePayload. Run it from the src directory:
+#
+#   PYTHONPATH=. python benchmarks/file_payload.py
+import os
+import tempfile
+import time
+import tracemalloc
+from pyiltags.standard import (ILByteArrayTag, ILStandardTagFactory,
+                               FilePayload)
+
+SIZE = 256 * 2**20
+
+
+def measure(name, func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f'{name:>36}: {elapsed * 1000:8.1f} ms, peak {peak / 2**20:8.1f} MiB')
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    source = os.path.join(tmp, 'source.bin')
+    target = os.path.join(tmp, 'target.bin')
+    with open(source, 'wb') as f:
+        for _ in range(SIZE // 2**20):
+            f.write(os.urandom(2**20))
+
+    def serialize_bytes():
+        with open(source, 'rb') as f:
+            tag = ILByteArrayTag(f.read())
+        with open(target, 'wb') as f:
+            tag.serialize(f)
+
+    def serialize_file():
+        with open(target, 'wb') as f:
+            ILByteArrayTag(FilePayload(source)).serialize(f)
+
+    def deserialize(spill_threshold):
+        def run():
+            with open(target, 'rb') as f:
+                tag = ILStandardTagFactory(
+                    spill_threshold=spill_threshold).deserialize(f)
+            assert len(tag.value) == SIZE
+        return run
+
+    measure('serialize from bytes', serialize_bytes)
+    measure('serialize from FilePayload', serialize_file)
+    measure('deserialize into bytes', deserialize(None))
+    measure('deserialize with spill_threshold', deserialize(2**20))
@@ -0,0 +1,38 @@
+# Compares the time and the memory needed to decode an ILTagSequenceTag with
+# 10^6 small integer, boolean and null tags with and without flyweights. Run
+# it from the src directory:
+#
+#   PYTHONPATH=. python benchmarks/flyweights.py
+import io
+import time
+import tracemalloc
+from pyiltags.standard import (ILBoolTag, ILILInt64Tag, ILNullTag,
+                               ILStandardTagFactory, ILTagSequenceTag,
+                               ILUInt8Tag, ILTAG_NULL_ID)
+
+COUNT = 1000000
+
+SAMPLES = [lambda i: ILUInt8Tag(i & 0xFF), lambda i: ILILInt64Tag(i & 0x7F),
+           lambda i: ILBoolTag(i & 1 == 1), lambda i: ILNullTag()]
+
+writer = io.BytesIO()
+ILTagSequenceTag([SAMPLES[i % len(SAMPLES)](i)
+                  for i in range(COUNT)]).serialize(writer)
+serialized = writer.getvalue()
+
+# Creates the shared instances before the measurements
+ILStandardTagFactory.flyweight(ILTAG_NULL_ID)
+
+for flyweights in [False, True]:
+    f = ILStandardTagFactory(flyweights=flyweights)
+    start = time.perf_counter()
+    tag = f.deserialize(io.BytesIO(serialized))
+    elapsed = time.perf_counter() - start
+    del tag
+    tracemalloc.start()
+    tag = f.deserialize(io.BytesIO(serialized))
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del tag
+    print(f'flyweights={flyweights!s:>5}: {elapsed * 1000:10.1f} ms '
+          f'{memory / 2**20:10.1f} MiB')
@@ -0,0 +1,62 @@
+# Compares the bulk ILInt codec with and without NumPy against encoding and
+# decoding each value with pyilint. Run it from the src directory:
+#
+#   PYTHONPATH=. python benchmarks/ilint_array.py
+#
+# The per-value baseline is skipped for the largest size as it takes too long.
+# Each measurement is the best of 3 runs.
+import array
+import io
+import random
+import time
+from unittest import mock
+import pyilint
+from pyiltags import util
+
+SIZES = [10**3, 10**5, 10**7]
+
+
+def per_value_encode(values) -> bytes:
+    writer = io.BytesIO()
+    for v in values:
+        pyilint.ilint_encode_to_stream(v, writer)
+    return writer.getvalue()
+
+
+def per_value_decode(buff: bytes, count: int):
+    reader = io.BytesIO(buff)
+    return [pyilint.ilint_decode_from_stream(reader)[0] for _ in range(count)]
+
+
+def measure(f, *args) -> float:
+    best = None
+    for _ in range(3):
+        start = time.perf_counter()
+        f(*args)
+        elapsed = (time.perf_counter() - start) * 1000
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def run(name: str, encode, decode, values, encoded):
+    print(f'{len(values):>10} {name:>10} {measure(encode, values):>12.2f} '
+          f'{measure(decode, encoded, len(values)):>12.2f}')
+
+
+random.seed(1234)
+print(f'{"count":>10} {"codec":>10} {"encode (ms)":>12} {"decode (ms)":>12}')
+for count in SIZES:
+    # Mix of small values and values with all sizes
+    values = array.array('Q', [random.randrange(0, 2**random.randrange(1, 65))
+                               if i % 2 else random.randrange(0, 0xF8)
+                               for i in range(count)])
+    encoded = util.ilint_encode_array(values)
+    if count < SIZES[-1]:
+        run('pyilint', per_value_encode, per_value_decode, values, encoded)
+    with mock.patch.object(util, 'numpy', None):
+        run('python', util.ilint_encode_array, util.ilint_decode_array,
+            values, encoded)
+    if util.numpy is not None:
+        run('numpy', util.ilint_encode_array, util.ilint_decode_array,
+            values, encoded)
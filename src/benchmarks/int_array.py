@@ -0,0 +1,29 @@
+# Measures the memory used by a large ILIntArrayTag and the time needed to
+# build and decode it. Run it from the src directory:
+#
+#   PYTHONPATH=. python benchmarks/int_array.py
+import io
+import time
+import tracemalloc
+from pyiltags.standard import ILIntArrayTag, ILStandardTagFactory
+
+COUNT = 1000000
+
+tracemalloc.start()
+before = tracemalloc.get_traced_memory()[0]
+start = time.perf_counter()
+tag = ILIntArrayTag(range(COUNT))
+elapsed = time.perf_counter() - start
+after = tracemalloc.get_traced_memory()[0]
+tracemalloc.stop()
+print(f'extend: {elapsed * 1000:.2f} ms, '
+      f'{(after - before) / COUNT:.1f} bytes per element')
+
+writer = io.BytesIO()
+tag.serialize(writer)
+serialized = writer.getvalue()
+
+start = time.perf_counter()
+ILStandardTagFactory().deserialize(io.BytesIO(serialized))
+elapsed = time.perf_counter() - start
+print(f'deserialize: {elapsed * 1000:.2f} ms')
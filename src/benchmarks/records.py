@@ -0,0 +1,37 @@
+# Measures the time and the memory needed to decode an ILTagArrayTag with
+# 100000 ILDictionaryTag records with the same keys. Run it from the src
+# directory:
+#
+#   PYTHONPATH=. python benchmarks/records.py
+import io
+import time
+import tracemalloc
+from pyiltags.standard import (ILDictionaryTag, ILILInt64Tag,
+                               ILStandardTagFactory, ILStringTag,
+                               ILTagArrayTag)
+
+COUNT = 100000
+
+records = ILTagArrayTag()
+for i in range(COUNT):
+    r = ILDictionaryTag()
+    r['identifier'] = ILILInt64Tag(i)
+    r['description'] = ILStringTag('x')
+    r['timestamp'] = ILILInt64Tag(1600000000 + i)
+    records.append(r)
+writer = io.BytesIO()
+records.serialize(writer)
+serialized = writer.getvalue()
+del records, writer
+
+f = ILStandardTagFactory()
+start = time.perf_counter()
+tag = f.deserialize(io.BytesIO(serialized))
+elapsed = time.perf_counter() - start
+del tag
+
+tracemalloc.start()
+tag = f.deserialize(io.BytesIO(serialized))
+memory = tracemalloc.get_traced_memory()[0]
+tracemalloc.stop()
+print(f'decode {elapsed * 1000:8.1f} ms, memory {memory / 2**20:8.1f} MiB')
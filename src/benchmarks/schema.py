@@ -0,0 +1,62 @@
+# Measures the time needed to encode and decode 20000 messages with the
+# standard tags and with the codec generated from their schema. Run it from
+# the src directory:
+#
+#   PYTHONPATH=. python benchmarks/schema.py
+import io
+import time
+from pyiltags.schema import *
+
+COUNT = 20000
+
+schema = ILRecordSchema({
+    'id': ILValueSchema(ILTAG_UINT32_ID),
+    'name': ILValueSchema(ILTAG_STRING_ID),
+    'active': ILValueSchema(ILTAG_BOOL_ID),
+    'samples': ILArraySchema(ILValueSchema(ILTAG_ILINT64_ID)),
+    'attributes': ILStringDictionarySchema(),
+})
+messages = [{
+    'id': i,
+    'name': f'message {i}',
+    'active': i % 2 == 0,
+    'samples': list(range(i, i + 8)),
+    'attributes': {'owner': 'node', 'zone': str(i % 10)},
+} for i in range(COUNT)]
+codec = schema.compile()
+factory = ILStandardTagFactory()
+
+
+def tags_encode():
+    ret = []
+    for m in messages:
+        writer = io.BytesIO()
+        schema.to_tag(m).serialize(writer)
+        ret.append(writer.getvalue())
+    return ret
+
+
+def tags_decode(encoded):
+    for e in encoded:
+        schema.from_tag(factory.deserialize(io.BytesIO(e)))
+
+
+def codec_encode():
+    return [codec.encode(m) for m in messages]
+
+
+def codec_decode(encoded):
+    for e in encoded:
+        codec.decode(e)
+
+
+for name, encode, decode in (('tags', tags_encode, tags_decode),
+                             ('codec', codec_encode, codec_decode)):
+    start = time.perf_counter()
+    encoded = encode()
+    encode_time = time.perf_counter() - start
+    start = time.perf_counter()
+    decode(encoded)
+    decode_time = time.perf_counter() - start
+    print(f'{name:>6} encode {encode_time * 1000:8.1f} ms, '
+          f'decode {decode_time * 1000:8.1f} ms')
@@ -0,0 +1,50 @@
+# Measures the serialization cost per node of ILTagArrayTag trees with the
+# same number of nodes but different depths. Run it from the src directory:
+#
+#   PYTHONPATH=. python benchmarks/serialize_depth.py
+import io
+import time
+from pyiltags.standard import ILTagArrayTag, ILUInt8Tag
+
+NODES = 30000
+
+
+def build_tree(depth: int) -> ILTagArrayTag:
+    """
+    Creates a chain of `depth` arrays where each level holds a share of
+    the NODES leaves and the next level.
+    """
+    leaves_per_level = max(1, NODES // depth - 1)
+    root = ILTagArrayTag()
+    tag = root
+    for _ in range(depth - 1):
+        for _ in range(leaves_per_level):
+            tag.append(ILUInt8Tag(1))
+        child = ILTagArrayTag()
+        tag.append(child)
+        tag = child
+    for _ in range(leaves_per_level):
+        tag.append(ILUInt8Tag(1))
+    return root
+
+
+def count_nodes(tag) -> int:
+    count = 0
+    stack = [tag]
+    while stack:
+        t = stack.pop()
+        count += 1
+        if isinstance(t, ILTagArrayTag):
+            stack.extend(t)
+    return count
+
+
+print(f'{"depth":>8} {"nodes":>8} {"total (ms)":>12} {"per node (us)":>14}')
+for depth in [1, 10, 100, 1000, 10000]:
+    tag = build_tree(depth)
+    nodes = count_nodes(tag)
+    start = time.perf_counter()
+    writer = io.BytesIO()
+    tag.serialize(writer)
+    elapsed = time.perf_counter() - start
+    print(f'{depth:>8} {nodes:>8} {elapsed * 1000:>12.2f} {elapsed * 1e6 / nodes:>14.3f}')
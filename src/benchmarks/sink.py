@@ -0,0 +1,50 @@
+# Compares the time and the peak memory needed to compute the SHA-256 of a
+# 256 MiB ILByteArrayTag payload read from a file, decoding it into memory
+# and using a sink registered with ILStandardTagFactory.register_sink(). Run
+# it from the src directory:
+#
+#   PYTHONPATH=. python benchmarks/sink.py
+import hashlib
+import os
+import tempfile
+import time
+import tracemalloc
+from pyiltags.standard import (ILByteArrayTag, ILStandardTagFactory,
+                               ILTAG_BYTE_ARRAY_ID)
+
+SIZE = 256 * 2**20
+
+
+def hash_decoded(path):
+    with open(path, 'rb') as f:
+        tag = ILStandardTagFactory().deserialize(f)
+    return hashlib.sha256(tag.value).digest()
+
+
+def hash_sink(path):
+    hasher = hashlib.sha256()
+
+    def sink(tag, size, chunks):
+        for chunk in chunks:
+            hasher.update(chunk)
+    f = ILStandardTagFactory()
+    f.register_sink(ILTAG_BYTE_ARRAY_ID, sink)
+    with open(path, 'rb') as reader:
+        f.deserialize(reader)
+    return hasher.digest()
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    path = os.path.join(tmp, 'payload.bin')
+    with open(path, 'wb') as f:
+        ILByteArrayTag(os.urandom(SIZE)).serialize(f)
+    digests = []
+    for name, func in [('decode', hash_decoded), ('sink', hash_sink)]:
+        tracemalloc.start()
+        start = time.perf_counter()
+        digests.append(func(path))
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f'{name:>8}: {elapsed * 1000:8.1f} ms, peak {peak / 2**20:8.1f} MiB')
+    assert digests[0] == digests[1]
@@ -0,0 +1,33 @@
+# Measures the time and the memory needed to decode an ILTagSequenceTag with
+# 300000 ILStringTag and to serialize it again without reading the strings.
+# Run it from the src directory:
+#
+#   PYTHONPATH=. python benchmarks/strings.py
+import io
+import time
+import tracemalloc
+from pyiltags.standard import (ILStandardTagFactory, ILStringTag,
+                               ILTagSequenceTag)
+
+COUNT = 300000
+
+writer = io.BytesIO()
+ILTagSequenceTag([ILStringTag(f'Andróide número {i}')
+                  for i in range(COUNT)]).serialize(writer)
+serialized = writer.getvalue()
+
+f = ILStandardTagFactory()
+start = time.perf_counter()
+tag = f.deserialize(io.BytesIO(serialized))
+decoded = time.perf_counter()
+tag.serialize(io.BytesIO())
+elapsed = time.perf_counter()
+del tag
+
+tracemalloc.start()
+tag = f.deserialize(io.BytesIO(serialized))
+memory = tracemalloc.get_traced_memory()[0]
+tracemalloc.stop()
+print(f'decode {(decoded - start) * 1000:8.1f} ms, '
+      f'serialize {(elapsed - decoded) * 1000:8.1f} ms, '
+      f'memory {memory / 2**20:8.1f} MiB')
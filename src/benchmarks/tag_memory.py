@@ -0,0 +1,42 @@
+# Measures the memory used by each instance of a few standard tags. Run it
+# from the src directory:
+#
+#   PYTHONPATH=. python benchmarks/tag_memory.py
+import tracemalloc
+from pyiltags.standard import (ILBinary64Tag, ILILInt64Tag, ILNullTag,
+                               ILStringTag, ILTagArrayTag, ILUInt8Tag)
+
+COUNT = 100000
+
+SAMPLES = [
+    ('ILNullTag', lambda i: ILNullTag()),
+    ('ILUInt8Tag', lambda i: ILUInt8Tag(i & 0xFF)),
+    ('ILILInt64Tag', lambda i: ILILInt64Tag(i)),
+    ('ILBinary64Tag', lambda i: ILBinary64Tag(float(i))),
+    ('ILStringTag', lambda i: ILStringTag('abc')),
+]
+
+
+def measure(create) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tags = [create(i) for i in range(COUNT)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # Removes the list itself from the results
+    return (after - before) / COUNT - 8
+
+
+print(f'{"class":>16} {"bytes per instance":>20}')
+for name, create in SAMPLES:
+    print(f'{name:>16} {measure(create):>20.1f}')
+
+
+tracemalloc.start()
+array = ILTagArrayTag()
+before = tracemalloc.get_traced_memory()[0]
+for i in range(COUNT):
+    array.append(ILUInt8Tag(i & 0xFF))
+after = tracemalloc.get_traced_memory()[0]
+tracemalloc.stop()
+print(f'{"ILUInt8Tag in array":>16} {(after - before) / COUNT:>20.1f}')
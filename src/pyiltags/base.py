@@ -28,10 +28,11 @@
 # CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
-from typing import ForwardRef
+from typing import Callable, Dict, ForwardRef, Iterable, Iterator
 import sys
 import io
 import pyilint
+import weakref
 from .io import *
 from .util import *
 
@@ -117,8 +118,19 @@ class ILTagFactory:
         """
         raise NotImplementedError('Subclasses must override this method.')
 
+    def deserialize_into(self, reader: io.IOBase, tag: 'ILTag') -> 'ILTag':
+        """
+        Deserializes a tag from the reader reusing `tag` if possible. Returns
+        `tag` if it was reused or a new tag otherwise.
+
+        By default, it never reuses `tag` and calls `deserialize()`.
+        """
+        return self.deserialize(reader)
+
 
 class ILTag:
+    __slots__ = ('_id', '_parent', '_encoded', '_digest', '__weakref__')
+
     def __init__(self, id: int, allow_implicit=False) -> None:
         """
         Creates a new instance of this class.
@@ -129,6 +141,9 @@ class ILTag:
         """
         iltags_assert_valid_id(id)
         self._id = id
+        self._parent = None
+        self._encoded = None
+        self._digest = None
         if not allow_implicit and self.implicit:
             raise ValueError('Implicit tag is not allowed.')
 
@@ -153,6 +168,134 @@ class ILTag:
         """
         return iltags_is_standard(self.id)
 
+    @property
+    def frozen(self) -> bool:
+        """
+        Returns True if this tag is frozen. See `freeze()` for further details.
+        """
+        return False
+
+    def freeze(self) -> 'ILTag':
+        """
+        Freezes this tag and all tags inside it in place. Frozen tags reject any
+        modification with an `ILTagStateError`, compute their encoding only once
+        and can be used as dictionary keys, as their `__hash__()` and `__eq__()`
+        are based on their ids and encoded payloads. This allows them to be shared
+        among threads without copies. Frozen tags are never equal to tags that
+        are not frozen, as the latter are compared by identity.
+
+        Payloads that are views of writable buffers are copied, thus changes to
+        those buffers do not reach the frozen tags.
+
+        Tags inside containers that do not implement the container protocol
+        are not frozen.
+
+        Returns this instance.
+        """
+        stack = [self]
+        while stack:
+            tag = stack.pop()
+            if tag.frozen:
+                continue
+            cls = tag.__class__
+            if iltags_is_container(cls):
+                tag._own_children()
+            tag._freeze_value()
+            encoded = tag._encoded
+            if _is_writable_view(encoded):
+                # Views of writable buffers cannot be hashed.
+                tag._encoded = encoded.tobytes()
+            tag.__class__ = _frozen_class(cls)
+            if iltags_is_container(cls):
+                stack.extend(tag.value_children())
+        self.encoded_value
+        return self
+
+    @property
+    def encoded_value(self) -> bytes:
+        """
+        Returns the original encoding of the payload of this tag if it is still
+        known or None otherwise. It is set by `ILStandardTagFactory` when 
+        `keep_encoded` is enabled and discarded as soon as this tag or one of
+        the tags inside it is modified.
+        """
+        return self._encoded
+
+    def set_encoded_value(self, encoded: bytes) -> None:
+        """
+        Sets the encoding of the payload of this tag. It allows the serialization
+        to copy `encoded` instead of encoding the value again until this tag is 
+        modified. If this tag is a container, it also registers itself as the
+        parent of its children, so that their changes discard this encoding.
+
+        It is up to the caller to ensure that `encoded` is the actual encoding
+        of the current value.
+
+        Parameters:
+        - `encoded`: The encoded payload;
+        """
+        if iltags_is_container(self.__class__):
+            for child in self.value_children():
+                child._link_parent(self)
+        self._encoded = encoded
+
+    def _link_parent(self, parent: 'ILTag') -> None:
+        """
+        Registers `parent` as a tag that holds cached information that depends
+        on this tag. Frozen tags are never linked as they cannot be modified.
+
+        The parents are kept as weak references, thus they do not keep the
+        containers alive. The links are removed by `_before_change()`, as the
+        parents register themselves again when they cache new information.
+        """
+        if self.frozen:
+            return
+        current = self._parent
+        if current is None:
+            self._parent = weakref.ref(parent)
+        elif current.__class__ is list:
+            alive = []
+            for ref in current:
+                p = ref()
+                if p is parent:
+                    return
+                if p is not None:
+                    alive.append(ref)
+            alive.append(weakref.ref(parent))
+            self._parent = alive
+        else:
+            p = current()
+            if p is parent:
+                return
+            if p is None:
+                self._parent = weakref.ref(parent)
+            else:
+                self._parent = [current, weakref.ref(parent)]
+
+    def _before_change(self) -> None:
+        """
+        Must be called before any change to the value of this tag. It discards
+        the known encoding and the cached tree digest of this tag and of all 
+        tags that contain it.
+        """
+        tag = self
+        stack = []
+        while True:
+            tag._encoded = None
+            tag._digest = None
+            parent = tag._parent
+            if parent is not None:
+                tag._parent = None
+                if parent.__class__ is list:
+                    stack.extend(parent)
+                else:
+                    stack.append(parent)
+            tag = None
+            while tag is None:
+                if not stack:
+                    return
+                tag = stack.pop()()
+
     def value_size(self) -> int:
         """
         Returns the size of the payload in bytes. It must be overridden by subclasses.
@@ -203,13 +346,527 @@ class ILTag:
         """
         Serializes this tag.
 
+        Tags that contain other tags are serialized by `iltags_serialize()`,
+        thus the depth of the tree is not limited by the recursion limit
+        of the interpreter.
+
         Parameters:
         - `writer`: The writer;
         """
-        pyilint.ilint_encode_to_stream(self.id, writer)
-        if not self.implicit:
-            pyilint.ilint_encode_to_stream(self.value_size(), writer)
-        self.serialize_value(writer)
+        if self._encoded is not None or iltags_is_container(self.__class__):
+            iltags_serialize(self, writer)
+        else:
+            pyilint.ilint_encode_to_stream(self.id, writer)
+            if not self.implicit:
+                pyilint.ilint_encode_to_stream(self.value_size(), writer)
+            self.serialize_value(writer)
+
+    def copy(self) -> 'ILTag':
+        """
+        Returns a copy of this tag. Containers share their children with the
+        copy until one of them changes: the values of a container are copied
+        only when it is modified, and its child tags are copied only when they
+        are accessed through it. Frozen tags are never copied as they cannot be
+        modified.
+
+        References to child tags obtained before the copy must not be used to
+        modify them, as they may be shared by both trees.
+
+        Reading the children of the copy or of the original container replaces
+        them by private copies in place, so concurrent reads of those containers
+        are not thread-safe. Use `freeze()` to share a tree among threads.
+        """
+        if self.frozen:
+            return self
+        cls = self.__class__
+        other = cls.__new__(cls)
+        for name in _slot_names(cls):
+            try:
+                setattr(other, name, getattr(self, name))
+            except AttributeError:
+                pass
+        if hasattr(self, '__dict__'):
+            other.__dict__.update(self.__dict__)
+        other._parent = None
+        other._after_copy(self)
+        return other
+
+    __copy__ = copy
+
+    def _after_copy(self, original: 'ILTag') -> None:
+        """
+        Called on a new copy created by `copy()` after all attributes were
+        copied from `original`. Subclasses that hold mutable objects must
+        override it to copy or share them. It does nothing by default.
+        """
+        pass
+
+    def evolve(self, path: Iterable, value: 'ILTag') -> 'ILTag':
+        """
+        Returns a copy of this tag with the tag at `path` replaced by `value`.
+        Only the containers along the path are copied, all other tags are
+        shared with this tag. See `copy()` for further details.
+
+        Parameters:
+        - `path`: The sequence of keys or indexes from this tag to the tag to
+          be replaced. It must not be empty;
+        - `value`: The new tag;
+        """
+        path = list(path)
+        if not path:
+            raise ValueError('The path cannot be empty.')
+        root = self.copy()
+        node = root
+        for key in path[:-1]:
+            node = node[key]
+        node[path[-1]] = value
+        return root
+
+    def materialize(self) -> 'ILTag':
+        """
+        Replaces all `memoryview` slices held by this tag and by all tags inside
+        it by copies, detaching them from the buffer they were deserialized
+        from. See `ILRawTag.value` for further details.
+
+        Returns this instance.
+        """
+        stack = [self]
+        while stack:
+            tag = stack.pop()
+            tag._materialize_value()
+            if tag._encoded.__class__ is memoryview:
+                tag._encoded = tag._encoded.tobytes()
+            if iltags_is_container(tag.__class__):
+                stack.extend(tag.value_children())
+        return self
+
+    def _materialize_value(self) -> None:
+        """
+        Replaces the `memoryview` slices held by this tag by copies. It does
+        nothing by default.
+        """
+        pass
+
+    def _freeze_value(self) -> None:
+        """
+        Called by `freeze()` before this tag is frozen. It must replace the
+        parts of the value that may still change, such as views of writable
+        buffers, by copies. It does nothing by default.
+        """
+        pass
+
+    def _own_children(self) -> None:
+        """
+        Ensures that the child tags of this container are not shared with
+        copies of it. See `copy()` for further details. It does nothing by
+        default.
+        """
+        pass
+
+    def digest(self, hasher) -> bytes:
+        """
+        Computes the digest of the serialization of this tag without storing it.
+        The serialization is written directly into the hash object.
+
+        Parameters:
+        - `hasher`: A new hash object, such as `hashlib.sha256()`. It must
+          implement the methods `update()` and `digest()`;
+
+        Returns the result of `hasher.digest()`.
+        """
+        self.serialize(DigestWriter(hasher))
+        return hasher.digest()
+
+    def tree_digest(self, hash_factory: Callable, cache: bool = False) -> bytes:
+        """
+        Computes the tree digest of this tag as defined by `iltags_tree_digest()`.
+
+        Parameters:
+        - `hash_factory`: A function that creates new hash objects, such as
+          `hashlib.sha256`;
+        - `cache`: If True, the digests of this tag and of all tags inside it
+          are kept until they are modified;
+        """
+        return iltags_tree_digest(self, hash_factory, cache)
+
+    def value_children(self) -> Iterable['ILTag']:
+        """
+        Returns the tags embedded into the payload of this tag in the order
+        they are serialized. It is part of the container protocol used by
+        `iltags_serialize()` and must be overridden by tags that contain
+        other tags.
+        """
+        raise NotImplementedError('Subclasses must override this method.')
+
+    def value_size_from_children(self, children_size: int) -> int:
+        """
+        Computes the size of the payload given the sum of the sizes of the
+        tags returned by `value_children()`. It is part of the container protocol
+        used by `iltags_serialize()` and must be overridden by tags that contain
+        other tags.
+
+        Parameters:
+        - `children_size`: The sum of the sizes of all children;
+        """
+        raise NotImplementedError('Subclasses must override this method.')
+
+    def serialize_value_iter(self, writer: io.IOBase) -> Iterator['ILTag']:
+        """
+        Iterative version of `serialize_value()`. It writes the parts of the
+        payload that are not tags into the writer and yields the child tags,
+        expecting the caller to serialize each one before resuming the
+        iteration. It is part of the container protocol used by 
+        `iltags_serialize()` and must be overridden by tags that contain
+        other tags.
+
+        Parameters:
+        - `writer`: The writer;
+        """
+        raise NotImplementedError('Subclasses must override this method.')
+
+    def tree_digest_value_iter(self, writer: io.IOBase) -> Iterator['ILTag']:
+        """
+        Version of `serialize_value_iter()` used by `iltags_tree_digest()`. It
+        must yield all child tags, even those that `serialize_value_iter()`
+        writes directly into the writer. By default, it calls
+        `serialize_value_iter()`.
+
+        Parameters:
+        - `writer`: The writer;
+        """
+        return self.serialize_value_iter(writer)
+
+
+_SLOT_NAMES = {}
+
+
+def _slot_names(cls) -> list:
+    """
+    Returns the names of all slots of a class, including the slots of its
+    base classes.
+    """
+    names = _SLOT_NAMES.get(cls)
+    if names is None:
+        names = []
+        for c in cls.__mro__:
+            slots = c.__dict__.get('__slots__', ())
+            if isinstance(slots, str):
+                slots = (slots,)
+            for name in slots:
+                if name in ('__dict__', '__weakref__'):
+                    continue
+                if name.startswith('__') and not name.endswith('__'):
+                    name = '_' + c.__name__.lstrip('_') + name
+                names.append(name)
+        names = _SLOT_NAMES.setdefault(cls, names)
+    return names
+
+
+_CONTAINER_CLASSES = {}
+
+
+def _find_definer(cls, name: str):
+    for c in cls.__mro__:
+        if name in c.__dict__:
+            return c
+    return None
+
+
+def _is_writable_view(value) -> bool:
+    """
+    Returns True if `value` is a `memoryview` of a writable buffer.
+    """
+    return value.__class__ is memoryview and not memoryview(value.obj).readonly
+
+
+def iltags_is_container(cls) -> bool:
+    """
+    Verifies if the given tag class implements the container protocol
+    (`value_children()`, `value_size_from_children()` and 
+    `serialize_value_iter()`) in a way that is consistent with its 
+    `serialize()`, `serialize_value()` and `value_size()`. A subclass of a
+    container that overrides any of those methods without overriding
+    `serialize_value_iter()` is not considered a container anymore.
+
+    Parameters:
+    - `cls`: The class of the tag;
+    """
+    ret = _CONTAINER_CLASSES.get(cls)
+    if ret is None:
+        definer = _find_definer(cls, 'serialize_value_iter')
+        ret = definer is not None and definer is not ILTag
+        if ret:
+            for name in ('serialize', 'serialize_value', 'value_size'):
+                if not issubclass(definer, _find_definer(cls, name)):
+                    ret = False
+                    break
+        _CONTAINER_CLASSES[cls] = ret
+    return ret
+
+
+def _write_tag_header(id: int, value_size: int, writer: io.IOBase) -> None:
+    pyilint.ilint_encode_to_stream(id, writer)
+    if id >= 16:
+        pyilint.ilint_encode_to_stream(value_size, writer)
+
+
+def iltags_compute_value_sizes(tag: ILTag) -> Dict[int, int]:
+    """
+    Computes the value size of `tag` and of all containers inside it without
+    recursion. The tag itself is always handled as a container.
+
+    Parameters:
+    - `tag`: The tag. It must implement the container protocol;
+
+    Returns a dictionary that maps the `id()` of each container to its value size.
+    Containers with a known encoding are not visited.
+    """
+    if tag._encoded is not None:
+        return {id(tag): len(tag._encoded)}
+    sizes = {}
+    stack = [[tag, iter(tag.value_children()), 0]]
+    while stack:
+        frame = stack[-1]
+        for child in frame[1]:
+            value_size = sizes.get(id(child))
+            if value_size is not None:
+                frame[2] += ILTag.compute_tag_size(child.id, value_size)
+            elif child._encoded is not None:
+                frame[2] += ILTag.compute_tag_size(child.id,
+                                                   len(child._encoded))
+            elif iltags_is_container(child.__class__):
+                stack.append([child, iter(child.value_children()), 0])
+                break
+            else:
+                frame[2] += child.tag_size()
+        else:
+            stack.pop()
+            container = frame[0]
+            value_size = container.value_size_from_children(frame[2])
+            sizes[id(container)] = value_size
+            if stack:
+                stack[-1][2] += ILTag.compute_tag_size(container.id, value_size)
+    return sizes
+
+
+def iltags_serialize(tag: ILTag, writer: io.IOBase) -> None:
+    """
+    Serializes a tag using an explicit stack instead of recursion. Containers
+    are serialized using `serialize_value_iter()` while all other tags are
+    serialized by their own `serialize()`. Tags with a known encoding are
+    written by copying it. The tag itself is always serialized with its header
+    followed by its value, even if it overrides `serialize()`.
+
+    Parameters:
+    - `tag`: The tag to be serialized;
+    - `writer`: The writer;
+    """
+    if tag._encoded is not None:
+        _write_tag_header(tag.id, len(tag._encoded), writer)
+        writer.write(tag._encoded)
+    elif iltags_is_container(tag.__class__):
+        sizes = iltags_compute_value_sizes(tag)
+        _write_tag_header(tag.id, sizes[id(tag)], writer)
+        _serialize_container_value(tag, sizes, writer)
+    else:
+        _write_tag_header(tag.id, tag.value_size(), writer)
+        tag.serialize_value(writer)
+
+
+def iltags_serialize_value(tag: ILTag, writer: io.IOBase) -> None:
+    """
+    Serializes only the payload of a tag. It is equivalent to 
+    `tag.serialize_value()` but uses the same strategy of `iltags_serialize()`.
+
+    Parameters:
+    - `tag`: The tag to be serialized;
+    - `writer`: The writer;
+    """
+    if tag._encoded is not None:
+        writer.write(tag._encoded)
+    elif iltags_is_container(tag.__class__):
+        _serialize_container_value(
+            tag, iltags_compute_value_sizes(tag), writer)
+    else:
+        tag.serialize_value(writer)
+
+
+def iltags_encode_value(tag: ILTag) -> bytes:
+    """
+    Returns the encoded payload of the given tag. The known encoding is
+    returned if it is available.
+
+    Parameters:
+    - `tag`: The tag to be encoded;
+    """
+    if tag._encoded is not None:
+        return tag._encoded
+    writer = io.BytesIO()
+    iltags_serialize_value(tag, writer)
+    return writer.getvalue()
+
+
+def _serialize_container_value(tag: ILTag, sizes: Dict[int, int], writer: io.IOBase) -> None:
+    stack = [tag.serialize_value_iter(writer)]
+    while stack:
+        for child in stack[-1]:
+            if child._encoded is not None:
+                _write_tag_header(child.id, len(child._encoded), writer)
+                writer.write(child._encoded)
+            elif iltags_is_container(child.__class__):
+                _write_tag_header(child.id, sizes[id(child)], writer)
+                stack.append(child.serialize_value_iter(writer))
+                break
+            else:
+                child.serialize(writer)
+        else:
+            stack.pop()
+
+
+_TREE_DIGEST_LEAF = b'\x00'
+_TREE_DIGEST_NODE = b'\x01'
+
+
+def iltags_tree_digest(tag: ILTag, hash_factory: Callable, cache: bool = False) -> bytes:
+    """
+    Computes the tree digest of a tag. Unlike the digest of the serialization
+    of the tag (see `ILTag.digest()`), the tree digest of a container can be
+    updated without hashing the unmodified tags inside it again.
+
+    The tree digest `TD(t)` of a tag `t` is defined as:
+
+    - If `t` does not implement the container protocol:
+      `TD(t) = H(0x00 || serialize(t))`;
+    - If `t` implements the container protocol:
+      `TD(t) = H(0x01 || ILInt(t.id) || P)`, where `P` is the payload of `t`
+      with the serialization of each child tag `c` replaced by `TD(c)`;
+
+    where `H` is the hash function and `||` is the concatenation. For example,
+    the tree digest of an `ILTagArrayTag` with the children `a` and `b` is
+    `H(0x01 || ILInt(21) || ILInt(2) || TD(a) || TD(b))`.
+
+    If `cache` is True, the digests of all tags are kept inside them until they
+    are modified, thus the next computation will only hash again the modified
+    tags and the containers above them. The cached values are reused only if
+    `hash_factory` is the same object.
+
+    Parameters:
+    - `tag`: The tag;
+    - `hash_factory`: A function that creates new hash objects, such as
+      `hashlib.sha256`;
+    - `cache`: If True, the digests of all tags are cached;
+    """
+    digest = _leaf_tree_digest(tag, hash_factory, cache)
+    if digest is not None:
+        return digest
+    stack = [_start_tree_digest(tag, hash_factory)]
+    while stack:
+        frame = stack[-1]
+        writer = frame[1]
+        for child in frame[2]:
+            if cache:
+                child._link_parent(frame[0])
+            digest = _leaf_tree_digest(child, hash_factory, cache)
+            if digest is None:
+                stack.append(_start_tree_digest(child, hash_factory))
+                break
+            writer.write(digest)
+        else:
+            stack.pop()
+            digest = writer.hasher.digest()
+            if cache:
+                frame[0]._digest = (hash_factory, digest)
+            if stack:
+                stack[-1][1].write(digest)
+    return digest
+
+
+def _leaf_tree_digest(tag: ILTag, hash_factory: Callable, cache: bool) -> bytes:
+    """
+    Returns the cached tree digest of the tag or computes it if the tag is
+    not a container. Returns None if the tree digest of the container must
+    be computed.
+    """
+    cached = tag._digest
+    if cached is not None and cached[0] is hash_factory:
+        return cached[1]
+    if iltags_is_container(tag.__class__):
+        return None
+    hasher = hash_factory()
+    hasher.update(_TREE_DIGEST_LEAF)
+    tag.serialize(DigestWriter(hasher))
+    digest = hasher.digest()
+    if cache:
+        tag._digest = (hash_factory, digest)
+    return digest
+
+
+def _start_tree_digest(tag: ILTag, hash_factory: Callable) -> list:
+    hasher = hash_factory()
+    hasher.update(_TREE_DIGEST_NODE)
+    writer = DigestWriter(hasher)
+    pyilint.ilint_encode_to_stream(tag.id, writer)
+    return [tag, writer, tag.tree_digest_value_iter(writer)]
+
+
+class ILFrozenTagMixin:
+    """
+    This class holds the methods of the frozen counterparts of the tag classes.
+    They are copied into a direct subclass of each frozen class, as `__class__`
+    assignment does not allow the addition of new bases. It is not meant to be
+    used directly, see `ILTag.freeze()` for further details.
+    """
+    __slots__ = ()
+
+    @property
+    def frozen(self) -> bool:
+        return True
+
+    def freeze(self) -> 'ILTag':
+        return self
+
+    @property
+    def encoded_value(self) -> bytes:
+        """
+        Returns the encoded payload of this tag. It is computed only once.
+        """
+        if self._encoded is None:
+            self._encoded = iltags_encode_value(self)
+        return self._encoded
+
+    def _before_change(self) -> None:
+        raise ILTagStateError('Frozen tags cannot be modified.')
+
+    def tag_size(self) -> int:
+        return ILTag.compute_tag_size(self.id, len(self.encoded_value))
+
+    def __hash__(self) -> int:
+        return hash((self.id, self.encoded_value))
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, ILTag):
+            if self is other:
+                return True
+            if not other.frozen:
+                # Consistent with the identity hash of the tags that are not frozen
+                return NotImplemented
+            return (self.id == other.id and
+                    self.encoded_value == iltags_encode_value(other))
+        return NotImplemented
+
+
+_FROZEN_CLASSES = {}
+
+
+def _frozen_class(cls):
+    ret = _FROZEN_CLASSES.get(cls)
+    if ret is None:
+        namespace = {k: v for k, v in ILFrozenTagMixin.__dict__.items()
+                     if k not in ('__dict__', '__weakref__', '__doc__', '__qualname__')}
+        namespace['__module__'] = cls.__module__
+        ret = type('Frozen' + cls.__name__, (cls,), namespace)
+        ret = _FROZEN_CLASSES.setdefault(cls, ret)
+    return ret
 
 
 class ILRawTag(ILTag):
@@ -217,6 +874,7 @@ class ILRawTag(ILTag):
     This class implements a raw `ILTag`. It can be used as an opaque
     implementation for any explicit tag.
     """
+    __slots__ = ('_value',)
     DEFAULT_VALUE = None
 
     def __init__(self, id: int, value: bytes = None) -> None:
@@ -226,6 +884,7 @@ class ILRawTag(ILTag):
         Parameters:
         - `id`: The tag id. It must be an explicit tag ID;
         - `value`: The value of the tag as bytes. None is equivalent to `self.default_value`.
+          See `value` for further details;
         """
         super().__init__(id, False)
         self.value = value
@@ -250,10 +909,19 @@ class ILRawTag(ILTag):
 
     @property
     def value(self) -> bytes:
+        """
+        The payload of the tag. It is a `bytes`, a read-only `memoryview` or a
+        `FilePayload`. A `bytearray` is copied into a new `bytes` while a
+        `memoryview` is kept as a read-only view of the same memory. The payload
+        is also kept as a view when it is deserialized from a reader that
+        implements `read_view()`, such as `MemoryReader`. Use `materialize()`
+        to replace the view by a copy.
+        """
         return self._value
 
     @value.setter
     def value(self, value: bytes):
+        self._before_change()
         if value is None:
             self._value = self.default_value
         else:
@@ -261,11 +929,24 @@ class ILRawTag(ILTag):
                 v = bytes(value)
             elif isinstance(value, bytes):
                 v = value
+            elif isinstance(value, memoryview):
+                v = readonly_view(value)
+            elif isinstance(value, FilePayload):
+                v = value
             else:
-                raise TypeError('The payload must bytes or bytearray.')
+                raise TypeError(
+                    'The payload must bytes, bytearray, memoryview or FilePayload.')
             self.assert_value_valid(v)
             self._value = v
 
+    def _materialize_value(self) -> None:
+        if self._value.__class__ is memoryview:
+            self._value = self._value.tobytes()
+
+    def _freeze_value(self) -> None:
+        if _is_writable_view(self._value):
+            self._value = self._value.tobytes()
+
     def value_size(self) -> int:
         if self.value is not None:
             return len(self.value)
@@ -273,11 +954,15 @@ class ILRawTag(ILTag):
             return 0
 
     def deserialize_value(self, tag_factory: ILTagFactory, tag_size: int, reader: io.IOBase) -> None:
-        self.value = read_bytes(tag_size, reader)
+        read_view = getattr(reader, 'read_view', None)
+        if read_view is not None:
+            self.value = read_view(tag_size)
+        else:
+            self.value = read_bytes(tag_size, reader)
 
     def serialize_value(self, writer: io.IOBase) -> None:
         if self.value is not None:
-            writer.write(self.value)
+            write_payload(self.value, writer)
 
 
 class ILFixedSizeTag(ILTag):
@@ -285,6 +970,7 @@ class ILFixedSizeTag(ILTag):
     This is is a special subclass of **ILTag** that helps the implementation
     of tags with fixed size payloads.
     """
+    __slots__ = ('_value_size',)
 
     def __init__(self, id: int, value_size: int, allow_implicit=False) -> None:
         """
@@ -307,6 +993,7 @@ class ILBaseIntTag(ILFixedSizeTag):
     """
     This is the base class for all big integer tags.
     """
+    __slots__ = ('_value', 'signed')
 
     def __init__(self, id: int, value_size: int, signed: bool, value=0, allow_implicit=False) -> None:
         """
@@ -340,6 +1027,7 @@ class ILBaseIntTag(ILFixedSizeTag):
         Sets the integer value. It may raise a `ValueError` if the
         value is outside of the range of the integer defined in the constructor.
         """
+        self._before_change()
         if not isinstance(value, int):
             raise TypeError('value must be a int.')
         assert_int_bounds(value, self.value_size(), self.signed)
@@ -359,6 +1047,7 @@ class ILBaseFloatTag(ILFixedSizeTag):
     """
     This class implements the base class for floating point tags with 32 and 64 bits.
     """
+    __slots__ = ('_value',)
 
     def __init__(self, id: int, value_size: int, value: float = 0.0, allow_implicit=False) -> None:
         """
@@ -386,6 +1075,7 @@ class ILBaseFloatTag(ILFixedSizeTag):
         """
         Sets the value of the tag.
         """
+        self._before_change()
         if isinstance(value, int):
             value = float(value)
         elif not isinstance(value, float):
@@ -28,6 +28,8 @@
 # CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import gc
+import hashlib
 import unittest
 from unittest import mock
 from unittest.mock import MagicMock
@@ -79,6 +81,8 @@ class TestILTagFactory(unittest.TestCase):
         self.assertFalse(c.strict)
         self.assertRaises(NotImplementedError, c.create, 10)
         self.assertRaises(NotImplementedError, c.deserialize, io.BytesIO())
+        self.assertRaises(NotImplementedError, c.deserialize_into,
+                          io.BytesIO(), ILRawTag(1234))
 
 
 class TestILTag(unittest.TestCase):
@@ -114,15 +118,19 @@ class TestILTag(unittest.TestCase):
         self.assertRaises(NotImplementedError, t.value_size)
 
     def test_tag_size(self):
+        # ILTag uses __slots__, thus only subclasses can be patched
+        class PatchableILTag(ILTag):
+            pass
+
         for id in range(16):
-            t = ILTag(id, True)
+            t = PatchableILTag(id, True)
             t.value_size = MagicMock(return_value=id)
             size = ilint_size(id) + id
             self.assertEqual(t.tag_size(), size)
             t.value_size.assert_called_once()
 
         for id in [16, 256, 1231231]:
-            t = ILTag(id)
+            t = PatchableILTag(id)
             t.value_size = MagicMock(return_value=id)
             size = ilint_size(id) + ilint_size(id) + id
             self.assertEqual(t.tag_size(), size)
@@ -183,6 +191,377 @@ class TestILTag(unittest.TestCase):
                 self.assertEqual(exp, ILTag.compute_tag_size(id, value_size))
 
 
+class DummyContainerTag(ILTag):
+    """
+    Minimal container used to test the container protocol. Its payload is
+    a 1 byte marker followed by the serialization of its children.
+    """
+
+    def __init__(self, id: int = 1234, children=None) -> None:
+        super().__init__(id)
+        self.children = children if children is not None else []
+
+    def value_size(self) -> int:
+        return iltags_compute_value_sizes(self)[id(self)]
+
+    def value_children(self):
+        return self.children
+
+    def value_size_from_children(self, children_size: int) -> int:
+        return 1 + children_size
+
+    def serialize_value(self, writer: io.IOBase) -> None:
+        for t in self.serialize_value_iter(writer):
+            t.serialize(writer)
+
+    def serialize_value_iter(self, writer: io.IOBase):
+        writer.write(b'*')
+        for t in self.children:
+            yield t
+
+
+class DummyLeafTag(ILTag):
+    def value_size(self) -> int:
+        return 4
+
+    def serialize_value(self, writer: io.IOBase) -> None:
+        writer.write(b'1234')
+
+
+def dummy_recursive_serialize(tag: ILTag, writer: io.IOBase) -> None:
+    """
+    Reference implementation of the serialization using recursion.
+    """
+    if isinstance(tag, DummyContainerTag):
+        payload = io.BytesIO()
+        payload.write(b'*')
+        for t in tag.children:
+            dummy_recursive_serialize(t, payload)
+        ilint_encode_to_stream(tag.id, writer)
+        ilint_encode_to_stream(payload.tell(), writer)
+        writer.write(payload.getvalue())
+    else:
+        tag.serialize(writer)
+
+
+class TestILTagSerializer(unittest.TestCase):
+
+    def test_iltags_is_container(self):
+        class OverrideSerializeValue(DummyContainerTag):
+            def serialize_value(self, writer: io.IOBase) -> None:
+                super().serialize_value(writer)
+
+        class OverrideSerialize(DummyContainerTag):
+            def serialize(self, writer: io.IOBase) -> None:
+                super().serialize(writer)
+
+        class OverrideValueSize(DummyContainerTag):
+            def value_size(self) -> int:
+                return super().value_size()
+
+        class OverrideAll(OverrideValueSize):
+            def serialize_value_iter(self, writer: io.IOBase):
+                return super().serialize_value_iter(writer)
+
+        self.assertFalse(iltags_is_container(ILTag))
+        self.assertFalse(iltags_is_container(ILRawTag))
+        self.assertFalse(iltags_is_container(DummyLeafTag))
+        self.assertTrue(iltags_is_container(DummyContainerTag))
+        self.assertFalse(iltags_is_container(OverrideSerializeValue))
+        self.assertFalse(iltags_is_container(OverrideSerialize))
+        self.assertFalse(iltags_is_container(OverrideValueSize))
+        self.assertTrue(iltags_is_container(OverrideAll))
+
+    def test_iltags_compute_value_sizes(self):
+        leaf = DummyLeafTag(123)
+        inner = DummyContainerTag(16, [leaf, leaf])
+        root = DummyContainerTag(17, [inner, leaf, inner])
+
+        sizes = iltags_compute_value_sizes(root)
+        self.assertEqual(2, len(sizes))
+        self.assertEqual(1 + 2 * leaf.tag_size(), sizes[id(inner)])
+        self.assertEqual(1 + 2 * (2 + sizes[id(inner)]) + leaf.tag_size(),
+                         sizes[id(root)])
+        self.assertEqual(sizes[id(root)], root.value_size())
+
+    def test_iltags_serialize(self):
+        leaf = DummyLeafTag(123)
+        inner = DummyContainerTag(16, [leaf, DummyLeafTag(1, True)])
+        root = DummyContainerTag(17, [inner, leaf, DummyContainerTag()])
+
+        for tag in [leaf, inner, root]:
+            exp = io.BytesIO()
+            dummy_recursive_serialize(tag, exp)
+            writer = io.BytesIO()
+            iltags_serialize(tag, writer)
+            self.assertEqual(exp.getvalue(), writer.getvalue())
+            writer = io.BytesIO()
+            tag.serialize(writer)
+            self.assertEqual(exp.getvalue(), writer.getvalue())
+
+    def test_iltags_serialize_custom(self):
+        class CustomContainerTag(DummyContainerTag):
+            def serialize(self, writer: io.IOBase) -> None:
+                writer.write(b'\x10\x01!')
+
+        root = DummyContainerTag(17, [CustomContainerTag(16)])
+        writer = io.BytesIO()
+        root.serialize(writer)
+        self.assertEqual(b'\x11\x04*\x10\x01!', writer.getvalue())
+
+    def test_iltags_serialize_deep(self):
+        depth = sys.getrecursionlimit() * 4
+        root = DummyContainerTag()
+        tag = root
+        for _ in range(depth):
+            child = DummyContainerTag()
+            tag.children.append(child)
+            tag = child
+        tag.children.append(DummyLeafTag(123))
+
+        writer = io.BytesIO()
+        root.serialize(writer)
+        serialized = writer.getvalue()
+        self.assertEqual(iltags_compute_value_sizes(root)[id(root)] +
+                         ilint_size(root.id) +
+                         ilint_size(root.value_size()), len(serialized))
+        self.assertTrue(serialized.endswith(b'*{\x041234'))
+
+
+class TestILTagEncodedValue(unittest.TestCase):
+
+    def test_set_encoded_value(self):
+        t = ILRawTag(16, b'1234')
+        self.assertIsNone(t.encoded_value)
+        t.set_encoded_value(b'abcd')
+        self.assertEqual(b'abcd', t.encoded_value)
+        writer = io.BytesIO()
+        t.serialize(writer)
+        self.assertEqual(b'\x10\x04abcd', writer.getvalue())
+        self.assertEqual(6, t.tag_size())
+
+        t.value = b'123'
+        self.assertIsNone(t.encoded_value)
+        writer = io.BytesIO()
+        t.serialize(writer)
+        self.assertEqual(b'\x10\x03123', writer.getvalue())
+
+    def test_container(self):
+        leaf = ILRawTag(16, b'1234')
+        inner = DummyContainerTag(17, [leaf])
+        root = DummyContainerTag(18, [inner])
+        leaf.set_encoded_value(b'abcd')
+        inner.set_encoded_value(b'*\x10\x04abcd')
+        root.set_encoded_value(b'*\x11\x07*\x10\x04abcd')
+        self.assertIs(inner, leaf._parent())
+        self.assertIs(root, inner._parent())
+        self.assertEqual({id(root): 10}, iltags_compute_value_sizes(root))
+        writer = io.BytesIO()
+        root.serialize(writer)
+        self.assertEqual(b'\x12\x0a*\x11\x07*\x10\x04abcd',
+                         writer.getvalue())
+
+        leaf.value = b'12'
+        self.assertIsNone(leaf.encoded_value)
+        self.assertIsNone(inner.encoded_value)
+        self.assertIsNone(root.encoded_value)
+        writer = io.BytesIO()
+        root.serialize(writer)
+        self.assertEqual(b'\x12\x08*\x11\x05*\x10\x0212',
+                         writer.getvalue())
+
+        # Only the path to the root is affected
+        sibling = ILRawTag(16, b'1')
+        root = DummyContainerTag(18, [inner, sibling])
+        sibling.set_encoded_value(b'1')
+        root.set_encoded_value(b'*\x11\x05*\x10\x0212\x10\x011')
+        inner.children.append(ILRawTag(16))
+        inner._before_change()
+        self.assertIsNone(root.encoded_value)
+        self.assertEqual(b'1', sibling.encoded_value)
+
+
+class TestILFrozenTag(unittest.TestCase):
+
+    def test_freeze(self):
+        t = ILRawTag(16, b'1234')
+        self.assertFalse(t.frozen)
+        self.assertIs(t, t.freeze())
+        self.assertTrue(t.frozen)
+        self.assertIsInstance(t, ILRawTag)
+        self.assertEqual(b'1234', t.value)
+        self.assertEqual(b'1234', t.encoded_value)
+        self.assertEqual(6, t.tag_size())
+        self.assertIs(t, t.freeze())
+        with self.assertRaises(ILTagStateError):
+            t.value = b'123'
+        self.assertEqual(b'1234', t.value)
+        writer = io.BytesIO()
+        t.serialize(writer)
+        self.assertEqual(b'\x10\x041234', writer.getvalue())
+
+        # Same class for all frozen instances
+        self.assertIs(t.__class__, ILRawTag(17).freeze().__class__)
+
+    def test_freeze_container(self):
+        leaf = ILRawTag(16, b'1234')
+        inner = DummyContainerTag(17, [leaf])
+        root = DummyContainerTag(18, [inner, leaf])
+        exp = io.BytesIO()
+        root.serialize(exp)
+
+        root.freeze()
+        self.assertTrue(root.frozen)
+        self.assertTrue(inner.frozen)
+        self.assertTrue(leaf.frozen)
+        self.assertTrue(iltags_is_container(root.__class__))
+        writer = io.BytesIO()
+        root.serialize(writer)
+        self.assertEqual(exp.getvalue(), writer.getvalue())
+        self.assertEqual(len(exp.getvalue()), root.tag_size())
+        self.assertEqual(exp.getvalue()[2:], root.encoded_value)
+
+    def test_hash_eq(self):
+        a = ILRawTag(16, b'1234').freeze()
+        b = ILRawTag(16, b'1234').freeze()
+        c = ILRawTag(17, b'1234').freeze()
+        d = ILRawTag(16, b'123').freeze()
+        self.assertEqual(a, b)
+        self.assertEqual(hash(a), hash(b))
+        self.assertNotEqual(a, c)
+        self.assertNotEqual(a, d)
+        self.assertNotEqual(a, b'1234')
+
+        # Mutable tags are compared by identity, like their hashes
+        self.assertNotEqual(a, ILRawTag(16, b'1234'))
+        self.assertNotEqual(ILRawTag(16, b'1234'), a)
+        self.assertNotEqual(ILRawTag(16, b'123'), a)
+
+        # Views of writable buffers are copied
+        buff = bytearray(b'1234')
+        e = ILRawTag(16, memoryview(buff)).freeze()
+        h = hash(e)
+        buff[0] = 0
+        self.assertEqual(b'1234', bytes(e.value))
+        self.assertEqual(h, hash(e))
+        self.assertEqual(a, e)
+        e = ILRawTag(16, memoryview(b'1234')).freeze()
+        self.assertIs(memoryview, e.value.__class__)
+        self.assertEqual(a, e)
+
+        cache = {a: 1, c: 2}
+        self.assertEqual(1, cache[b])
+        self.assertEqual(2, cache[ILRawTag(17, b'1234').freeze()])
+        self.assertNotIn(d, cache)
+
+
+class CountingHash:
+    """
+    Wrapper of hashlib.sha256 that counts the number of hash objects created.
+    """
+    count = 0
+
+    def __init__(self) -> None:
+        CountingHash.count += 1
+        self.hasher = hashlib.sha256()
+
+    def update(self, b):
+        self.hasher.update(b)
+
+    def digest(self) -> bytes:
+        return self.hasher.digest()
+
+
+class TestILTagTreeDigest(unittest.TestCase):
+
+    def test_leaf(self):
+        t = ILRawTag(16, b'1234')
+        exp = hashlib.sha256(b'\x00\x10\x041234').digest()
+        self.assertEqual(exp, t.tree_digest(hashlib.sha256))
+        self.assertEqual(exp, iltags_tree_digest(t, hashlib.sha256))
+        self.assertIsNone(t._digest)
+        self.assertEqual(exp, t.tree_digest(hashlib.sha256, True))
+        self.assertEqual((hashlib.sha256, exp), t._digest)
+        t.value = b'123'
+        self.assertIsNone(t._digest)
+
+    def test_container(self):
+        leaf1 = ILRawTag(16, b'1234')
+        leaf2 = ILRawTag(16, b'5678')
+        inner = DummyContainerTag(17, [leaf1, leaf2])
+        root = DummyContainerTag(18, [inner, leaf2])
+
+        def td_leaf(t):
+            writer = io.BytesIO()
+            t.serialize(writer)
+            return hashlib.sha256(b'\x00' + writer.getvalue()).digest()
+
+        exp_inner = hashlib.sha256(
+            b'\x01\x11*' + td_leaf(leaf1) + td_leaf(leaf2)).digest()
+        exp = hashlib.sha256(b'\x01\x12*' + exp_inner +
+                             td_leaf(leaf2)).digest()
+        self.assertEqual(exp, root.tree_digest(hashlib.sha256))
+
+        # Cached
+        CountingHash.count = 0
+        exp = root.tree_digest(CountingHash, True)
+        self.assertEqual(4, CountingHash.count)
+        self.assertEqual(exp, root.tree_digest(CountingHash, True))
+        self.assertEqual(4, CountingHash.count)
+        self.assertIs(inner, leaf1._parent())
+        self.assertEqual([inner, root], [p() for p in leaf2._parent])
+
+        # Modify a leaf shared by 2 containers
+        leaf2.value = b'0'
+        self.assertIsNone(inner._digest)
+        self.assertIsNone(root._digest)
+        self.assertIsNotNone(leaf1._digest)
+        self.assertIsNone(leaf2._parent)
+        self.assertIsNone(inner._parent)
+        exp = root.tree_digest(hashlib.sha256)
+        CountingHash.count = 0
+        self.assertEqual(exp, root.tree_digest(CountingHash, True))
+        self.assertEqual(3, CountingHash.count)
+
+        # Another hash function
+        self.assertNotEqual(exp, root.tree_digest(hashlib.sha512))
+        self.assertEqual(exp, root.tree_digest(CountingHash))
+
+    def test_parent_links(self):
+        leaf = ILRawTag(16, b'1234')
+        for _ in range(100):
+            DummyContainerTag(17, [leaf]).tree_digest(hashlib.sha256, True)
+        # The containers are not kept alive by their children
+        gc.collect()
+        self.assertIsNot(list, leaf._parent.__class__)
+        self.assertIsNone(leaf._parent())
+
+        containers = [DummyContainerTag(17, [leaf]) for _ in range(3)]
+        for c in containers:
+            c.tree_digest(hashlib.sha256, True)
+        self.assertEqual(3, len(leaf._parent))
+        del containers[1:], c
+        gc.collect()
+        DummyContainerTag(17, [leaf]).tree_digest(hashlib.sha256, True)
+        self.assertEqual(2, len(leaf._parent))
+        leaf.value = b'0'
+        self.assertIsNone(leaf._parent)
+        self.assertIsNone(containers[0]._digest)
+
+    def test_deep(self):
+        depth = sys.getrecursionlimit() * 2
+        root = DummyContainerTag()
+        tag = root
+        for _ in range(depth):
+            child = DummyContainerTag()
+            tag.children.append(child)
+            tag = child
+        tag.children.append(ILRawTag(16, b'1'))
+        root.tree_digest(hashlib.sha256, True)
+        tag.children[0].value = b'2'
+        self.assertIsNone(root._digest)
+
+
 class TestILRawTag(unittest.TestCase):
 
     def test_constructor(self):
@@ -238,7 +617,11 @@ class TestILRawTag(unittest.TestCase):
         t.value = None
         self.assertEqual(b'', t.value)
 
-        t = ILRawTag(16, b'1234')
+        # ILRawTag uses __slots__, thus only subclasses can be patched
+        class PatchableILRawTag(ILRawTag):
+            pass
+
+        t = PatchableILRawTag(16, b'1234')
         t.assert_value_valid = mock.MagicMock()
         t.value = None
         t.assert_value_valid.assert_not_called()
@@ -273,6 +656,42 @@ class TestILRawTag(unittest.TestCase):
         reader = io.BytesIO(b'1234')
         self.assertRaises(EOFError, t.deserialize_value, None, 5, reader)
 
+    def test_memoryview(self):
+        buff = bytearray(b'0123456789')
+        t = ILRawTag(16, memoryview(buff)[2:5])
+        self.assertIsInstance(t.value, memoryview)
+        self.assertTrue(t.value.readonly)
+        self.assertEqual(b'234', t.value)
+        self.assertEqual(3, t.value_size())
+        writer = io.BytesIO()
+        t.serialize_value(writer)
+        self.assertEqual(b'234', writer.getvalue())
+
+        t = ILRawTag(16)
+        reader = MemoryReader(buff)
+        reader.seek(1)
+        t.deserialize_value(None, 4, reader)
+        self.assertEqual(5, reader.tell())
+        self.assertIsInstance(t.value, memoryview)
+        self.assertIs(buff, t.value.obj)
+        self.assertEqual(b'1234', t.value)
+        self.assertRaises(EOFError, t.deserialize_value, None, 6, reader)
+
+        self.assertIs(t, t.materialize())
+        self.assertIsInstance(t.value, bytes)
+        buff[1] = 0
+        self.assertEqual(b'1234', t.value)
+
+    def test_file_payload(self):
+        payload = FilePayload(io.BytesIO(b'0123456789'), 2, 5)
+        t = ILRawTag(16, payload)
+        self.assertIs(payload, t.value)
+        self.assertEqual(5, t.value_size())
+        writer = io.BytesIO()
+        t.serialize(writer)
+        self.assertEqual(b'\x10\x05' + b'23456', writer.getvalue())
+        self.assertIs(payload, t.materialize().value)
+
     def test_serialize(self):
         t = ILRawTag(16)
         writer = io.BytesIO()
@@ -0,0 +1,271 @@
+# -*- coding: UTF-8 -*-
+# BSD 3-Clause License
+#
+# Copyright (c) 2021, InterlockLedger
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import dataclasses
+import typing
+from typing import Any, Dict, List, Tuple
+from .schema import *
+from .schema import _CodeGenerator
+
+# Key of the field metadata with the id of the tag used by the field.
+ILTAG_ID_METADATA = 'iltag_id'
+
+# Default tag ids of the basic types.
+DEFAULT_TYPE_IDS = {
+    bool: ILTAG_BOOL_ID,
+    int: ILTAG_INT64_ID,
+    float: ILTAG_BINARY64_ID,
+    str: ILTAG_STRING_ID,
+    bytes: ILTAG_BYTE_ARRAY_ID,
+    type(None): ILTAG_NULL_ID,
+}
+
+
+class ILDataclassSchema(ILRecordSchema):
+    """
+    This class describes an `ILDictionaryTag` that represents a dataclass.
+    The keys are the names of the fields in the order they were declared.
+    Its values are instances of the dataclass.
+    """
+    __slots__ = ('_cls',)
+
+    def __init__(self, cls: type, fields: Dict[str, ILSchema]) -> None:
+        """
+        Creates a new instance of this class. It is usually created by
+        `ILDataclassMapper`.
+
+        Parameters:
+        - `cls`: The dataclass;
+        - `fields`: The schema of each field. All fields must be accepted by
+          the constructor of the dataclass;
+        """
+        super().__init__(fields)
+        self._cls = cls
+
+    @property
+    def cls(self) -> type:
+        """
+        The dataclass.
+        """
+        return self._cls
+
+    def to_tag(self, value: Any) -> ILTag:
+        tag = ILDictionaryTag()
+        for key, schema in self._fields.items():
+            tag[key] = schema.to_tag(getattr(value, key))
+        return tag
+
+    def from_tag(self, tag: ILTag) -> Any:
+        return self._cls(**super().from_tag(tag))
+
+    def _field_expression(self, gen: _CodeGenerator, value: str, key: str) -> str:
+        return f'{value}.{key}'
+
+    def _value_expression(self, gen: _CodeGenerator, fields: List[Tuple[str, str]]) -> str:
+        args = ', '.join(f'{key}={item}' for key, item in fields)
+        return f'{gen.const(self._cls)}({args})'
+
+    def _signature(self) -> tuple:
+        return super()._signature() + (self._cls,)
+
+
+class ILDataclassMapper:
+    """
+    This class maps dataclasses into `ILDictionaryTag`s. The schema of each
+    dataclass is derived from the type hints of its fields and its codec is
+    generated and cached on first use. See `ILSchemaCodec` for further
+    details.
+
+    The following type hints are supported:
+    - The types in `DEFAULT_TYPE_IDS` or in the `type_ids` of the mapper;
+    - Other dataclasses;
+    - `List[T]` where `T` is a supported type;
+    - `Dict[str, str]`, mapped into an `ILStringDictionaryTag`;
+
+    The metadata `ILTAG_ID_METADATA` of a field overrides its type hint
+    with the id of one of the value tags supported by `ILValueSchema`. For
+    example, `field(metadata={ILTAG_ID_METADATA: ILTAG_UINT16_ID})` maps an
+    integer field into an `ILUInt16Tag`. Fields that are not accepted by
+    the constructor of the dataclass are ignored.
+
+    This class is thread safe.
+    """
+
+    def __init__(self, type_ids: Dict[type, int] = None) -> None:
+        """
+        Creates a new instance of this class.
+
+        Parameters:
+        - `type_ids`: The tag ids of the basic types that replace the ones in
+          `DEFAULT_TYPE_IDS`;
+        """
+        self.type_ids = dict(DEFAULT_TYPE_IDS)
+        if type_ids:
+            self.type_ids.update(type_ids)
+        self._schemas = {}
+        self._codecs = {}
+
+    def _type_schema(self, tp: Any, pending: set) -> ILSchema:
+        if tp in self.type_ids:
+            return ILValueSchema(self.type_ids[tp])
+        if dataclasses.is_dataclass(tp) and isinstance(tp, type):
+            return self._schema(tp, pending)
+        origin = getattr(tp, '__origin__', None)
+        args = getattr(tp, '__args__', None)
+        if origin in (list, List) and args:
+            return ILArraySchema(self._type_schema(args[0], pending))
+        if origin in (dict, Dict) and args == (str, str):
+            return ILStringDictionarySchema()
+        raise TypeError(f'The type {tp} cannot be mapped into a tag.')
+
+    def _schema(self, cls: type, pending: set) -> ILDataclassSchema:
+        schema = self._schemas.get(cls)
+        if schema is not None:
+            return schema
+        if cls in pending:
+            raise TypeError(f'The dataclass {cls} is recursive.')
+        pending.add(cls)
+        hints = typing.get_type_hints(cls)
+        fields = {}
+        for f in dataclasses.fields(cls):
+            if not f.init:
+                continue
+            if ILTAG_ID_METADATA in f.metadata:
+                fields[f.name] = ILValueSchema(f.metadata[ILTAG_ID_METADATA])
+            else:
+                fields[f.name] = self._type_schema(hints[f.name], pending)
+        pending.discard(cls)
+        schema = ILDataclassSchema(cls, fields)
+        self._schemas[cls] = schema
+        return schema
+
+    def schema(self, cls: type) -> ILDataclassSchema:
+        """
+        Returns the schema of a dataclass. It raises `TypeError` if the
+        dataclass cannot be mapped.
+
+        Parameters:
+        - `cls`: The dataclass;
+        """
+        if not (dataclasses.is_dataclass(cls) and isinstance(cls, type)):
+            raise TypeError(f'{cls} is not a dataclass.')
+        return self._schema(cls, set())
+
+    def codec(self, cls: type) -> ILSchemaCodec:
+        """
+        Returns the codec of a dataclass.
+
+        Parameters:
+        - `cls`: The dataclass;
+        """
+        codec = self._codecs.get(cls)
+        if codec is None:
+            codec = self.schema(cls).compile()
+            self._codecs[cls] = codec
+        return codec
+
+    def encode(self, value: Any) -> bytes:
+        """
+        Returns the serialization of the `ILDictionaryTag` that represents
+        an instance of a dataclass.
+
+        Parameters:
+        - `value`: The instance of the dataclass;
+        """
+        codec = self._codecs.get(value.__class__)
+        if codec is None:
+            codec = self.codec(value.__class__)
+        return codec.encode(value)
+
+    def decode(self, cls: type, buff: bytes) -> Any:
+        """
+        Returns the instance of a dataclass represented by a serialized
+        `ILDictionaryTag`. It raises `ILTagCorruptedError` if the
+        serialization does not match the dataclass.
+
+        Parameters:
+        - `cls`: The dataclass;
+        - `buff`: A bytes-like object with the serialization;
+        """
+        codec = self._codecs.get(cls)
+        if codec is None:
+            codec = self.codec(cls)
+        return codec.decode(buff)
+
+    def to_tag(self, value: Any) -> ILTag:
+        """
+        Returns the `ILDictionaryTag` that represents an instance of a
+        dataclass.
+
+        Parameters:
+        - `value`: The instance of the dataclass;
+        """
+        return self.schema(value.__class__).to_tag(value)
+
+    def from_tag(self, cls: type, tag: ILTag) -> Any:
+        """
+        Returns the instance of a dataclass represented by a tag. It raises
+        `ValueError` if the tag does not match the dataclass.
+
+        Parameters:
+        - `cls`: The dataclass;
+        - `tag`: The tag;
+        """
+        return self.schema(cls).from_tag(tag)
+
+
+# The mapper used by iltag_dataclass().
+DEFAULT_MAPPER = ILDataclassMapper()
+
+
+def iltag_dataclass(cls: type = None, mapper: ILDataclassMapper = None):
+    """
+    Class decorator that compiles the codec of a dataclass in advance. It
+    raises `TypeError` if the dataclass cannot be mapped. It must be applied
+    after `@dataclass`:
+
+        @iltag_dataclass
+        @dataclass
+        class Point:
+            x: float
+            y: float
+
+        serialized = DEFAULT_MAPPER.encode(Point(1.0, 2.0))
+
+    Parameters:
+    - `cls`: The dataclass;
+    - `mapper`: The mapper. If None, `DEFAULT_MAPPER` is used;
+    """
+    def wrap(cls: type) -> type:
+        (DEFAULT_MAPPER if mapper is None else mapper).codec(cls)
+        return cls
+    if cls is None:
+        return wrap
+    return wrap(cls)
@@ -0,0 +1,145 @@
+# -*- coding: UTF-8 -*-
+# BSD 3-Clause License
+#
+# Copyright (c) 2021, InterlockLedger
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import io
+import unittest
+from dataclasses import dataclass, field
+from typing import Dict, List
+from .dataclass import *
+
+
+@dataclass
+class Point:
+    x: float
+    y: float
+
+
+@dataclass
+class Shape:
+    name: str
+    points: List[Point]
+    closed: bool = False
+    color: int = field(default=0, metadata={ILTAG_ID_METADATA: ILTAG_UINT32_ID})
+    weights: List[int] = field(default_factory=list)
+    attributes: Dict[str, str] = field(default_factory=dict)
+    data: bytes = b''
+    cached: int = field(default=0, init=False)
+
+
+@dataclass
+class Node:
+    value: int
+    children: List['Node']
+
+
+class TestILDataclassMapper(unittest.TestCase):
+
+    def create_shape(self) -> Shape:
+        return Shape('triangle', [Point(0.0, 0.0), Point(1.0, 0.5), Point(-1.0, 2.5)],
+                     True, 0xFF0000, [-1, 0, 2**40], {'layer': 'top'}, b'\x00\x01')
+
+    def test_schema(self):
+        mapper = ILDataclassMapper()
+        schema = mapper.schema(Shape)
+        self.assertIsInstance(schema, ILDataclassSchema)
+        self.assertIs(Shape, schema.cls)
+        self.assertIs(schema, mapper.schema(Shape))
+        fields = schema.fields
+        self.assertEqual(['name', 'points', 'closed', 'color', 'weights',
+                          'attributes', 'data'], list(fields))
+        self.assertEqual(ILTAG_STRING_ID, fields['name'].id)
+        self.assertIs(mapper.schema(Point), fields['points'].element)
+        self.assertEqual(ILTAG_BOOL_ID, fields['closed'].id)
+        self.assertEqual(ILTAG_UINT32_ID, fields['color'].id)
+        self.assertEqual(ILTAG_INT64_ID, fields['weights'].element.id)
+        self.assertEqual(ILTAG_STRDICT_ID, fields['attributes'].id)
+        self.assertEqual(ILTAG_BYTE_ARRAY_ID, fields['data'].id)
+
+        mapper = ILDataclassMapper({int: ILTAG_ILINT64_ID})
+        self.assertEqual(ILTAG_ILINT64_ID,
+                         mapper.schema(Shape).fields['weights'].element.id)
+
+    def test_schema_invalid(self):
+        mapper = ILDataclassMapper()
+        self.assertRaises(TypeError, mapper.schema, Point(0, 0))
+        self.assertRaises(TypeError, mapper.schema, int)
+        self.assertRaises(TypeError, mapper.schema, Node)
+
+        @dataclass
+        class Invalid:
+            values: Dict[str, int]
+        self.assertRaises(TypeError, mapper.schema, Invalid)
+
+    def test_encode_decode(self):
+        mapper = ILDataclassMapper()
+        shape = self.create_shape()
+        encoded = mapper.encode(shape)
+        self.assertEqual(shape, mapper.decode(Shape, encoded))
+        mapper.codec(Shape).check(shape)
+
+        # Compatible with the manually created tags
+        tag = mapper.to_tag(shape)
+        self.assertIsInstance(tag, ILDictionaryTag)
+        writer = io.BytesIO()
+        tag.serialize(writer)
+        self.assertEqual(encoded, writer.getvalue())
+        self.assertEqual(shape, mapper.from_tag(Shape, tag))
+        tag['name'] = ILStringTag('square')
+        shape.name = 'square'
+        writer = io.BytesIO()
+        tag.serialize(writer)
+        self.assertEqual(shape, mapper.decode(Shape, writer.getvalue()))
+
+        self.assertRaises(ILTagCorruptedError, mapper.decode,
+                          Point, encoded)
+
+    def test_iltag_dataclass(self):
+        @iltag_dataclass
+        @dataclass
+        class Tagged:
+            value: str
+        self.assertIn(Tagged, DEFAULT_MAPPER._codecs)
+        self.assertEqual(Tagged('x'), DEFAULT_MAPPER.decode(
+            Tagged, DEFAULT_MAPPER.encode(Tagged('x'))))
+
+        mapper = ILDataclassMapper()
+
+        @iltag_dataclass(mapper=mapper)
+        @dataclass
+        class Other:
+            value: str
+        self.assertIn(Other, mapper._codecs)
+        self.assertNotIn(Other, DEFAULT_MAPPER._codecs)
+
+        with self.assertRaises(TypeError):
+            @iltag_dataclass
+            @dataclass
+            class Invalid:
+                value: complex
@@ -28,8 +28,14 @@
 # CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import contextlib
 import io
+import os
 import struct
+import tempfile
+
+# Size of the chunks used to copy payloads between streams.
+COPY_CHUNK_SIZE = 1 << 20
 
 
 def read_bytes(n: int, reader: io.IOBase) -> bytes:
@@ -51,6 +57,26 @@ def read_bytes(n: int, reader: io.IOBase) -> bytes:
     return buff
 
 
+def readonly_view(buffer) -> memoryview:
+    """
+    Returns a read-only `memoryview` of the bytes of a bytes-like object
+    without copying them. Writable buffers are copied on Python 3.7.
+
+    Parameters:
+    - `buffer`: A C-contiguous bytes-like object;
+    """
+    view = memoryview(buffer)
+    if view.format != 'B' or view.ndim != 1:
+        view = view.cast('B')
+    if not view.readonly:
+        if hasattr(view, 'toreadonly'):
+            view = view.toreadonly()
+        else:
+            # Python 3.7 has no read-only views of writable buffers.
+            view = memoryview(view.tobytes())
+    return view
+
+
 def read_binary32(reader: io.IOBase) -> float:
     """
     Reads a binary32 floating point value from the reader. It must be
@@ -139,6 +165,77 @@ def write_int(value: int, size: int, signed: bool, writer: io.IOBase):
     writer.write(value.to_bytes(size, byteorder='big', signed=signed))
 
 
+class MemoryReader(io.IOBase):
+    """
+    This class implements a reader over a bytes-like object. Besides `read()`,
+    it implements `read_view()` that returns read-only `memoryview` slices of
+    the buffer instead of copies. Readers that implement `read_view()` allow
+    the deserialization of `ILRawTag` payloads without copies.
+
+    The slices returned by `read_view()` are valid only while the buffer is
+    not modified.
+    """
+
+    def __init__(self, buffer) -> None:
+        """
+        Creates a new instance of this class.
+
+        Parameters:
+        - `buffer`: A C-contiguous bytes-like object;
+        """
+        self._view = readonly_view(buffer)
+        self._offset = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._offset
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._offset
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        elif whence != io.SEEK_SET:
+            raise ValueError('Invalid whence.')
+        if offset < 0:
+            raise ValueError('Negative seek position.')
+        self._offset = offset
+        return offset
+
+    @property
+    def remaining(self) -> int:
+        """
+        The number of bytes after the current position.
+        """
+        return max(len(self._view) - self._offset, 0)
+
+    def read(self, size: int = -1) -> bytes:
+        remaining = self.remaining
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        return self.read_view(size).tobytes()
+
+    def read_view(self, n: int) -> memoryview:
+        """
+        Reads the specified number of bytes as a read-only slice of the buffer.
+        It raises an `EOFError` if the specified number of bytes is not
+        available.
+
+        Parameters:
+        - `n`: The number of bytes to read;
+        """
+        if n > self.remaining:
+            raise EOFError(f'Unable to read {n} bytes from the stream.')
+        start = self._offset
+        self._offset += n
+        return self._view[start:self._offset]
+
+
 class LimitedReaderWrapper(io.IOBase):
     """
     This class implements a wrapper over an io.IOBase instance that limits
@@ -158,6 +255,8 @@ class LimitedReaderWrapper(io.IOBase):
         self.reader = reader
         self.remaining = remaining
         self.skip_close = skip_close
+        if hasattr(reader, 'read_view'):
+            self.read_view = self._read_view
 
     def close(self):
         """
@@ -209,3 +308,317 @@ class LimitedReaderWrapper(io.IOBase):
                 r = min(self.remaining, size)
                 self.remaining -= r
             return self.reader.read(r)
+
+    def _read_view(self, n: int) -> memoryview:
+        """
+        Proxy to `read_view()` of the inner reader. It is available only if the
+        inner reader implements it.
+        """
+        if n > self.remaining:
+            raise EOFError(f'Unable to read {n} bytes from the stream.')
+        self.remaining -= n
+        return self.reader.read_view(n)
+
+
+class DigestWriter(io.IOBase):
+    """
+    This class implements a writer that feeds all data written into it into
+    a hash object, such as the ones created by `hashlib`. It allows the
+    computation of the digest of a serialization without storing it.
+
+    The data is passed to the hash object as is, thus large `bytes` or
+    `memoryview` payloads are never copied.
+    """
+
+    def __init__(self, hasher) -> None:
+        """
+        Creates a new instance of this class.
+
+        Parameters:
+        - `hasher`: The hash object. It must implement the method `update()`;
+        """
+        self.hasher = hasher
+        self.size = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        """
+        Updates the hash object with `b`.
+
+        Parameters:
+        - `b`: A bytes-like object;
+
+        Returns the number of bytes written.
+        """
+        self.hasher.update(b)
+        n = len(b)
+        self.size += n
+        return n
+
+    def tell(self) -> int:
+        """
+        Returns the number of bytes written so far.
+        """
+        return self.size
+
+
+def _fileno(f) -> int:
+    try:
+        return f.fileno()
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def _kernel_copy(src_fd: int, offset: int, size: int, writer: io.IOBase) -> int:
+    """
+    Copies bytes from a file descriptor into the writer with
+    `os.copy_file_range()` or `os.sendfile()`, without passing them through
+    user space. Returns the number of bytes copied, 0 if the writer is not
+    backed by a file descriptor or if the platform does not support it.
+    """
+    dst_fd = _fileno(writer)
+    if dst_fd is None:
+        return 0
+    writer.flush()
+    try:
+        position = writer.tell() if writer.seekable() else None
+    except OSError:
+        position = None
+    copied = 0
+    copy_file_range = getattr(os, 'copy_file_range', None)
+    if copy_file_range is not None and position is not None:
+        try:
+            while copied < size:
+                n = copy_file_range(src_fd, dst_fd, size - copied,
+                                    offset + copied, position + copied)
+                if n == 0:
+                    break
+                copied += n
+        except OSError:
+            pass
+    sendfile = getattr(os, 'sendfile', None)
+    if copied < size and sendfile is not None:
+        try:
+            if position is not None:
+                os.lseek(dst_fd, position + copied, os.SEEK_SET)
+            while copied < size:
+                n = sendfile(dst_fd, src_fd, offset + copied, size - copied)
+                if n == 0:
+                    break
+                copied += n
+        except OSError:
+            pass
+    if position is not None:
+        writer.seek(position + copied)
+    return copied
+
+
+def copy_stream(reader: io.IOBase, writer: io.IOBase, size: int, chunk_size: int = COPY_CHUNK_SIZE) -> None:
+    """
+    Copies the specified number of bytes from the reader into the writer in
+    chunks. If both are seekable files, the data is copied by the kernel. It
+    raises an `EOFError` if the specified number of bytes is not available.
+
+    Parameters:
+    - `reader`: The reader;
+    - `writer`: The writer;
+    - `size`: The number of bytes to copy;
+    - `chunk_size`: The maximum number of bytes read at once;
+    """
+    src_fd = _fileno(reader)
+    if src_fd is not None and reader.seekable():
+        position = reader.tell()
+        copied = _kernel_copy(src_fd, position, size, writer)
+        if copied:
+            reader.seek(position + copied)
+            size -= copied
+    while size > 0:
+        chunk = read_bytes(min(size, chunk_size), reader)
+        writer.write(chunk)
+        size -= len(chunk)
+
+
+class FilePayload:
+    """
+    This class represents a payload stored in a file. It can be used as the
+    value of an `ILRawTag` to serialize huge payloads without loading them
+    into memory. The data is read only when the tag is serialized and, if
+    the writer is also a file, it is copied by the kernel.
+
+    The file must not be modified while it is in use.
+    """
+    __slots__ = ('_file', '_offset', '_size', '_owned')
+
+    def __init__(self, file, offset: int = 0, size: int = None) -> None:
+        """
+        Creates a new instance of this class.
+
+        Parameters:
+        - `file`: A path or a binary file object opened for reading. Paths
+          are opened only while the data is being read and file objects are
+          never closed by this class. The position of file objects is
+          restored after each access;
+        - `offset`: The offset of the payload inside the file;
+        - `size`: The size of the payload in bytes. If None, the payload ends
+          at the end of the file;
+        """
+        self._owned = False
+        if offset < 0:
+            raise ValueError('The offset cannot be negative.')
+        if size is None:
+            if isinstance(file, (str, bytes, os.PathLike)):
+                end = os.stat(file).st_size
+            else:
+                fd = _fileno(file)
+                if fd is not None:
+                    if file.writable():
+                        file.flush()
+                    end = os.fstat(fd).st_size
+                else:
+                    position = file.tell()
+                    end = file.seek(0, io.SEEK_END)
+                    file.seek(position)
+            size = max(end - offset, 0)
+        elif size < 0:
+            raise ValueError('The size cannot be negative.')
+        self._file = file
+        self._offset = offset
+        self._size = size
+
+    @staticmethod
+    def spill(reader: io.IOBase, size: int, chunk_size: int = COPY_CHUNK_SIZE) -> 'FilePayload':
+        """
+        Copies the specified number of bytes from the reader into a new
+        temporary file owned by the returned instance. The file is deleted
+        when the instance is closed or garbage collected. See `copy_stream()`
+        for further details.
+
+        Parameters:
+        - `reader`: The reader;
+        - `size`: The number of bytes to copy;
+        - `chunk_size`: The maximum number of bytes read at once;
+        """
+        f = tempfile.TemporaryFile()
+        try:
+            copy_stream(reader, f, size, chunk_size)
+            f.flush()
+        except BaseException:
+            f.close()
+            raise
+        ret = FilePayload(f, 0, size)
+        ret._owned = True
+        return ret
+
+    def close(self) -> None:
+        """
+        Closes the file if it was created by `spill()`. It does nothing
+        otherwise.
+        """
+        if self._owned:
+            self._file.close()
+
+    def __del__(self):
+        self.close()
+
+    @property
+    def file(self):
+        """
+        The path or the file object.
+        """
+        return self._file
+
+    @property
+    def offset(self) -> int:
+        """
+        The offset of the payload inside the file.
+        """
+        return self._offset
+
+    @property
+    def size(self) -> int:
+        """
+        The size of the payload in bytes.
+        """
+        return self._size
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __repr__(self) -> str:
+        return f'FilePayload({self._file!r}, {self._offset}, {self._size})'
+
+    def _open(self):
+        if isinstance(self._file, (str, bytes, os.PathLike)):
+            return open(self._file, 'rb')
+        if self._file.writable():
+            self._file.flush()
+        return contextlib.nullcontext(self._file)
+
+    def iter_chunks(self, chunk_size: int = COPY_CHUNK_SIZE):
+        """
+        Returns an iterator over the payload in chunks of at most `chunk_size`
+        bytes. It raises an `EOFError` if the file is shorter than expected.
+        """
+        with self._open() as f:
+            yield from FilePayload._read_chunks(f, self._offset, self._size, chunk_size)
+
+    @staticmethod
+    def _read_chunks(f, offset: int, size: int, chunk_size: int):
+        fd = _fileno(f)
+        pread = getattr(os, 'pread', None)
+        while size > 0:
+            n = min(size, chunk_size)
+            if fd is not None and pread is not None:
+                chunk = pread(fd, n, offset)
+                if len(chunk) != n:
+                    raise EOFError(f'Unable to read {n} bytes from the file.')
+            else:
+                position = f.tell()
+                try:
+                    f.seek(offset)
+                    chunk = read_bytes(n, f)
+                finally:
+                    f.seek(position)
+            yield chunk
+            offset += n
+            size -= n
+
+    def read(self) -> bytes:
+        """
+        Reads the whole payload into memory.
+        """
+        return b''.join(self.iter_chunks())
+
+    def write_to(self, writer: io.IOBase) -> None:
+        """
+        Writes the payload into the writer. The data is copied by the kernel
+        if possible, otherwise it is written in chunks.
+
+        Parameters:
+        - `writer`: The writer;
+        """
+        with self._open() as f:
+            copied = 0
+            fd = _fileno(f)
+            if fd is not None:
+                copied = _kernel_copy(fd, self._offset, self._size, writer)
+            for chunk in FilePayload._read_chunks(f, self._offset + copied,
+                                                  self._size - copied, COPY_CHUNK_SIZE):
+                writer.write(chunk)
+
+
+def write_payload(value, writer: io.IOBase) -> None:
+    """
+    Writes a payload into the writer. It can be a bytes-like object or a
+    `FilePayload`.
+
+    Parameters:
+    - `value`: The payload;
+    - `writer`: The writer;
+    """
+    if value.__class__ is FilePayload:
+        value.write_to(writer)
+    else:
+        writer.write(value)
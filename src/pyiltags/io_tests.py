@@ -29,8 +29,12 @@
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 import unittest
+import unittest.mock
 from unittest.mock import MagicMock, PropertyMock
+import hashlib
 import math
+import os
+import tempfile
 from .io import *
 
 
@@ -281,3 +285,192 @@ class TestLimitedReaderWrapper(unittest.TestCase):
                 used += chunck_size
             self.assertEqual(0, r.remaining)
             self.assertEqual(sample[:10], b)
+
+
+class TestMemoryReader(unittest.TestCase):
+
+    def test_readonly_view(self):
+        for buff in [b'1234', bytearray(b'1234'), memoryview(b'1234')]:
+            v = readonly_view(buff)
+            self.assertTrue(v.readonly)
+            self.assertEqual('B', v.format)
+            self.assertEqual(b'1234', v)
+        import array
+        v = readonly_view(array.array('H', [1, 2]))
+        self.assertEqual(4, len(v))
+
+    def test_read(self):
+        r = MemoryReader(b'0123456789')
+        self.assertTrue(r.readable())
+        self.assertTrue(r.seekable())
+        self.assertEqual(0, r.tell())
+        self.assertEqual(10, r.remaining)
+        self.assertEqual(b'012', r.read(3))
+        self.assertEqual(3, r.tell())
+        self.assertEqual(b'3456789', r.read(100))
+        self.assertEqual(b'', r.read())
+        self.assertEqual(0, r.remaining)
+        self.assertEqual(2, r.seek(2))
+        self.assertEqual(b'23456789', r.read())
+        self.assertEqual(8, r.seek(-2, io.SEEK_END))
+        self.assertEqual(9, r.seek(1, io.SEEK_CUR))
+        self.assertEqual(b'9', read_bytes(1, r))
+        self.assertRaises(ValueError, r.seek, -1)
+
+    def test_read_view(self):
+        buff = b'0123456789'
+        r = MemoryReader(buff)
+        v = r.read_view(4)
+        self.assertIsInstance(v, memoryview)
+        self.assertTrue(v.readonly)
+        self.assertIs(buff, v.obj)
+        self.assertEqual(b'0123', v)
+        self.assertEqual(b'', r.read_view(0))
+        self.assertRaises(EOFError, r.read_view, 7)
+        self.assertEqual(4, r.tell())
+        self.assertEqual(b'456789', r.read_view(6))
+
+    def test_limited_reader(self):
+        self.assertFalse(hasattr(
+            LimitedReaderWrapper(io.BytesIO(b'1234'), 2), 'read_view'))
+        r = LimitedReaderWrapper(MemoryReader(b'0123456789'), 5)
+        self.assertEqual(b'012', r.read_view(3))
+        self.assertRaises(EOFError, r.read_view, 3)
+        self.assertEqual(b'34', r.read_view(2))
+        self.assertEqual(0, r.remaining)
+
+
+class TestFilePayload(unittest.TestCase):
+
+    def setUp(self):
+        self.data = bytes(i & 0xFF for i in range(100000))
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'payload.bin')
+        with open(self.path, 'wb') as f:
+            f.write(self.data)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_constructor(self):
+        p = FilePayload(self.path)
+        self.assertEqual(self.path, p.file)
+        self.assertEqual(0, p.offset)
+        self.assertEqual(len(self.data), p.size)
+        self.assertEqual(len(self.data), len(p))
+        self.assertEqual(len(self.data) - 10, len(FilePayload(self.path, 10)))
+        self.assertEqual(0, len(FilePayload(self.path, len(self.data) + 1)))
+        self.assertEqual(5, len(FilePayload(self.path, 10, 5)))
+        with open(self.path, 'rb') as f:
+            self.assertEqual(len(self.data) - 1, len(FilePayload(f, 1)))
+        self.assertEqual(4, len(FilePayload(io.BytesIO(b'1234'))))
+        self.assertRaises(ValueError, FilePayload, self.path, -1)
+        self.assertRaises(ValueError, FilePayload, self.path, 0, -1)
+
+    def test_read(self):
+        self.assertEqual(self.data, FilePayload(self.path).read())
+        self.assertEqual(self.data[10:1010],
+                         FilePayload(self.path, 10, 1000).read())
+        with open(self.path, 'rb') as f:
+            f.seek(5)
+            p = FilePayload(f, 100, 10)
+            self.assertEqual(self.data[100:110], p.read())
+            self.assertEqual(self.data[100:110], p.read())
+            self.assertFalse(f.closed)
+        p = FilePayload(io.BytesIO(self.data), 3, 7)
+        self.assertEqual(self.data[3:10], p.read())
+        self.assertEqual([self.data[3:6], self.data[6:9], self.data[9:10]],
+                         list(p.iter_chunks(3)))
+
+        # The position of file objects without descriptors is restored
+        f = io.BytesIO(self.data)
+        f.seek(5)
+        p = FilePayload(f, 100)
+        self.assertEqual(5, f.tell())
+        self.assertEqual(self.data[100:], p.read())
+        self.assertEqual(5, f.tell())
+        writer = io.BytesIO()
+        p.write_to(writer)
+        self.assertEqual(self.data[100:], writer.getvalue())
+        self.assertEqual(self.data[5:10], f.read(5))
+        self.assertRaises(EOFError, FilePayload(
+            self.path, 10, len(self.data)).read)
+
+    def test_write_to(self):
+        p = FilePayload(self.path, 7, 50000)
+        writer = io.BytesIO()
+        p.write_to(writer)
+        self.assertEqual(self.data[7:50007], writer.getvalue())
+        writer = DigestWriter(hashlib.sha256())
+        p.write_to(writer)
+        self.assertEqual(hashlib.sha256(self.data[7:50007]).digest(),
+                         writer.hasher.digest())
+
+        out = os.path.join(self.dir.name, 'out.bin')
+        for buffering in [-1, 0]:
+            with open(out, 'wb', buffering=buffering) as writer:
+                writer.write(b'abc')
+                p.write_to(writer)
+                writer.write(b'def')
+            with open(out, 'rb') as f:
+                self.assertEqual(b'abc' + self.data[7:50007] + b'def', f.read())
+
+        if hasattr(os, 'copy_file_range'):
+            with unittest.mock.patch('os.copy_file_range', wraps=os.copy_file_range) as m:
+                with open(out, 'wb') as writer:
+                    p.write_to(writer)
+                m.assert_called()
+            with open(out, 'rb') as f:
+                self.assertEqual(self.data[7:50007], f.read())
+
+    def test_spill(self):
+        reader = io.BytesIO(self.data)
+        reader.seek(10)
+        p = FilePayload.spill(reader, 20000, 1000)
+        self.assertEqual(20010, reader.tell())
+        self.assertEqual(20000, len(p))
+        self.assertEqual(self.data[10:20010], p.read())
+        with open(self.path, 'rb') as reader:
+            reader.read(5)
+            p = FilePayload.spill(reader, 30000)
+            self.assertEqual(30005, reader.tell())
+            self.assertEqual(self.data[5:30005], p.read())
+            self.assertRaises(EOFError, FilePayload.spill, reader, len(self.data))
+
+    def test_copy_stream(self):
+        writer = io.BytesIO()
+        copy_stream(io.BytesIO(self.data), writer, 1000, 7)
+        self.assertEqual(self.data[:1000], writer.getvalue())
+        self.assertRaises(EOFError, copy_stream, io.BytesIO(b'123'),
+                          io.BytesIO(), 4)
+
+    def test_write_payload(self):
+        writer = io.BytesIO()
+        write_payload(b'123', writer)
+        write_payload(memoryview(b'456'), writer)
+        write_payload(FilePayload(self.path, 0, 3), writer)
+        self.assertEqual(b'123456' + self.data[:3], writer.getvalue())
+
+
+class TestDigestWriter(unittest.TestCase):
+
+    def test_write(self):
+        hasher = hashlib.sha256()
+        w = DigestWriter(hasher)
+        self.assertIs(hasher, w.hasher)
+        self.assertTrue(w.writable())
+        self.assertEqual(0, w.tell())
+        self.assertEqual(3, w.write(b'123'))
+        self.assertEqual(3, w.write(bytearray(b'456')))
+        self.assertEqual(3, w.write(memoryview(b'7890')[:3]))
+        self.assertEqual(9, w.tell())
+        self.assertEqual(hashlib.sha256(b'123456789').digest(),
+                         hasher.digest())
+
+    def test_write_no_copy(self):
+        hasher = MagicMock()
+        w = DigestWriter(hasher)
+        payload = b'1' * 1024
+        w.write(payload)
+        hasher.update.assert_called_once()
+        self.assertIs(payload, hasher.update.call_args[0][0])
@@ -0,0 +1,796 @@
+# -*- coding: UTF-8 -*-
+# BSD 3-Clause License
+#
+# Copyright (c) 2021, InterlockLedger
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import io
+import struct
+from typing import Any, Callable, Dict, List, Tuple
+import pyilint
+from .base import *
+from .standard import *
+from .util import ilint_decode_array
+
+# Struct formats of the id and value of the fixed-size value tags.
+_FIXED_FORMATS = {
+    ILTAG_INT8_ID: '>Bb',
+    ILTAG_UINT8_ID: '>BB',
+    ILTAG_INT16_ID: '>Bh',
+    ILTAG_UINT16_ID: '>BH',
+    ILTAG_INT32_ID: '>Bi',
+    ILTAG_UINT32_ID: '>BI',
+    ILTAG_INT64_ID: '>Bq',
+    ILTAG_UINT64_ID: '>BQ',
+    ILTAG_BINARY32_ID: '>Bf',
+    ILTAG_BINARY64_ID: '>Bd',
+}
+
+# Ids of the value tags supported by ILValueSchema.
+_VALUE_IDS = frozenset(_FIXED_FORMATS) | {
+    ILTAG_NULL_ID, ILTAG_BOOL_ID, ILTAG_ILINT64_ID, ILTAG_BINARY128_ID,
+    ILTAG_BYTE_ARRAY_ID, ILTAG_STRING_ID, ILTAG_ILINT64_ARRAY_ID}
+
+
+def _schema_mismatch(offset: int) -> ILTagCorruptedError:
+    return ILTagCorruptedError(f'The tag at {offset} does not match the schema.')
+
+
+def _string_tag(utf8: bytes) -> ILStringTag:
+    tag = ILStringTag()
+    tag.utf8 = utf8
+    return tag
+
+
+def _array_tag(values: List[ILTag]) -> ILTagArrayTag:
+    tag = ILTagArrayTag()
+    tag.extend(values, False)
+    return tag
+
+
+def _dict_tag(items: List[Tuple[str, ILTag]]) -> ILDictionaryTag:
+    tag = ILDictionaryTag()
+    tag.update(items, False)
+    return tag
+
+
+def _string_dict_tag(values: Dict[str, str]) -> ILStringDictionaryTag:
+    tag = ILStringDictionaryTag()
+    tag.update(values, False)
+    return tag
+
+
+class _CodeGenerator:
+    """
+    Helper used by the schemas to generate the source of the codecs.
+    """
+
+    def __init__(self, tags: bool = False) -> None:
+        """
+        Creates a new instance of this class.
+
+        Parameters:
+        - `tags`: If True, the decoders create standard tags instead of
+          plain values;
+        """
+        self.lines = []
+        self.indent = 1
+        self.tags = tags
+        self.namespace = {
+            '_mismatch': _schema_mismatch,
+            '_ilint_encode': pyilint.ilint_encode,
+            '_ilint_decode': pyilint.ilint_decode,
+            '_ilint_decode_array': ilint_decode_array,
+            '_string_tag': _string_tag,
+            '_array_tag': _array_tag,
+            '_dict_tag': _dict_tag,
+            '_string_dict_tag': _string_dict_tag,
+            '_errors': (ILTagError, IndexError, ValueError, struct.error),
+        }
+        self._count = 0
+
+    def name(self, prefix: str) -> str:
+        """
+        Returns a new unique variable name.
+        """
+        self._count += 1
+        return f'{prefix}{self._count}'
+
+    def const(self, value: Any) -> str:
+        """
+        Adds a constant to the namespace of the generated code and returns
+        its name.
+        """
+        name = self.name('_C')
+        self.namespace[name] = value
+        return name
+
+    def emit(self, line: str) -> None:
+        self.lines.append('    ' * self.indent + line)
+
+    def emit_read_header(self, id: int) -> None:
+        """
+        Emits the code that verifies the id of the tag at `o`.
+        """
+        header = bytearray()
+        pyilint.ilint_encode(id, header)
+        if len(header) == 1:
+            self.emit(f'if buf[o] != {id}:')
+        else:
+            self.emit(f'if not buf.startswith({self.const(bytes(header))}, o):')
+        self.emit('    raise _mismatch(o)')
+        self.emit(f'o += {len(header)}')
+
+    def emit_read_ilint(self, target: str) -> None:
+        """
+        Emits the code that reads an ILInt at `o` into `target`.
+        """
+        self.emit(f'{target} = buf[o]')
+        self.emit(f'if {target} < 248:')
+        self.emit('    o += 1')
+        self.emit('else:')
+        self.emit(f'    {target}, _n = _ilint_decode(buf[o:o + 9])')
+        self.emit('    o += _n')
+
+    def emit_read_size(self, end: str) -> None:
+        """
+        Emits the code that reads the size of an explicit tag and stores the
+        offset of its end into `end`.
+        """
+        self.emit_read_ilint(end)
+        self.emit(f'{end} += o')
+        self.emit(f'if {end} > size:')
+        self.emit('    raise _mismatch(o)')
+
+    def emit_check_end(self, end: str) -> None:
+        self.emit(f'if o != {end}:')
+        self.emit('    raise _mismatch(o)')
+
+    def emit_write_header(self, id: int, out: str) -> None:
+        header = bytearray()
+        pyilint.ilint_encode(id, header)
+        if len(header) == 1:
+            self.emit(f'{out}.append({id})')
+        else:
+            self.emit(f'{out} += {self.const(bytes(header))}')
+
+    def emit_write_payload(self, id: int, payload: str, out: str) -> None:
+        """
+        Emits the code that writes an explicit tag with the given payload.
+        """
+        self.emit_write_header(id, out)
+        self.emit(f'_ilint_encode(len({payload}), {out})')
+        self.emit(f'{out} += {payload}')
+
+    def compile(self, name: str, argument: str, prologue: List[str], result: str,
+                fallback: str = None) -> Tuple[Callable, str]:
+        """
+        Compiles the emitted code as a function and returns it with its source.
+        If `fallback` is not None, the function returns it instead of raising
+        any of the errors of a corrupted or mismatched tag.
+        """
+        lines = [f'def {name}({argument}):']
+        lines.extend('    ' + line for line in prologue)
+        if fallback is None:
+            lines.extend(self.lines)
+            lines.append(f'    return {result}')
+        else:
+            lines.append('    try:')
+            lines.extend('    ' + line for line in self.lines)
+            lines.append(f'        return {result}')
+            lines.append('    except _errors:')
+            lines.append(f'        return {fallback}')
+        source = '\n'.join(lines) + '\n'
+        namespace = dict(self.namespace)
+        exec(compile(source, f'<schema {name}>', 'exec'), namespace)
+        return namespace[name], source
+
+
+class ILSchema:
+    """
+    This is the base class of the schemas. A schema describes the layout of
+    a tag and how it is mapped into plain Python values: `None`, `bool`,
+    `int`, `float`, `bytes`, `str`, lists and dictionaries.
+
+    `compile()` generates an `ILSchemaCodec` with functions specialized for
+    the schema that encode and decode these values directly, without the
+    creation of the tags.
+    """
+    __slots__ = ('_id',)
+
+    def __init__(self, id: int) -> None:
+        self._id = id
+
+    @property
+    def id(self) -> int:
+        """
+        The id of the tag.
+        """
+        return self._id
+
+    def to_tag(self, value: Any) -> ILTag:
+        """
+        Returns the standard tag that represents the value.
+
+        This method must be overriden by subclasses.
+        """
+        raise NotImplementedError('Subclasses must override this method.')
+
+    def from_tag(self, tag: ILTag) -> Any:
+        """
+        Returns the value represented by a standard tag.
+
+        This method must be overriden by subclasses.
+        """
+        raise NotImplementedError('Subclasses must override this method.')
+
+    def _emit_encode(self, gen: _CodeGenerator, value: str, out: str) -> None:
+        """
+        Emits the code that appends the serialization of the variable `value`
+        to the bytearray `out`.
+
+        This method must be overriden by subclasses.
+        """
+        raise NotImplementedError('Subclasses must override this method.')
+
+    def _emit_decode(self, gen: _CodeGenerator, target: str) -> None:
+        """
+        Emits the code that decodes the tag at the offset `o` of `buf` into
+        the variable `target` and moves `o` to its end. If `gen.tags` is
+        True, `target` receives the standard tag instead of its value.
+
+        This method must be overriden by subclasses.
+        """
+        raise NotImplementedError('Subclasses must override this method.')
+
+    def _emit_decode_payload(self, gen: _CodeGenerator, target: str, end: str) -> None:
+        """
+        Emits the code that decodes the payload at the offset `o` of `buf`
+        that ends at the offset `end`. Only containers implement it.
+        """
+        raise TypeError('Only containers can decode their payloads.')
+
+    def _signature(self) -> tuple:
+        """
+        Returns a tuple that identifies this schema. Equal schemas have equal
+        signatures.
+
+        This method must be overriden by subclasses.
+        """
+        raise NotImplementedError('Subclasses must override this method.')
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ILSchema):
+            return NotImplemented
+        return self._signature() == other._signature()
+
+    def __hash__(self) -> int:
+        return hash(self._signature())
+
+    def compile(self) -> 'ILSchemaCodec':
+        """
+        Generates the codec of this schema.
+        """
+        return ILSchemaCodec(self)
+
+    def compile_tag_decoder(self) -> Callable[[bytes], ILTag]:
+        """
+        Generates a function that decodes the payload of a tag described by
+        this schema into the equivalent standard tags, like
+        `ILStandardTagFactory` does. The function returns None if the payload
+        does not match this schema. Only containers are supported.
+        """
+        gen = _CodeGenerator(True)
+        self._emit_decode_payload(gen, 'value', 'size')
+        decode, _ = gen.compile('decode_tag', 'buf', ['o = 0', 'size = len(buf)'],
+                                'value', 'None')
+        return decode
+
+
+class ILValueSchema(ILSchema):
+    """
+    This class describes a standard value tag. The value tags from
+    ILTAG_NULL_ID to ILTAG_BINARY128_ID, ILTAG_BYTE_ARRAY_ID,
+    ILTAG_STRING_ID and ILTAG_ILINT64_ARRAY_ID are supported. The values of
+    `ILTAG_ILINT64_ARRAY_ID` are lists of integers.
+    """
+    __slots__ = tuple()
+
+    def __init__(self, id: int) -> None:
+        """
+        Creates a new instance of this class.
+
+        Parameters:
+        - `id`: The tag id;
+        """
+        if id not in _VALUE_IDS:
+            raise ValueError(f'The tag id {id} is not supported by schemas.')
+        super().__init__(id)
+
+    def to_tag(self, value: Any) -> ILTag:
+        if self.id == ILTAG_NULL_ID:
+            return ILNullTag()
+        return ILStandardTagFactory._CLASS_MAP[self.id](value)
+
+    def from_tag(self, tag: ILTag) -> Any:
+        if tag.id != self.id:
+            raise ValueError(f'Expecting the tag id {self.id}.')
+        if self.id == ILTAG_NULL_ID:
+            return None
+        if self.id == ILTAG_ILINT64_ARRAY_ID:
+            return list(tag)
+        if self.id == ILTAG_BYTE_ARRAY_ID:
+            return b'' if tag.value is None else bytes(tag.value)
+        return tag.value
+
+    def _emit_encode(self, gen: _CodeGenerator, value: str, out: str) -> None:
+        id = self.id
+        if id in _FIXED_FORMATS:
+            pack = gen.const(struct.Struct(_FIXED_FORMATS[id]).pack)
+            gen.emit(f'{out} += {pack}({id}, {value})')
+        elif id == ILTAG_NULL_ID:
+            gen.emit(f'{out}.append(0)')
+        elif id == ILTAG_BOOL_ID:
+            gen.emit(f"{out} += b'\\x01\\x01' if {value} else b'\\x01\\x00'")
+        elif id == ILTAG_ILINT64_ID:
+            gen.emit(f'{out}.append({id})')
+            gen.emit(f'_ilint_encode({value}, {out})')
+        elif id == ILTAG_BINARY128_ID:
+            gen.emit(f'if len({value}) != 16:')
+            gen.emit("    raise ValueError('The value must have 16 bytes.')")
+            gen.emit(f'{out}.append({id})')
+            gen.emit(f'{out} += {value}')
+        elif id == ILTAG_BYTE_ARRAY_ID:
+            gen.emit_write_payload(id, value, out)
+        elif id == ILTAG_STRING_ID:
+            utf8 = gen.name('u')
+            gen.emit(f"{utf8} = {value}.encode('utf-8')")
+            gen.emit_write_payload(id, utf8, out)
+        else:
+            payload = gen.name('b')
+            item = gen.name('x')
+            gen.emit(f'{payload} = bytearray()')
+            gen.emit(f'_ilint_encode(len({value}), {payload})')
+            gen.emit(f'for {item} in {value}:')
+            gen.emit(f'    _ilint_encode({item}, {payload})')
+            gen.emit_write_payload(id, payload, out)
+
+    def _emit_decode(self, gen: _CodeGenerator, target: str) -> None:
+        id = self.id
+        if id in _FIXED_FORMATS:
+            s = struct.Struct(_FIXED_FORMATS[id])
+            unpack = gen.const(s.unpack_from)
+            gen.emit(f'_t, {target} = {unpack}(buf, o)')
+            gen.emit(f'if _t != {id}:')
+            gen.emit('    raise _mismatch(o)')
+            gen.emit(f'o += {s.size}')
+            self._emit_tag(gen, target)
+            return
+        gen.emit_read_header(id)
+        if id == ILTAG_NULL_ID:
+            gen.emit(f'{target} = None')
+        elif id == ILTAG_BOOL_ID:
+            gen.emit(f'{target} = (False, True)[buf[o]]')
+            gen.emit('o += 1')
+        elif id == ILTAG_ILINT64_ID:
+            gen.emit_read_ilint(target)
+        elif id == ILTAG_BINARY128_ID:
+            gen.emit(f'{target} = buf[o:o + 16]')
+            gen.emit(f'if len({target}) != 16:')
+            gen.emit('    raise _mismatch(o)')
+            gen.emit('o += 16')
+        else:
+            end = gen.name('e')
+            gen.emit_read_size(end)
+            if id == ILTAG_BYTE_ARRAY_ID:
+                gen.emit(f'{target} = buf[o:{end}]')
+            elif id == ILTAG_STRING_ID:
+                if gen.tags:
+                    gen.emit(f'{target} = _string_tag(buf[o:{end}])')
+                    gen.emit(f'o = {end}')
+                    return
+                gen.emit(f"{target} = str(buf[o:{end}], 'utf-8')")
+            else:
+                count = gen.name('n')
+                gen.emit_read_ilint(count)
+                gen.emit(f'{target}, _n = _ilint_decode_array(buf, {count}, o)')
+                if not gen.tags:
+                    gen.emit(f'{target} = {target}.tolist()')
+                gen.emit('o += _n')
+                gen.emit_check_end(end)
+            gen.emit(f'o = {end}')
+        self._emit_tag(gen, target)
+
+    def _emit_tag(self, gen: _CodeGenerator, target: str) -> None:
+        """
+        Emits the code that replaces the value in `target` by its tag if
+        `gen.tags` is True.
+        """
+        if not gen.tags:
+            return
+        tag_class = gen.const(ILStandardTagFactory._CLASS_MAP[self.id])
+        if self.id == ILTAG_NULL_ID:
+            gen.emit(f'{target} = {tag_class}()')
+        else:
+            gen.emit(f'{target} = {tag_class}({target})')
+
+    def _signature(self) -> tuple:
+        return (self.id,)
+
+
+class ILArraySchema(ILSchema):
+    """
+    This class describes an `ILTagArrayTag` whose elements have the same
+    schema. Its values are lists.
+    """
+    __slots__ = ('_element',)
+
+    def __init__(self, element: ILSchema) -> None:
+        """
+        Creates a new instance of this class.
+
+        Parameters:
+        - `element`: The schema of the elements;
+        """
+        super().__init__(ILTAG_ILTAG_ARRAY_ID)
+        self._element = element
+
+    @property
+    def element(self) -> ILSchema:
+        """
+        The schema of the elements.
+        """
+        return self._element
+
+    def to_tag(self, value: List) -> ILTag:
+        return ILTagArrayTag([self._element.to_tag(v) for v in value])
+
+    def from_tag(self, tag: ILTag) -> List:
+        if tag.id != self.id:
+            raise ValueError(f'Expecting the tag id {self.id}.')
+        return [self._element.from_tag(t) for t in tag]
+
+    def _emit_encode(self, gen: _CodeGenerator, value: str, out: str) -> None:
+        payload = gen.name('b')
+        item = gen.name('x')
+        gen.emit(f'{payload} = bytearray()')
+        gen.emit(f'_ilint_encode(len({value}), {payload})')
+        gen.emit(f'for {item} in {value}:')
+        gen.indent += 1
+        self._element._emit_encode(gen, item, payload)
+        gen.indent -= 1
+        gen.emit_write_payload(self.id, payload, out)
+
+    def _emit_decode(self, gen: _CodeGenerator, target: str) -> None:
+        end = gen.name('e')
+        gen.emit_read_header(self.id)
+        gen.emit_read_size(end)
+        self._emit_decode_payload(gen, target, end)
+
+    def _emit_decode_payload(self, gen: _CodeGenerator, target: str, end: str) -> None:
+        count = gen.name('n')
+        item = gen.name('x')
+        gen.emit_read_ilint(count)
+        gen.emit(f'{target} = []')
+        gen.emit(f'for _ in range({count}):')
+        gen.indent += 1
+        self._element._emit_decode(gen, item)
+        gen.emit(f'{target}.append({item})')
+        gen.indent -= 1
+        gen.emit_check_end(end)
+        if gen.tags:
+            gen.emit(f'{target} = _array_tag({target})')
+
+    def _signature(self) -> tuple:
+        return (self.id, self._element._signature())
+
+
+class ILRecordSchema(ILSchema):
+    """
+    This class describes an `ILDictionaryTag` with a fixed set of keys in a
+    fixed order. Its values are dictionaries with the same keys. Additional
+    keys are ignored by the encoder.
+    """
+    __slots__ = ('_fields',)
+
+    def __init__(self, fields: Dict[str, ILSchema]) -> None:
+        """
+        Creates a new instance of this class.
+
+        Parameters:
+        - `fields`: The schema of each field in the order they are serialized;
+        """
+        super().__init__(ILTAG_DICT_ID)
+        self._fields = dict(fields)
+        for key, schema in self._fields.items():
+            if not isinstance(key, str):
+                raise TypeError('The field names must be strings.')
+            if not isinstance(schema, ILSchema):
+                raise TypeError('The fields must be described by an ILSchema.')
+
+    @property
+    def fields(self) -> Dict[str, ILSchema]:
+        """
+        A copy of the schemas of the fields.
+        """
+        return dict(self._fields)
+
+    def to_tag(self, value: Dict) -> ILTag:
+        tag = ILDictionaryTag()
+        for key, schema in self._fields.items():
+            tag[key] = schema.to_tag(value[key])
+        return tag
+
+    def from_tag(self, tag: ILTag) -> Dict:
+        if tag.id != self.id or list(tag) != list(self._fields):
+            raise ValueError('The tag does not match the schema.')
+        return {key: schema.from_tag(tag[key])
+                for key, schema in self._fields.items()}
+
+    def _field_expression(self, gen: _CodeGenerator, value: str, key: str) -> str:
+        """
+        Returns the expression that reads a field from the variable `value`.
+        """
+        return f'{value}[{key!r}]'
+
+    def _value_expression(self, gen: _CodeGenerator, fields: List[Tuple[str, str]]) -> str:
+        """
+        Returns the expression that creates the value from the names of the
+        variables that hold each field.
+        """
+        return '{' + ', '.join(f'{key!r}: {item}' for key, item in fields) + '}'
+
+    def _emit_encode(self, gen: _CodeGenerator, value: str, out: str) -> None:
+        payload = gen.name('b')
+        count = bytearray()
+        pyilint.ilint_encode(len(self._fields), count)
+        gen.emit(f'{payload} = bytearray({gen.const(bytes(count))})')
+        for key, schema in self._fields.items():
+            item = gen.name('x')
+            gen.emit(f'{item} = {self._field_expression(gen, value, key)}')
+            gen.emit(
+                f'{payload} += {gen.const(ILStringTag.encode_tag_from_components(key))}')
+            schema._emit_encode(gen, item, payload)
+        gen.emit_write_payload(self.id, payload, out)
+
+    def _emit_decode(self, gen: _CodeGenerator, target: str) -> None:
+        end = gen.name('e')
+        gen.emit_read_header(self.id)
+        gen.emit_read_size(end)
+        self._emit_decode_payload(gen, target, end)
+
+    def _emit_decode_payload(self, gen: _CodeGenerator, target: str, end: str) -> None:
+        count = bytearray()
+        pyilint.ilint_encode(len(self._fields), count)
+        gen.emit(f'if not buf.startswith({gen.const(bytes(count))}, o):')
+        gen.emit('    raise _mismatch(o)')
+        gen.emit(f'o += {len(count)}')
+        items = []
+        for key, schema in self._fields.items():
+            encoded = ILStringTag.encode_tag_from_components(key)
+            gen.emit(f'if not buf.startswith({gen.const(encoded)}, o):')
+            gen.emit('    raise _mismatch(o)')
+            gen.emit(f'o += {len(encoded)}')
+            item = gen.name('x')
+            schema._emit_decode(gen, item)
+            items.append((key, item))
+        gen.emit_check_end(end)
+        if gen.tags:
+            items = ', '.join(f'({key!r}, {item})' for key, item in items)
+            gen.emit(f'{target} = _dict_tag([{items}])')
+        else:
+            gen.emit(f'{target} = {self._value_expression(gen, items)}')
+
+    def _signature(self) -> tuple:
+        return (self.id, tuple((key, schema._signature())
+                               for key, schema in self._fields.items()))
+
+
+class ILStringDictionarySchema(ILSchema):
+    """
+    This class describes an `ILStringDictionaryTag`. Its values are
+    dictionaries of strings.
+    """
+    __slots__ = tuple()
+
+    def __init__(self) -> None:
+        """
+        Creates a new instance of this class.
+        """
+        super().__init__(ILTAG_STRDICT_ID)
+
+    def to_tag(self, value: Dict[str, str]) -> ILTag:
+        tag = ILStringDictionaryTag()
+        tag.update(value)
+        return tag
+
+    def from_tag(self, tag: ILTag) -> Dict[str, str]:
+        if tag.id != self.id:
+            raise ValueError(f'Expecting the tag id {self.id}.')
+        return dict(tag.items())
+
+    def _emit_encode(self, gen: _CodeGenerator, value: str, out: str) -> None:
+        payload = gen.name('b')
+        key = gen.name('k')
+        item = gen.name('x')
+        string = ILValueSchema(ILTAG_STRING_ID)
+        gen.emit(f'{payload} = bytearray()')
+        gen.emit(f'_ilint_encode(len({value}), {payload})')
+        gen.emit(f'for {key}, {item} in {value}.items():')
+        gen.indent += 1
+        string._emit_encode(gen, key, payload)
+        string._emit_encode(gen, item, payload)
+        gen.indent -= 1
+        gen.emit_write_payload(self.id, payload, out)
+
+    def _emit_decode(self, gen: _CodeGenerator, target: str) -> None:
+        end = gen.name('e')
+        gen.emit_read_header(self.id)
+        gen.emit_read_size(end)
+        self._emit_decode_payload(gen, target, end)
+
+    def _emit_decode_payload(self, gen: _CodeGenerator, target: str, end: str) -> None:
+        count = gen.name('n')
+        key = gen.name('k')
+        item = gen.name('x')
+        string = ILValueSchema(ILTAG_STRING_ID)
+        tags = gen.tags
+        gen.tags = False
+        gen.emit_read_ilint(count)
+        gen.emit(f'{target} = {{}}')
+        gen.emit(f'for _ in range({count}):')
+        gen.indent += 1
+        string._emit_decode(gen, key)
+        string._emit_decode(gen, item)
+        gen.emit(f'{target}[{key}] = {item}')
+        gen.indent -= 1
+        gen.emit_check_end(end)
+        gen.tags = tags
+        if gen.tags:
+            gen.emit(f'{target} = _string_dict_tag({target})')
+
+    def _signature(self) -> tuple:
+        return (self.id,)
+
+
+def infer_schema(tag: ILTag) -> ILSchema:
+    """
+    Returns the schema that describes a standard tag and all tags inside it
+    or None if there is no such schema. Dictionaries are described by
+    `ILRecordSchema` with their current keys and arrays must have at least
+    one element and all their elements must have the same schema.
+
+    Parameters:
+    - `tag`: The tag;
+    """
+    cls = tag.__class__
+    if cls is not ILStandardTagFactory._CLASS_MAP.get(tag.id):
+        return None
+    if cls is ILDictionaryTag:
+        fields = {}
+        for key, child in tag.items():
+            schema = infer_schema(child)
+            if schema is None:
+                return None
+            fields[key] = schema
+        return ILRecordSchema(fields)
+    if cls is ILTagArrayTag:
+        element = None
+        for child in tag:
+            schema = infer_schema(child)
+            if schema is None or (element is not None and schema != element):
+                return None
+            element = schema
+        return None if element is None else ILArraySchema(element)
+    if cls is ILStringDictionaryTag:
+        return ILStringDictionarySchema()
+    if tag.id not in _VALUE_IDS:
+        return None
+    if tag.id == ILTAG_BYTE_ARRAY_ID and isinstance(tag.value, FilePayload):
+        return None
+    return ILValueSchema(tag.id)
+
+
+class ILSchemaCodec:
+    """
+    This class implements the encoder and the decoder generated for a
+    schema. They produce and accept exactly the same serialization of the
+    standard tags that represent the values, without creating them.
+    """
+
+    def __init__(self, schema: ILSchema) -> None:
+        """
+        Creates a new instance of this class. It is usually created by
+        `ILSchema.compile()`.
+
+        Parameters:
+        - `schema`: The schema;
+        """
+        self.schema = schema
+        gen = _CodeGenerator()
+        schema._emit_encode(gen, 'value', 'out')
+        self._encode, encode_source = gen.compile(
+            'encode', 'value', ['out = bytearray()'], 'bytes(out)')
+        gen = _CodeGenerator()
+        schema._emit_decode(gen, 'value')
+        gen.emit_check_end('size')
+        self._decode, decode_source = gen.compile(
+            'decode', 'buf', ['o = 0', 'size = len(buf)'], 'value')
+        self.source = encode_source + '\n' + decode_source
+
+    def encode(self, value: Any) -> bytes:
+        """
+        Returns the serialization of the value. It raises `ValueError` if the
+        value cannot be represented by the schema.
+
+        Parameters:
+        - `value`: The value;
+        """
+        try:
+            return self._encode(value)
+        except (struct.error, OverflowError, TypeError, AttributeError) as e:
+            raise ValueError(f'The value does not match the schema: {e}')
+
+    def decode(self, buff: bytes) -> Any:
+        """
+        Returns the value of a serialized tag. It raises `ILTagCorruptedError`
+        if the serialization is corrupted or does not match the schema.
+
+        Parameters:
+        - `buff`: A bytes-like object with the serialization of exactly one
+          tag;
+        """
+        if buff.__class__ is not bytes:
+            buff = bytes(buff)
+        try:
+            return self._decode(buff)
+        except (IndexError, ValueError, struct.error):
+            raise ILTagCorruptedError('Corrupted tag.')
+
+    def check(self, value: Any, tag_factory: ILTagFactory = None) -> None:
+        """
+        Verifies that the codec conforms with the standard tags for the given
+        value: the encoder must produce the serialization of
+        `ILSchema.to_tag()` and the factory must deserialize it into a tag
+        with the value returned by the decoder. It raises `ValueError` if it
+        does not.
+
+        Parameters:
+        - `value`: The value;
+        - `tag_factory`: The factory. If None, an `ILStandardTagFactory` is used;
+        """
+        if tag_factory is None:
+            tag_factory = ILStandardTagFactory()
+        encoded = self.encode(value)
+        writer = io.BytesIO()
+        self.schema.to_tag(value).serialize(writer)
+        if encoded != writer.getvalue():
+            raise ValueError('The encoder does not conform with the standard tags.')
+        reader = io.BytesIO(encoded)
+        tag = tag_factory.deserialize(reader)
+        if reader.tell() != len(encoded) or self.schema.from_tag(tag) != self.decode(encoded):
+            raise ValueError('The decoder does not conform with the standard tags.')
@@ -0,0 +1,290 @@
+# -*- coding: UTF-8 -*-
+# BSD 3-Clause License
+#
+# Copyright (c) 2021, InterlockLedger
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import io
+import unittest
+from .schema import *
+
+VALUE_SAMPLES = [
+    (ILTAG_NULL_ID, [None]),
+    (ILTAG_BOOL_ID, [False, True]),
+    (ILTAG_INT8_ID, [-128, 0, 127]),
+    (ILTAG_UINT8_ID, [0, 255]),
+    (ILTAG_INT16_ID, [-32768, 32767]),
+    (ILTAG_UINT16_ID, [0, 65535]),
+    (ILTAG_INT32_ID, [-2147483648, 2147483647]),
+    (ILTAG_UINT32_ID, [0, 4294967295]),
+    (ILTAG_INT64_ID, [-9223372036854775808, 9223372036854775807]),
+    (ILTAG_UINT64_ID, [0, 18446744073709551615]),
+    (ILTAG_ILINT64_ID, [0, 247, 248, 2**40, 18446744073709551615]),
+    (ILTAG_BINARY32_ID, [0.0, 1.5, -2.25]),
+    (ILTAG_BINARY64_ID, [0.0, 1.1, -1e100]),
+    (ILTAG_BINARY128_ID, [bytes(range(16))]),
+    (ILTAG_BYTE_ARRAY_ID, [b'', b'abc', bytes(300)]),
+    (ILTAG_STRING_ID, ['', 'abc', 'ação' * 100]),
+    (ILTAG_ILINT64_ARRAY_ID, [[], [1, 248, 2**64 - 1]]),
+]
+
+
+def create_message_schema() -> ILRecordSchema:
+    return ILRecordSchema({
+        'id': ILValueSchema(ILTAG_UINT32_ID),
+        'name': ILValueSchema(ILTAG_STRING_ID),
+        'active': ILValueSchema(ILTAG_BOOL_ID),
+        'samples': ILArraySchema(ILValueSchema(ILTAG_ILINT64_ID)),
+        'children': ILArraySchema(ILRecordSchema({
+            'key': ILValueSchema(ILTAG_STRING_ID),
+            'value': ILValueSchema(ILTAG_BINARY64_ID)})),
+        'attributes': ILStringDictionarySchema(),
+    })
+
+
+def create_message(i: int) -> dict:
+    return {
+        'id': i,
+        'name': f'message {i}',
+        'active': i % 2 == 0,
+        'samples': list(range(i, i * 100, 37)),
+        'children': [{'key': f'k{j}', 'value': j / 2} for j in range(i % 4)],
+        'attributes': {f'a{j}': str(j) for j in range(i % 3)},
+    }
+
+
+class TestILValueSchema(unittest.TestCase):
+
+    def test_constructor(self):
+        for id, _ in VALUE_SAMPLES:
+            self.assertEqual(id, ILValueSchema(id).id)
+        for id in (14, 15, ILTAG_BINT_ID, ILTAG_DICT_ID, 1234):
+            self.assertRaises(ValueError, ILValueSchema, id)
+
+    def test_codec(self):
+        for id, samples in VALUE_SAMPLES:
+            codec = ILValueSchema(id).compile()
+            for v in samples:
+                codec.check(v)
+                self.assertEqual(v, codec.decode(codec.encode(v)))
+                self.assertEqual(v, codec.decode(
+                    bytearray(codec.encode(v))))
+
+    def test_encode_invalid(self):
+        self.assertRaises(ValueError, ILValueSchema(
+            ILTAG_UINT8_ID).compile().encode, 256)
+        self.assertRaises(ValueError, ILValueSchema(
+            ILTAG_INT64_ID).compile().encode, 2**63)
+        self.assertRaises(ValueError, ILValueSchema(
+            ILTAG_ILINT64_ID).compile().encode, -1)
+        self.assertRaises(ValueError, ILValueSchema(
+            ILTAG_BINARY128_ID).compile().encode, b'123')
+        # Values of the wrong type
+        self.assertRaises(ValueError, ILValueSchema(
+            ILTAG_ILINT64_ID).compile().encode, 1.5)
+        self.assertRaises(ValueError, ILValueSchema(
+            ILTAG_UINT8_ID).compile().encode, '1')
+        self.assertRaises(ValueError, ILValueSchema(
+            ILTAG_BYTE_ARRAY_ID).compile().encode, 'str')
+        self.assertRaises(ValueError, ILValueSchema(
+            ILTAG_STRING_ID).compile().encode, b'x')
+
+    def test_decode_mismatch(self):
+        codec = ILValueSchema(ILTAG_UINT8_ID).compile()
+        self.assertRaises(ILTagCorruptedError, codec.decode, b'')
+        self.assertRaises(ILTagCorruptedError, codec.decode, b'\x03')
+        self.assertRaises(ILTagCorruptedError, codec.decode, b'\x02\x01')
+        self.assertRaises(ILTagCorruptedError, codec.decode, b'\x03\x01\x00')
+        codec = ILValueSchema(ILTAG_BOOL_ID).compile()
+        self.assertRaises(ILTagCorruptedError, codec.decode, b'\x01\x02')
+        codec = ILValueSchema(ILTAG_STRING_ID).compile()
+        self.assertRaises(ILTagCorruptedError, codec.decode, b'\x11\x02a')
+        self.assertRaises(ILTagCorruptedError, codec.decode, b'\x11\x01\xff')
+
+    def test_tags(self):
+        for id, samples in VALUE_SAMPLES:
+            schema = ILValueSchema(id)
+            for v in samples:
+                tag = schema.to_tag(v)
+                self.assertEqual(id, tag.id)
+                self.assertEqual(v, schema.from_tag(tag))
+        self.assertRaises(ValueError, ILValueSchema(
+            ILTAG_UINT8_ID).from_tag, ILInt8Tag(1))
+
+
+class TestILRecordSchema(unittest.TestCase):
+
+    def test_constructor(self):
+        fields = {'a': ILValueSchema(ILTAG_STRING_ID)}
+        schema = ILRecordSchema(fields)
+        self.assertEqual(ILTAG_DICT_ID, schema.id)
+        self.assertEqual(fields, schema.fields)
+        self.assertRaises(TypeError, ILRecordSchema, {1: fields['a']})
+        self.assertRaises(TypeError, ILRecordSchema, {'a': ILTAG_STRING_ID})
+
+    def test_codec(self):
+        codec = create_message_schema().compile()
+        self.assertIn('def encode(value):', codec.source)
+        self.assertIn('def decode(buf):', codec.source)
+        for i in range(10):
+            m = create_message(i)
+            codec.check(m)
+            self.assertEqual(m, codec.decode(codec.encode(m)))
+        m = create_message(3)
+        m['extra'] = 1
+        self.assertEqual(codec.encode(create_message(3)), codec.encode(m))
+        self.assertRaises(KeyError, codec.encode, {'id': 1})
+
+    def test_decode_mismatch(self):
+        schema = create_message_schema()
+        codec = schema.compile()
+        encoded = codec.encode(create_message(5))
+        for i in range(len(encoded)):
+            self.assertRaises(ILTagCorruptedError,
+                              codec.decode, encoded[:i])
+        self.assertRaises(ILTagCorruptedError, codec.decode, encoded + b'\x00')
+
+        # Other keys and other order
+        for fields in ({'b': ILValueSchema(ILTAG_UINT8_ID)},
+                       {'a': ILValueSchema(ILTAG_UINT8_ID),
+                        'b': ILValueSchema(ILTAG_UINT8_ID)}):
+            codec = ILRecordSchema({'a': ILValueSchema(ILTAG_UINT8_ID)}).compile()
+            self.assertRaises(ILTagCorruptedError, codec.decode,
+                              ILRecordSchema(fields).compile().encode({'a': 1, 'b': 2}))
+
+    def test_tags(self):
+        schema = create_message_schema()
+        m = create_message(5)
+        tag = schema.to_tag(m)
+        self.assertIsInstance(tag, ILDictionaryTag)
+        self.assertEqual(m, schema.from_tag(tag))
+        del tag['name']
+        self.assertRaises(ValueError, schema.from_tag, tag)
+
+
+class TestILArraySchema(unittest.TestCase):
+
+    def test_codec(self):
+        element = ILValueSchema(ILTAG_STRING_ID)
+        schema = ILArraySchema(element)
+        self.assertEqual(ILTAG_ILTAG_ARRAY_ID, schema.id)
+        self.assertIs(element, schema.element)
+        codec = ILArraySchema(schema).compile()
+        for v in ([], [[]], [['a', 'b'], [], ['c' * 300]]):
+            codec.check(v)
+            self.assertEqual(v, codec.decode(codec.encode(v)))
+        self.assertRaises(ILTagCorruptedError, codec.decode,
+                          ILArraySchema(ILValueSchema(ILTAG_UINT8_ID)).compile().encode([1]))
+
+
+class TestILStringDictionarySchema(unittest.TestCase):
+
+    def test_codec(self):
+        schema = ILStringDictionarySchema()
+        self.assertEqual(ILTAG_STRDICT_ID, schema.id)
+        codec = schema.compile()
+        for v in ({}, {'a': ''}, {'a': 'b', 'ação': 'x' * 300}):
+            codec.check(v)
+            self.assertEqual(v, codec.decode(codec.encode(v)))
+            self.assertEqual(v, schema.from_tag(schema.to_tag(v)))
+
+
+class TestILSchemaCodec(unittest.TestCase):
+
+    def test_check(self):
+        schema = ILValueSchema(ILTAG_STRING_ID)
+        codec = schema.compile()
+        codec.check('abc', ILStandardTagFactory(strict=True))
+        codec._encode = lambda value: b'\x11\x00'
+        self.assertRaises(ValueError, codec.check, 'abc')
+        codec = schema.compile()
+        codec._decode = lambda buf: 'x'
+        self.assertRaises(ValueError, codec.check, 'abc')
+
+
+class TestInferSchema(unittest.TestCase):
+
+    def test_infer_schema(self):
+        schema = create_message_schema()
+        for i in range(1, 10):
+            m = create_message(i)
+            if not m['children']:
+                continue
+            self.assertEqual(schema, infer_schema(schema.to_tag(m)))
+            self.assertEqual(hash(schema), hash(infer_schema(schema.to_tag(m))))
+        for id, samples in VALUE_SAMPLES:
+            self.assertEqual(ILValueSchema(id),
+                             infer_schema(ILValueSchema(id).to_tag(samples[0])))
+
+        self.assertIsNone(infer_schema(ILTagArrayTag()))
+        self.assertIsNone(infer_schema(ILTagArrayTag(
+            [ILUInt8Tag(1), ILInt8Tag(1)])))
+        self.assertIsNone(infer_schema(ILRawTag(1234)))
+        self.assertIsNone(infer_schema(ILTagSequenceTag()))
+        self.assertIsNone(infer_schema(ILVersionTag()))
+        self.assertIsNone(infer_schema(ILByteArrayTag(
+            FilePayload(io.BytesIO(b'abc')))))
+        d = ILDictionaryTag()
+        d['a'] = ILRawTag(1234)
+        self.assertIsNone(infer_schema(d))
+
+    def test_equality(self):
+        self.assertEqual(ILValueSchema(ILTAG_UINT8_ID),
+                         ILValueSchema(ILTAG_UINT8_ID))
+        self.assertNotEqual(ILValueSchema(ILTAG_UINT8_ID),
+                            ILValueSchema(ILTAG_INT8_ID))
+        self.assertNotEqual(ILValueSchema(ILTAG_UINT8_ID), ILTAG_UINT8_ID)
+        self.assertNotEqual(
+            ILRecordSchema({'a': ILValueSchema(ILTAG_UINT8_ID),
+                            'b': ILValueSchema(ILTAG_UINT8_ID)}),
+            ILRecordSchema({'b': ILValueSchema(ILTAG_UINT8_ID),
+                            'a': ILValueSchema(ILTAG_UINT8_ID)}))
+
+    def test_compile_tag_decoder(self):
+        schema = create_message_schema()
+        decode = schema.compile_tag_decoder()
+        for i in range(10):
+            tag = schema.to_tag(create_message(i))
+            writer = io.BytesIO()
+            tag.serialize_value(writer)
+            payload = writer.getvalue()
+            t = decode(payload)
+            self.assertIsInstance(t, ILDictionaryTag)
+            self.assertEqual(create_message(i), schema.from_tag(t))
+            self.assertIsInstance(t['name'], ILStringTag)
+            self.assertIsInstance(t['id'], ILUInt32Tag)
+            self.assertIsNone(decode(payload[:-1]))
+            self.assertIsNone(decode(payload + b'\x00'))
+        self.assertIsNone(decode(b''))
+        self.assertRaises(TypeError, ILValueSchema(
+            ILTAG_UINT8_ID).compile_tag_decoder)
+
+        schema = ILValueSchema(ILTAG_ILINT64_ARRAY_ID)
+        decode = ILArraySchema(schema).compile_tag_decoder()
+        t = decode(bytes([1, 20, 3, 2, 1, 2]))
+        self.assertEqual([1, 2], list(t[0]))
+        self.assertIsInstance(t[0], ILIntArrayTag)
@@ -28,10 +28,19 @@
 # CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import array
+import collections
 import pyilint
-from typing import Callable, List
+import sys
+import threading
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
 from .base import *
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 # Standard tag IDs
 ILTAG_NULL_ID = 0
 ILTAG_BOOL_ID = 1
@@ -65,6 +74,7 @@ class ILNullTag(ILFixedSizeTag):
     """
     This class implements the standard tag ILTAG_NULL.
     """
+    __slots__ = ()
 
     def __init__(self, id: int = ILTAG_NULL_ID) -> None:
         super().__init__(id, 0, True)
@@ -81,6 +91,7 @@ class ILBoolTag(ILFixedSizeTag):
     """
     This class implements the standard tag ILTAG_BOOL.
     """
+    __slots__ = ('_value',)
 
     def __init__(self, value: bool = False, id: int = ILTAG_BOOL_ID) -> None:
         super().__init__(id, 1, True)
@@ -96,6 +107,7 @@ class ILBoolTag(ILFixedSizeTag):
         Sets the value of this tag. The final value will assume the result
         of `bool(value)`.
         """
+        self._before_change()
         self._value = bool(value)
 
     def deserialize_value(self, tag_factory: ILTagFactory, tag_size: int, reader: io.IOBase) -> None:
@@ -122,6 +134,7 @@ class ILInt8Tag(ILBaseIntTag):
     """
     This class implements the tag ILTAG_INT8_ID.
     """
+    __slots__ = ()
 
     def __init__(self, value: int = 0, id: int = ILTAG_INT8_ID) -> None:
         super().__init__(id, 1, True, value, True)
@@ -131,6 +144,7 @@ class ILUInt8Tag(ILBaseIntTag):
     """
     This class implements the tag ILTAG_UINT8_ID.
     """
+    __slots__ = ()
 
     def __init__(self, value: int = 0, id: int = ILTAG_UINT8_ID) -> None:
         super().__init__(id, 1, False, value, True)
@@ -140,6 +154,7 @@ class ILInt16Tag(ILBaseIntTag):
     """
     This class implements the tag ILTAG_INT16_ID.
     """
+    __slots__ = ()
 
     def __init__(self, value: int = 0, id: int = ILTAG_INT16_ID) -> None:
         super().__init__(id, 2, True, value, True)
@@ -149,6 +164,7 @@ class ILUInt16Tag(ILBaseIntTag):
     """
     This class implements the tag ILTAG_UINT16_ID.
     """
+    __slots__ = ()
 
     def __init__(self, value: int = 0, id: int = ILTAG_UINT16_ID) -> None:
         super().__init__(id, 2, False, value, True)
@@ -158,6 +174,7 @@ class ILInt32Tag(ILBaseIntTag):
     """
     This class implements the tag ILTAG_INT32_ID.
     """
+    __slots__ = ()
 
     def __init__(self, value: int = 0, id: int = ILTAG_INT32_ID) -> None:
         super().__init__(id, 4, True, value, True)
@@ -167,6 +184,7 @@ class ILUInt32Tag(ILBaseIntTag):
     """
     This class implements the tag ILTAG_UINT32_ID.
     """
+    __slots__ = ()
 
     def __init__(self, value: int = 0, id: int = ILTAG_UINT32_ID) -> None:
         super().__init__(id, 4, False, value, True)
@@ -176,6 +194,7 @@ class ILInt64Tag(ILBaseIntTag):
     """
     This class implements the tag ILTAG_INT64_ID.
     """
+    __slots__ = ()
 
     def __init__(self, value: int = 0, id: int = ILTAG_INT64_ID) -> None:
         super().__init__(id, 8, True, value, True)
@@ -185,6 +204,7 @@ class ILUInt64Tag(ILBaseIntTag):
     """
     This class implements the tag ILTAG_INT64_ID.
     """
+    __slots__ = ()
 
     def __init__(self, value: int = 0, id: int = ILTAG_UINT64_ID) -> None:
         super().__init__(id, 8, False, value, True)
@@ -194,6 +214,7 @@ class ILILInt64Tag(ILTag):
     """
     This class implements the tag ILTAG_ILINT64_ID.
     """
+    __slots__ = ('_value',)
 
     def __init__(self, value: int = 0, id: int = ILTAG_ILINT64_ID) -> None:
         super().__init__(id, True)
@@ -205,6 +226,7 @@ class ILILInt64Tag(ILTag):
 
     @value.setter
     def value(self, value: int):
+        self._before_change()
         if not isinstance(value, int):
             raise TypeError('The value must be an integer.')
         assert_int_bounds(value, 8, False)
@@ -249,6 +271,7 @@ class ILILInt64Tag(ILTag):
         value, size = pyilint.ilint_decode(read_bytes(tag_size, reader))
         if size != tag_size:
             raise ILTagCorruptedError('Invalid ILInt value.')
+        self._before_change()
         self._value = value
 
     def serialize_value(self, writer: io.IOBase) -> None:
@@ -259,6 +282,7 @@ class ILBinary32Tag(ILBaseFloatTag):
     """
     This class implements the tag ILTAG_BINARY32_ID.
     """
+    __slots__ = ()
 
     def __init__(self, value: float = 0.0, id: int = ILTAG_BINARY32_ID) -> None:
         super().__init__(id, 4, value, True)
@@ -268,6 +292,7 @@ class ILBinary64Tag(ILBaseFloatTag):
     """
     This class implements the tag ILTAG_BINARY64_ID.
     """
+    __slots__ = ()
 
     def __init__(self, value: float = 0.0, id: int = ILTAG_BINARY64_ID) -> None:
         super().__init__(id, 8, value, True)
@@ -278,6 +303,7 @@ class ILBinary128Tag(ILFixedSizeTag):
     This class implements the tag ILTAG_BINARY128_ID. Since Python does not support
     the IEEE 754 standard's binary128, it will be represented by its raw bytes.
     """
+    __slots__ = ('_value',)
 
     ZERO = b'\x00' * 16
 
@@ -291,6 +317,7 @@ class ILBinary128Tag(ILFixedSizeTag):
 
     @value.setter
     def value(self, value: bytes):
+        self._before_change()
         if value is None:
             self._value = ILBinary128Tag.ZERO
         else:
@@ -322,6 +349,7 @@ class ILByteArrayTag(ILRawTag):
     """
     This class implements the tag ILTAG_BYTE_ARRAY_ID.
     """
+    __slots__ = ()
 
     def __init__(self, value: bytes = None, id: int = ILTAG_BYTE_ARRAY_ID) -> None:
         super().__init__(id, value)
@@ -331,7 +359,11 @@ class ILStringTag(ILTag):
     """
     This class implements the tag ILTAG_STRING_ID. It also include a few helper functions 
     to better manupulate UTF-8 bytes directly.
+
+    When the value is set as UTF-8 bytes, only the bytes are kept and the
+    string is decoded on the first access to `value`.
     """
+    __slots__ = ('_value', '_utf8')
 
     def __init__(self, value: str = None, id: int = ILTAG_STRING_ID) -> None:
         """
@@ -346,10 +378,18 @@ class ILStringTag(ILTag):
 
     @property
     def value(self) -> str:
-        return self._value
+        value = self._value
+        if value is None:
+            try:
+                value = ILStringTag.from_utf8(self._utf8)
+            except ValueError:
+                raise ILTagCorruptedError('Corrupted utf-8 string.')
+            self._value = value
+        return value
 
     @value.setter
     def value(self, value: str):
+        self._before_change()
         if value is None or value == '':
             self._value = ''
             self._utf8 = b''
@@ -368,27 +408,40 @@ class ILStringTag(ILTag):
 
     @utf8.setter
     def utf8(self, utf8: bytes):
+        self._before_change()
         if utf8 is None or utf8 == b'':
             self._value = ''
             self._utf8 = b''
-        elif isinstance(utf8, bytes):
-            self._value = ILStringTag.from_utf8(utf8)
-            if isinstance(utf8, bytearray):
-                self._utf8 = bytes(utf8)
-            else:
-                self._utf8 = utf8
+        elif isinstance(utf8, (bytes, bytearray)):
+            utf8 = bytes(utf8)
+            value = ILStringTag.assert_utf8(utf8)
+            self._value = value
+            self._utf8 = utf8
         else:
             raise TypeError(
                 'The value must be an instance of bytes or bytearray.')
 
     def deserialize_value(self, tag_factory: ILTagFactory, tag_size: int, reader: io.IOBase) -> None:
+        """
+        Reads the UTF-8 bytes of the string. They are verified unless
+        `tag_factory` has the attribute `validate_utf8` set to False. In this
+        case, invalid strings raise `ILTagCorruptedError` on the first access
+        to `value`. Strings decoded by the verification are kept, the others
+        are decoded on the first access to `value`.
+        """
         if tag_size == 0:
             self.utf8 = None
         else:
+            value = None
             try:
-                self.utf8 = read_bytes(tag_size, reader)
+                utf8 = read_bytes(tag_size, reader)
+                if getattr(tag_factory, 'validate_utf8', True):
+                    value = ILStringTag.assert_utf8(utf8)
             except ValueError:
                 raise ILTagCorruptedError('Corrupted utf-8 string.')
+            self._before_change()
+            self._value = value
+            self._utf8 = utf8
 
     def serialize_value(self, writer: io.IOBase) -> None:
         if self.utf8 is not None:
@@ -409,6 +462,20 @@ class ILStringTag(ILTag):
         """
         return str(utf8, 'utf-8')
 
+    @staticmethod
+    def assert_utf8(utf8: bytes) -> Optional[str]:
+        """
+        Verifies if the bytes are a valid UTF-8 string. It raises a
+        `ValueError` if they are not. ASCII strings are verified without
+        decoding them.
+
+        Returns the decoded string if it was decoded by the verification or
+        None otherwise.
+        """
+        if utf8.isascii():
+            return None
+        return str(utf8, 'utf-8')
+
     @staticmethod
     def size_in_utf8(s: str) -> int:
         """
@@ -445,6 +512,45 @@ class ILStringTag(ILTag):
         writer.write(bin_value)
         return size + len(bin_value)
 
+    @staticmethod
+    def encode_tag_from_components(value: str, id: int = ILTAG_STRING_ID) -> bytes:
+        """
+        Returns the serialization of an `ILStringTag` like tag without the
+        need to create a new instance of ILStringTag.
+
+        Parameters:
+        - `value`: The string to be serialized;
+        - `id`: Alternative tag id if it is not ILTAG_STRING_ID;
+        """
+        utf8 = ILStringTag.to_utf8(value)
+        ret = bytearray()
+        pyilint.ilint_encode(id, ret)
+        pyilint.ilint_encode(len(utf8), ret)
+        ret += utf8
+        return bytes(ret)
+
+    @staticmethod
+    def deserialize_utf8_from_components(reader: io.IOBase, id: int = ILTAG_STRING_ID) -> bytes:
+        """
+        Deserializes an `ILStringTag` like tag and returns its UTF-8 bytes
+        without the need to create a new instance of ILStringTag. It raises
+        `ILTagCorruptedError` if the tag id is not `id` or if the tag is
+        incomplete. The UTF-8 bytes are not verified.
+
+        Parameters:
+        - `reader`: The reader;
+        - `id`: Alternative tag id if it is not ILTAG_STRING_ID;
+        """
+        try:
+            tag_id, _ = pyilint.ilint_decode_from_stream(reader)
+            if tag_id != id:
+                raise ILTagCorruptedError(
+                    f'Corrupted tag. Expecting a string with id {id} but got {tag_id}.')
+            size, _ = pyilint.ilint_decode_from_stream(reader)
+            return read_bytes(size, reader)
+        except (ValueError, EOFError):
+            raise ILTagCorruptedError('Corrupted string tag.')
+
     @staticmethod
     def is_standard_string(tag: ILTag) -> bool:
         """
@@ -457,6 +563,7 @@ class ILBigIntegerTag(ILRawTag):
     """
     This class implements the tag ILTAG_BINT_ID.
     """
+    __slots__ = ()
     DEFAULT_VALUE = b'\x00'
 
     def __init__(self, value: bytes = None, id: int = ILTAG_BINT_ID) -> None:
@@ -471,6 +578,7 @@ class ILBigDecimalTag(ILBigIntegerTag):
     """
     This class implements the tag ILTAG_BDEC_ID.
     """
+    __slots__ = ('_scale',)
 
     def __init__(self, value: bytes = None, scale: int = 0, id: int = ILTAG_BDEC_ID) -> None:
         super().__init__(value, id)
@@ -482,6 +590,7 @@ class ILBigDecimalTag(ILBigIntegerTag):
 
     @scale.setter
     def scale(self, scale: int):
+        self._before_change()
         if not isinstance(scale, int):
             raise TypeError('The scale must be a valid integer.')
         assert_int_bounds(scale, 4, True)
@@ -494,24 +603,36 @@ class ILBigDecimalTag(ILBigIntegerTag):
         if tag_size < 5:
             raise ILTagCorruptedError('Corrupted tag value.')
         self.scale = read_int(4, True, reader)
-        self.value = read_bytes(tag_size - 4, reader)
+        super().deserialize_value(tag_factory, tag_size - 4, reader)
 
     def serialize_value(self, writer: io.IOBase) -> None:
         write_int(self.scale, 4, True, writer)
-        writer.write(self.value)
+        write_payload(self.value, writer)
 
 
 class ILIntArrayTag(ILTag, RestrictListMixin[int]):
     """
-    This class implements the tag ILTAG_ILINT64_ARRAY_ID.
+    This class implements the tag ILTAG_ILINT64_ARRAY_ID. The values are stored
+    in an `array.array` with 8 bytes per element.
     """
+    __slots__ = ('_values', '_shared')
+
+    # Type code of the array used to store the values.
+    TYPECODE = 'Q'
 
-    def __init__(self, values: List[int] = None, id: int = ILTAG_ILINT64_ARRAY_ID) -> None:
+    def __init__(self, values: Iterable[int] = None, id: int = ILTAG_ILINT64_ARRAY_ID) -> None:
         super().__init__(id)
-        RestrictListMixin.__init__(self)
-        if values:
-            for v in values:
-                self.append(v)
+        self._values = array.array(ILIntArrayTag.TYPECODE)
+        self._shared = None
+        if values is not None:
+            self.extend(values)
+
+    def _before_change(self):
+        self._own_values()
+        super()._before_change()
+
+    def _after_copy(self, original: 'ILTag') -> None:
+        self._share_values(original)
 
     def assert_value_type(self, value: T):
         if isinstance(value, int):
@@ -519,106 +640,672 @@ class ILIntArrayTag(ILTag, RestrictListMixin[int]):
         else:
             raise TypeError('Only unsigned 64-bit integers are allowed.')
 
+    def append(self, value: int):
+        self._before_change()
+        if not isinstance(value, int):
+            raise TypeError('Only unsigned 64-bit integers are allowed.')
+        try:
+            self._values.append(value)
+        except OverflowError:
+            raise ValueError('Only unsigned 64-bit integers are allowed.')
+
+    def assert_values_type(self, values: List[int]):
+        ILIntArrayTag.to_array(values)
+
+    def extend(self, values: Iterable[int], validate: bool = True):
+        """
+        Appends all values at once. The values are validated in a single pass
+        before any of them is added. `values` can be any iterable of integers,
+        an `array.array` of integers or a NumPy array of integers.
+
+        Parameters:
+        - `values`: The values to be added;
+        - `validate`: If False, a list of values is appended without being
+          converted and verified first. It should be used only if the values
+          are known to be valid;
+        """
+        self._before_change()
+        if isinstance(values, array.array) and values.typecode == ILIntArrayTag.TYPECODE:
+            # Already valid
+            pass
+        elif validate or values.__class__ is not list:
+            values = ILIntArrayTag.to_array(values)
+        self._values.extend(values)
+
+    def insert(self, key: int, value: int):
+        self._before_change()
+        self.assert_value_type(value)
+        self._values.insert(key, value)
+
+    def sort(self, key: Callable = None, reverse: bool = False):
+        self._before_change()
+        self._values = array.array(ILIntArrayTag.TYPECODE,
+                                   sorted(self._values, key=key, reverse=reverse))
+
+    @staticmethod
+    def to_array(values: Iterable[int]) -> array.array:
+        """
+        Converts the values into a new array that can be used by this class.
+        It raises `ValueError` or `TypeError` if at least one of the values is
+        not an unsigned 64-bit integer.
+
+        Parameters:
+        - `values`: Any iterable of integers, an `array.array` of integers or
+          a NumPy array of integers;
+        """
+        dtype = getattr(values, 'dtype', None)
+        if dtype is not None and not isinstance(values, array.array):
+            # NumPy array, converted as a whole without iterating over it.
+            if dtype.kind not in 'ui':
+                raise TypeError('Only unsigned 64-bit integers are allowed.')
+            if dtype.kind == 'i' and values.size and values.min() < 0:
+                raise ValueError('Only unsigned 64-bit integers are allowed.')
+            ret = array.array(ILIntArrayTag.TYPECODE)
+            ret.frombytes(values.astype(
+                '=u8', copy=False).tobytes(order='C'))
+            return ret
+        try:
+            return array.array(ILIntArrayTag.TYPECODE, values)
+        except OverflowError:
+            raise ValueError('Only unsigned 64-bit integers are allowed.')
+        except TypeError:
+            raise TypeError('Only unsigned 64-bit integers are allowed.')
+
+    def clear(self):
+        self._before_change()
+        del self._values[:]
+
+    def __getitem__(self, key: int) -> int:
+        if isinstance(key, slice):
+            return self._values[key].tolist()
+        return self._values[key]
+
+    def __setitem__(self, key: int, value: int):
+        self._before_change()
+        if isinstance(key, slice):
+            self._values[key] = ILIntArrayTag.to_array(value)
+            return
+        if not isinstance(value, int):
+            raise TypeError('Only unsigned 64-bit integers are allowed.')
+        try:
+            self._values[key] = value
+        except OverflowError:
+            raise ValueError('Only unsigned 64-bit integers are allowed.')
+
+    def __repr__(self) -> str:
+        return str(self._values.tolist())
+
     def value_size(self) -> int:
-        size = pyilint.ilint_size(len(self))
-        for v in self:
-            size += pyilint.ilint_size(v)
-        return size
+        return pyilint.ilint_size(len(self)) + ilint_size_array(self._values)
 
     def deserialize_value(self, tag_factory: ILTagFactory, tag_size: int, reader: io.IOBase) -> None:
         if tag_size < 1:
             raise ILTagCorruptedError('Corrupted tag.')
-        self.clear()
-        count, _ = pyilint.ilint_decode_from_stream(reader)
-        for i in range(count):
-            v, _ = pyilint.ilint_decode_from_stream(reader)
-            self.append(v)
+        self._before_change()
+        try:
+            count, size = pyilint.ilint_decode_from_stream(reader)
+            if size > tag_size:
+                raise ValueError()
+            body = read_bytes(tag_size - size, reader)
+            values, size = ilint_decode_array(body, count)
+        except ValueError:
+            raise ILTagCorruptedError('Corrupted tag.')
+        if size != len(body):
+            raise ILTagCorruptedError('Corrupted tag.')
+        self._values = values
 
     def serialize_value(self, writer: io.IOBase) -> None:
         pyilint.ilint_encode_to_stream(len(self), writer)
-        for v in self:
-            pyilint.ilint_encode_to_stream(v, writer)
+        writer.write(ilint_encode_array(self._values))
+
+
+def _array_typecode(size: int, signed: bool) -> str:
+    for c in ('bhilq' if signed else 'BHILQ'):
+        if array.array(c).itemsize == size:
+            return c
+    raise NotImplementedError(f'No array type with {size} bytes.')
+
+
+def _require_numpy() -> None:
+    if numpy is None:
+        raise ImportError('This operation requires NumPy.')
+
+
+class ILTagColumn:
+    """
+    This class stores the elements of an `ILTagArrayTag` when all of them are
+    implicit fixed-size numeric tags with the same id (from `ILInt8Tag` to
+    `ILUInt64Tag`, `ILBinary32Tag` and `ILBinary64Tag`). The values are kept
+    in a single `array.array` and the element tags are created only when they
+    are accessed.
+
+    Only the values of the elements are stored, thus the column does not keep
+    the identity of the element tags. The tags passed to `append()`,
+    `extend()`, `insert()` and `__setitem__()` are not kept and later changes
+    to them are not seen by the column. The tags returned by `__getitem__()`,
+    `__iter__()` and `pop()` are new frozen tags created from the values. Use
+    `__setitem__()` to change an element.
+    """
+    __slots__ = ('_tag_id', '_tag_class', '_values')
+
+    # Maps the supported tag ids to their classes and array type codes.
+    TYPES = {
+        ILTAG_INT8_ID: (ILInt8Tag, _array_typecode(1, True)),
+        ILTAG_UINT8_ID: (ILUInt8Tag, _array_typecode(1, False)),
+        ILTAG_INT16_ID: (ILInt16Tag, _array_typecode(2, True)),
+        ILTAG_UINT16_ID: (ILUInt16Tag, _array_typecode(2, False)),
+        ILTAG_INT32_ID: (ILInt32Tag, _array_typecode(4, True)),
+        ILTAG_UINT32_ID: (ILUInt32Tag, _array_typecode(4, False)),
+        ILTAG_INT64_ID: (ILInt64Tag, _array_typecode(8, True)),
+        ILTAG_UINT64_ID: (ILUInt64Tag, _array_typecode(8, False)),
+        ILTAG_BINARY32_ID: (ILBinary32Tag, 'f'),
+        ILTAG_BINARY64_ID: (ILBinary64Tag, 'd'),
+    }
+
+    # Maps the supported tag ids to their NumPy types, without the byte order.
+    DTYPES = {
+        ILTAG_INT8_ID: 'i1',
+        ILTAG_UINT8_ID: 'u1',
+        ILTAG_INT16_ID: 'i2',
+        ILTAG_UINT16_ID: 'u2',
+        ILTAG_INT32_ID: 'i4',
+        ILTAG_UINT32_ID: 'u4',
+        ILTAG_INT64_ID: 'i8',
+        ILTAG_UINT64_ID: 'u8',
+        ILTAG_BINARY32_ID: 'f4',
+        ILTAG_BINARY64_ID: 'f8',
+    }
+
+    def __init__(self, tag_id: int, values: Iterable = None) -> None:
+        """
+        Creates a new instance of this class.
+
+        Parameters:
+        - `tag_id`: The id of the elements. It must be one of the ids in `TYPES`;
+        - `values`: The initial values of the elements;
+        """
+        if tag_id not in ILTagColumn.TYPES:
+            raise ValueError(f'Tag id {tag_id} cannot be stored in a column.')
+        self._tag_id = tag_id
+        self._tag_class, typecode = ILTagColumn.TYPES[tag_id]
+        self._values = array.array(typecode)
+        if values is not None:
+            try:
+                self._values.extend(array.array(typecode, values))
+            except OverflowError:
+                raise ValueError('Value out of bounds.')
+
+    def __copy__(self) -> 'ILTagColumn':
+        ret = ILTagColumn.__new__(ILTagColumn)
+        ret._tag_id = self._tag_id
+        ret._tag_class = self._tag_class
+        ret._values = array.array(self._values.typecode, self._values)
+        return ret
+
+    @property
+    def tag_id(self) -> int:
+        """
+        The id of the elements.
+        """
+        return self._tag_id
+
+    @property
+    def values(self) -> array.array:
+        """
+        The array that holds the values of the elements.
+        """
+        return self._values
+
+    @property
+    def element_size(self) -> int:
+        """
+        The size of each element, including its id.
+        """
+        return 1 + self._values.itemsize
+
+    def accepts(self, tag: ILTag) -> bool:
+        """
+        Returns True if the given tag can be stored in this column.
+        """
+        return isinstance(tag, self._tag_class) and tag.id == self._tag_id
+
+    def create(self, value) -> ILTag:
+        """
+        Creates a new element tag with the given value.
+        """
+        return self._tag_class(value)
+
+    def to_list(self) -> List[ILTag]:
+        """
+        Returns a list with new element tags for all values.
+        """
+        return [self._tag_class(v) for v in self._values]
+
+    def append(self, tag: ILTag):
+        self._values.append(tag.value)
+
+    def extend(self, tags: Iterable[ILTag]):
+        self._values.extend([t.value for t in tags])
+
+    def insert(self, key: int, tag: ILTag):
+        self._values.insert(key, tag.value)
+
+    def clear(self):
+        del self._values[:]
+
+    def pop(self, key: int = -1) -> ILTag:
+        return self.create(self._values.pop(key)).freeze()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __getitem__(self, key: int) -> ILTag:
+        if isinstance(key, slice):
+            return [self.create(v).freeze() for v in self._values[key]]
+        return self.create(self._values[key]).freeze()
+
+    def __setitem__(self, key: int, tag: ILTag):
+        if isinstance(key, slice):
+            self._values[key] = array.array(
+                self._values.typecode, [t.value for t in tag])
+        else:
+            self._values[key] = tag.value
+
+    def __delitem__(self, key: int):
+        del self._values[key]
+
+    def __iter__(self) -> Iterator[ILTag]:
+        for v in self._values:
+            yield self.create(v).freeze()
+
+    def __contains__(self, tag: ILTag) -> bool:
+        return self.accepts(tag) and tag.value in self._values
+
+    def __repr__(self) -> str:
+        return repr(self.to_list())
+
+    def serialize(self, writer: io.IOBase) -> None:
+        """
+        Writes the serialization of all elements.
+        """
+        count = len(self._values)
+        if numpy is not None:
+            dtype = ILTagColumn.DTYPES[self._tag_id]
+            payload = numpy.empty(count, ILTagColumn._record_dtype(dtype))
+            payload['id'] = self._tag_id
+            payload['value'] = numpy.frombuffer(self._values, '=' + dtype)
+            writer.write(payload.tobytes())
+            return
+        size = self._values.itemsize
+        stride = 1 + size
+        values = self._values
+        if sys.byteorder == 'little' and size > 1:
+            values = array.array(values.typecode, values)
+            values.byteswap()
+        raw = values.tobytes()
+        payload = bytearray(count * stride)
+        payload[0::stride] = bytes((self._tag_id,)) * count
+        for i in range(size):
+            payload[i + 1::stride] = raw[i::size]
+        writer.write(payload)
+
+    @staticmethod
+    def _record_dtype(dtype: str):
+        """
+        Returns the NumPy type of the serialization of one element.
+        """
+        return numpy.dtype([('id', 'u1'), ('value', '>' + dtype)])
+
+    def to_numpy(self):
+        """
+        Returns a new NumPy array with a copy of the values. It requires NumPy.
+        """
+        _require_numpy()
+        return numpy.frombuffer(
+            self._values, '=' + ILTagColumn.DTYPES[self._tag_id]).copy()
+
+    @staticmethod
+    def from_numpy(values, tag_id: int = None) -> 'ILTagColumn':
+        """
+        Creates a new column with a copy of the values of a NumPy array.
+
+        Parameters:
+        - `values`: A one-dimensional NumPy array;
+        - `tag_id`: The id of the elements. If None, it is chosen from the type
+          of `values`, which must be one of the types in `DTYPES`;
+        """
+        _require_numpy()
+        if getattr(values, 'ndim', None) != 1:
+            raise ValueError('The values must be a one-dimensional NumPy array.')
+        if tag_id is None:
+            tag_id = ILTagColumn.dtype_tag_id(values.dtype)
+        column = ILTagColumn(tag_id)
+        dtype = ILTagColumn.DTYPES[tag_id]
+        if dtype[0] != 'f':
+            if values.dtype.kind not in 'biu':
+                raise TypeError('The values must be integers.')
+            info = numpy.iinfo(dtype)
+            if values.size and (values.min() < info.min or values.max() > info.max):
+                raise ValueError('Value out of bounds.')
+        column._values.frombytes(
+            numpy.ascontiguousarray(values, '=' + dtype).tobytes())
+        return column
+
+    @staticmethod
+    def dtype_tag_id(dtype) -> int:
+        """
+        Returns the id of the tag that matches the given NumPy type or raises
+        `ValueError` if there is no such tag.
+        """
+        name = dtype.kind + str(dtype.itemsize)
+        for tag_id, n in ILTagColumn.DTYPES.items():
+            if n == name:
+                return tag_id
+        raise ValueError(f'No tag matches the type {dtype}.')
+
+    @staticmethod
+    def from_payload(payload: bytes) -> 'ILTagColumn':
+        """
+        Creates a new column from the payload of an `ILTagArrayTag`. Returns
+        None if the array is empty or if its elements cannot be stored in a
+        column.
+
+        Parameters:
+        - `payload`: The payload of the `ILTagArrayTag`;
+        """
+        count, offset = pyilint.ilint_decode(payload)
+        if count == 0 or offset >= len(payload):
+            return None
+        tag_id = payload[offset]
+        if tag_id not in ILTagColumn.TYPES:
+            return None
+        column = ILTagColumn(tag_id)
+        size = column._values.itemsize
+        stride = 1 + size
+        if len(payload) - offset != count * stride:
+            return None
+        if numpy is not None:
+            dtype = ILTagColumn.DTYPES[tag_id]
+            records = numpy.frombuffer(payload, ILTagColumn._record_dtype(dtype),
+                                       count, offset)
+            if not (records['id'] == tag_id).all():
+                return None
+            column._values.frombytes(
+                records['value'].astype('=' + dtype).tobytes())
+            return column
+        payload = memoryview(payload)[offset:]
+        if payload[0::stride] != bytes((tag_id,)) * count:
+            return None
+        raw = bytearray(count * size)
+        for i in range(size):
+            raw[i::size] = payload[i + 1::stride]
+        column._values.frombytes(raw)
+        if sys.byteorder == 'little' and size > 1:
+            column._values.byteswap()
+        return column
 
 
 class ILTagArrayTag(ILTag, RestrictListMixin[ILTag]):
     """
-    This class implements the tag ILTAG_ILTAG_ARRAY_ID.
+    This class implements the tag ILTAG_ILTAG_ARRAY_ID. The elements may be
+    stored in an `ILTagColumn` instead of a list. In this case, the element
+    tags are created only when they are accessed and the array is converted
+    back into a list if an element that does not fit into the column is added.
+
+    Arrays backed by a column do not keep the identity of their elements:
+    only the values of the added tags are stored and the accessed elements
+    are new frozen tags. See `ILTagColumn` for further details.
     """
+    __slots__ = ('_values', '_shared')
+
+    VALUE_CLASS = ILTag
 
     def __init__(self, values: List[ILTag] = None, id: int = ILTAG_ILTAG_ARRAY_ID) -> None:
+        """
+        Creates a new instance of this class.
+
+        Parameters:
+        - `values`: The initial values. If it is an `ILTagColumn`, it will
+          be used to store the elements;
+        - `id`: The tag id;
+        """
         super().__init__(id)
         RestrictListMixin.__init__(self)
-        if values:
-            for v in values:
-                self.append(v)
+        if isinstance(values, ILTagColumn):
+            self._values = values
+        elif values:
+            self.extend(values)
 
-    def assert_value_type(self, value: T):
-        if not isinstance(value, ILTag):
-            raise TypeError('Only ILTags are allowed.')
+    def _before_change(self):
+        self._own_values()
+        super()._before_change()
+
+    def _after_copy(self, original: 'ILTag') -> None:
+        self._share_values(original)
+
+    def _has_mutable_values(self) -> bool:
+        return self._values.__class__ is not ILTagColumn
+
+    def _copy_value(self, value: ILTag) -> ILTag:
+        value = value.copy()
+        value._link_parent(self)
+        return value
+
+    def _own_children(self) -> None:
+        self._own_all()
+
+    @property
+    def column(self) -> ILTagColumn:
+        """
+        The `ILTagColumn` that stores the elements or None if they are stored
+        in a list.
+        """
+        if self._values.__class__ is ILTagColumn:
+            return self._values
+        return None
+
+    @staticmethod
+    def from_numpy(values, tag_id: int = None, id: int = ILTAG_ILTAG_ARRAY_ID) -> 'ILTagArrayTag':
+        """
+        Creates a new array with the values of a NumPy array stored in an
+        `ILTagColumn`. See `ILTagColumn.from_numpy()` for further details.
+
+        Parameters:
+        - `values`: A one-dimensional NumPy array;
+        - `tag_id`: The id of the elements or None to choose it from the type
+          of `values`;
+        - `id`: The tag id;
+        """
+        return ILTagArrayTag(ILTagColumn.from_numpy(values, tag_id), id)
+
+    def to_numpy(self, tag_id: int = ILTAG_BINARY64_ID):
+        """
+        Returns a NumPy array with the values of the elements. All elements
+        must be implicit fixed-size numeric tags with the same id, otherwise
+        `ValueError` is raised. It requires NumPy.
+
+        Parameters:
+        - `tag_id`: The id of the elements of an empty array that is not
+          stored in a column, used to choose the type of the returned array.
+          It must be one of the ids in `ILTagColumn.DTYPES`;
+        """
+        _require_numpy()
+        column = self.column
+        if column is None:
+            if not self._values:
+                return ILTagColumn(tag_id).to_numpy()
+            column = ILTagColumn.from_payload(iltags_encode_value(self))
+            if column is None:
+                raise ValueError(
+                    'The elements cannot be converted into a NumPy array.')
+        return column.to_numpy()
+
+    def _assert_column_accepts(self, values: List[ILTag]):
+        """
+        Converts the column into a list if it cannot store all the given
+        values.
+        """
+        if self._values.__class__ is ILTagColumn:
+            accepts = self._values.accepts
+            for v in values:
+                if not accepts(v):
+                    self._before_change()
+                    self._values = self._values.to_list()
+                    self._shared = None
+                    return
+
+    def append(self, value: ILTag):
+        self._assert_column_accepts((value,))
+        super().append(value)
+
+    def extend(self, values: Iterable[ILTag], validate: bool = True):
+        if not isinstance(values, list):
+            values = list(values)
+        self._assert_column_accepts(values)
+        super().extend(values, validate)
+
+    def insert(self, key: int, value: ILTag):
+        self._assert_column_accepts((value,))
+        super().insert(key, value)
+
+    def sort(self, key: Callable = None, reverse: bool = False):
+        if self._values.__class__ is ILTagColumn:
+            self._before_change()
+            self._values = self._values.to_list()
+            self._shared = None
+        super().sort(key, reverse)
+
+    def __setitem__(self, key: int, value: ILTag):
+        if isinstance(key, slice):
+            value = list(value)
+            self._assert_column_accepts(value)
+        else:
+            self._assert_column_accepts((value,))
+        super().__setitem__(key, value)
 
     def value_size(self) -> int:
-        size = pyilint.ilint_size(len(self))
-        for t in self:
-            size += t.tag_size()
-        return size
+        return iltags_compute_value_sizes(self)[id(self)]
+
+    def value_children(self) -> Iterable[ILTag]:
+        if self._values.__class__ is ILTagColumn:
+            return ()
+        return self._values
+
+    def value_size_from_children(self, children_size: int) -> int:
+        if self._values.__class__ is ILTagColumn:
+            children_size += len(self._values) * self._values.element_size
+        return pyilint.ilint_size(len(self)) + children_size
 
     def deserialize_value(self, tag_factory: ILTagFactory, tag_size: int, reader: io.IOBase) -> None:
         if tag_size < 1:
             raise ILTagCorruptedError('Corrupted tag.')
         reader = LimitedReaderWrapper(reader, tag_size)
         self.clear()
+        self._values = []
         try:
             count, _ = pyilint.ilint_decode_from_stream(reader)
         except ValueError:
             raise ILTagCorruptedError('Corrupted tag.')
-        for i in range(count):
-            t = tag_factory.deserialize(reader)
-            self.append(t)
+        self.extend([tag_factory.deserialize(reader)
+                     for i in range(count)], False)
+
+    def deserialize_column(self, payload: bytes) -> bool:
+        """
+        Loads the payload into an `ILTagColumn` if possible. Returns False if
+        the elements cannot be stored in a column, leaving this tag unchanged.
+
+        Parameters:
+        - `payload`: The payload of the tag;
+        """
+        try:
+            column = ILTagColumn.from_payload(payload)
+        except ValueError:
+            raise ILTagCorruptedError('Corrupted tag.')
+        if column is None:
+            return False
+        self._before_change()
+        self._values = column
+        self._shared = None
+        return True
 
     def serialize_value(self, writer: io.IOBase) -> None:
-        pyilint.ilint_encode_to_stream(len(self), writer)
-        for t in self:
+        for t in self.serialize_value_iter(writer):
             t.serialize(writer)
 
+    def serialize_value_iter(self, writer: io.IOBase) -> Iterator[ILTag]:
+        pyilint.ilint_encode_to_stream(len(self), writer)
+        if self._values.__class__ is ILTagColumn:
+            self._values.serialize(writer)
+        else:
+            yield from self._values
+
+    def tree_digest_value_iter(self, writer: io.IOBase) -> Iterator[ILTag]:
+        pyilint.ilint_encode_to_stream(len(self), writer)
+        yield from self._values
+
 
 class ILTagSequenceTag(ILTag, RestrictListMixin[ILTag]):
     """
     This class implements the tag ILTAG_ILTAG_SEQ_ID.
     """
+    __slots__ = ('_values', '_shared')
+
+    VALUE_CLASS = ILTag
 
     def __init__(self, values: List[ILTag] = None, id: int = ILTAG_ILTAG_SEQ_ID) -> None:
         super().__init__(id)
         RestrictListMixin.__init__(self)
         if values:
-            for v in values:
-                self.append(v)
+            self.extend(values)
 
-    def assert_value_type(self, value: T):
-        if not isinstance(value, ILTag):
-            raise TypeError('Only ILTags are allowed.')
+    def _before_change(self):
+        self._own_values()
+        super()._before_change()
+
+    def _after_copy(self, original: 'ILTag') -> None:
+        self._share_values(original)
+
+    def _has_mutable_values(self) -> bool:
+        return True
+
+    def _copy_value(self, value: ILTag) -> ILTag:
+        value = value.copy()
+        value._link_parent(self)
+        return value
+
+    def _own_children(self) -> None:
+        self._own_all()
 
     def value_size(self) -> int:
-        size = 0
-        for t in self:
-            size += t.tag_size()
-        return size
+        return iltags_compute_value_sizes(self)[id(self)]
+
+    def value_children(self) -> Iterable[ILTag]:
+        return self._values
+
+    def value_size_from_children(self, children_size: int) -> int:
+        return children_size
 
     def deserialize_value(self, tag_factory: ILTagFactory, tag_size: int, reader: io.IOBase) -> None:
         reader = LimitedReaderWrapper(reader, tag_size)
         self.clear()
+        values = []
         while reader.remaining:
-            t = tag_factory.deserialize(reader)
-            self.append(t)
+            values.append(tag_factory.deserialize(reader))
+        self.extend(values, False)
 
     def serialize_value(self, writer: io.IOBase) -> None:
-        for t in self:
+        for t in self.serialize_value_iter(writer):
             t.serialize(writer)
 
+    def serialize_value_iter(self, writer: io.IOBase) -> Iterator[ILTag]:
+        yield from self._values
+
 
 class ILRangeTag(ILTag):
     """
     This class implements the tag ILTAG_RANGE_ID.
     """
+    __slots__ = ('_first', '_count')
 
     def __init__(self, first: int = 0, count: int = 0, id: int = ILTAG_RANGE_ID) -> None:
         super().__init__(id)
@@ -631,6 +1318,7 @@ class ILRangeTag(ILTag):
 
     @first.setter
     def first(self, value: int):
+        self._before_change()
         if not isinstance(value, int):
             raise TypeError('first must be an integer.')
         assert_int_bounds(value, 8, False)
@@ -642,6 +1330,7 @@ class ILRangeTag(ILTag):
 
     @count.setter
     def count(self, value: int):
+        self._before_change()
         if not isinstance(value, int):
             raise TypeError('count must be an integer.')
         assert_int_bounds(value, 2, False)
@@ -670,6 +1359,7 @@ class ILVersionTag(ILFixedSizeTag):
     """
     This class implements the tag ILTAG_VERSION_ID.
     """
+    __slots__ = ('_values',)
 
     def __init__(self, major: int = 0, minor: int = 0, revision: int = 0, build: int = 0, id: int = ILTAG_VERSION_ID) -> None:
         super().__init__(id, 16)
@@ -679,7 +1369,11 @@ class ILVersionTag(ILFixedSizeTag):
         self.revision = revision
         self.build = build
 
+    def _after_copy(self, original: 'ILTag') -> None:
+        self._values = list(original._values)
+
     def _set_field_core(self, value: int, index: int):
+        self._before_change()
         if not isinstance(value, int):
             raise TypeError('first must be an integer.')
         assert_int_bounds(value, 4, True)
@@ -720,6 +1414,7 @@ class ILVersionTag(ILFixedSizeTag):
     def deserialize_value(self, tag_factory: ILTagFactory, tag_size: int, reader: io.IOBase) -> None:
         if tag_size != 16:
             raise ILTagCorruptedError('Corrupted range.')
+        self._before_change()
         for i in range(4):
             self._values[i] = read_int(4, True, reader)
 
@@ -732,21 +1427,100 @@ class ILOIDTag(ILIntArrayTag):
     """
     This class implements the tag ILTAG_OID_ID.
     """
+    __slots__ = ()
 
-    def __init__(self, values: List[int] = None) -> None:
+    def __init__(self, values: Iterable[int] = None) -> None:
         super().__init__(values, ILTAG_OID_ID)
 
 
+def _cached_string_encoder(cache: dict) -> Callable[[str], bytes]:
+    """
+    Returns a function that returns the serialization of the `ILStringTag`
+    of a string and caches it in `cache`.
+    """
+    def encode(value: str) -> bytes:
+        encoded = cache.get(value)
+        if encoded is None:
+            encoded = ILStringTag.encode_tag_from_components(value)
+            cache[value] = encoded
+        return encoded
+    return encode
+
+
+def _deserialize_key(reader: io.IOBase) -> bytes:
+    try:
+        return ILStringTag.deserialize_utf8_from_components(reader)
+    except ILTagCorruptedError:
+        raise ILTagCorruptedError(
+            'Corrupted tag. One of the keys is not a string.')
+
+
+def _decode_key(utf8: bytes) -> str:
+    try:
+        return ILStringTag.from_utf8(utf8)
+    except ValueError:
+        raise ILTagCorruptedError('Corrupted utf-8 string.')
+
+
+def _key_decoder(tag_factory: ILTagFactory) -> Callable[[bytes], str]:
+    """
+    Returns the function that converts the UTF-8 keys of dictionaries into
+    strings. It is `tag_factory.intern_key()` if it exists.
+    """
+    return getattr(tag_factory, 'intern_key', _decode_key)
+
+
 class ILDictionaryTag(ILTag, RestrictDictMixin[str, ILTag]):
     """
     This class implements the tag ILTAG_DICT_ID. Instances of this 
     class implements a dictionary interface that accepts strings as
     keys and ILTags as values. It also preserves the order of insertion.
     """
+    __slots__ = ('_values', '_shared', '_encoded_keys')
 
     def __init__(self, id: int = ILTAG_DICT_ID) -> None:
         super().__init__(id)
         RestrictDictMixin.__init__(self)
+        self._encoded_keys = None
+
+    def _before_change(self):
+        self._own_values()
+        super()._before_change()
+
+    def _after_copy(self, original: 'ILTag') -> None:
+        self._share_values(original)
+        self._encoded_keys = None
+
+    def _key_encoder(self) -> Callable[[str], bytes]:
+        """
+        Returns a function that returns the serialization of the
+        `ILStringTag` of a key. The serializations are cached by this
+        instance until the keys are removed.
+        """
+        cache = self._encoded_keys
+        if cache is None:
+            cache = self._encoded_keys = {}
+        return _cached_string_encoder(cache)
+
+    def __delitem__(self, key: str):
+        super().__delitem__(key)
+        if self._encoded_keys is not None:
+            self._encoded_keys.pop(key, None)
+
+    def clear(self):
+        super().clear()
+        self._encoded_keys = None
+
+    def _has_mutable_values(self) -> bool:
+        return True
+
+    def _copy_value(self, value: ILTag) -> ILTag:
+        value = value.copy()
+        value._link_parent(self)
+        return value
+
+    def _own_children(self) -> None:
+        self._own_all()
 
     def assert_value_type(self, value: T):
         if not isinstance(value, ILTag):
@@ -756,11 +1530,24 @@ class ILDictionaryTag(ILTag, RestrictDictMixin[str, ILTag]):
         if not isinstance(key, str):
             raise TypeError('The key must be a string.')
 
+    def assert_items_type(self, items: List[Tuple[str, ILTag]]):
+        for key, value in items:
+            if not isinstance(key, str):
+                raise TypeError('The key must be a string.')
+            if not isinstance(value, ILTag):
+                raise TypeError('The value must an ILTag.')
+
     def value_size(self) -> int:
-        size = pyilint.ilint_size(len(self))
-        for key in self:
-            size += (ILStringTag.compute_string_tag_size(
-                key) + self[key].tag_size())
+        return iltags_compute_value_sizes(self)[id(self)]
+
+    def value_children(self) -> Iterable[ILTag]:
+        return self._values.values()
+
+    def value_size_from_children(self, children_size: int) -> int:
+        size = pyilint.ilint_size(len(self)) + children_size
+        encode = self._key_encoder()
+        for key in self._values:
+            size += len(encode(key))
         return size
 
     def deserialize_value(self, tag_factory: ILTagFactory, tag_size: int, reader: io.IOBase) -> None:
@@ -768,19 +1555,24 @@ class ILDictionaryTag(ILTag, RestrictDictMixin[str, ILTag]):
             raise ILTagCorruptedError('Corrupted tag.')
         count, _ = pyilint.ilint_decode_from_stream(reader)
         self.clear()
+        decode_key = _key_decoder(tag_factory)
+        items = []
         for i in range(count):
-            key = tag_factory.deserialize(reader)
-            if not ILStringTag.is_standard_string(key):
-                raise ILTagCorruptedError(
-                    'Corrupted tag. One of the keys is not a string.')
+            key = decode_key(_deserialize_key(reader))
             value = tag_factory.deserialize(reader)
-            self[key.value] = value
+            items.append((key, value))
+        self.update(items, False)
 
     def serialize_value(self, writer: io.IOBase) -> None:
+        for t in self.serialize_value_iter(writer):
+            t.serialize(writer)
+
+    def serialize_value_iter(self, writer: io.IOBase) -> Iterator[ILTag]:
         pyilint.ilint_encode_to_stream(len(self), writer)
-        for key in self:
-            ILStringTag.serialize_tag_from_components(key, writer)
-            self[key].serialize(writer)
+        encode = self._key_encoder()
+        for key, value in self._values.items():
+            writer.write(encode(key))
+            yield value
 
 
 class ILStringDictionaryTag(ILTag, RestrictDictMixin[str, str]):
@@ -789,10 +1581,20 @@ class ILStringDictionaryTag(ILTag, RestrictDictMixin[str, str]):
     class implements a dictionary interface that accepts strings as
     keys and ILTags as values. It also preserves the order of insertion.
     """
+    __slots__ = ('_values', '_shared', '_encoded_values')
 
     def __init__(self, id: int = ILTAG_STRDICT_ID) -> None:
         super().__init__(id)
         RestrictDictMixin.__init__(self)
+        self._encoded_values = None
+
+    def _before_change(self):
+        self._own_values()
+        super()._before_change()
+
+    def _after_copy(self, original: 'ILTag') -> None:
+        self._share_values(original)
+        self._encoded_values = None
 
     def assert_value_type(self, value: T):
         if not isinstance(value, str):
@@ -802,11 +1604,54 @@ class ILStringDictionaryTag(ILTag, RestrictDictMixin[str, str]):
         if not isinstance(key, str):
             raise TypeError('The key must be a string.')
 
+    def assert_items_type(self, items: List[Tuple[str, str]]):
+        for key, value in items:
+            if not isinstance(key, str):
+                raise TypeError('The key must be a string.')
+            if not isinstance(value, str):
+                raise TypeError('The value must be a string.')
+
+    def _value_encoder(self) -> Callable[[str], bytes]:
+        """
+        Returns a function that returns the serialization of the
+        `ILStringTag` of a key or value. The serializations are cached by
+        this instance until the keys and values are removed or replaced.
+        """
+        cache = self._encoded_values
+        if cache is None or len(cache) > 2 * len(self._values) + 16:
+            # Discards the strings that were replaced
+            cache = self._encoded_values = {}
+        return _cached_string_encoder(cache)
+
+    def _forget_encoded(self, *strings: str):
+        """
+        Removes the given strings from the cache of serializations.
+        """
+        cache = self._encoded_values
+        if cache is not None:
+            for s in strings:
+                cache.pop(s, None)
+
+    def __setitem__(self, key: str, value: str):
+        old = self._values.get(key)
+        super().__setitem__(key, value)
+        if old is not None and old != value:
+            self._forget_encoded(old)
+
+    def __delitem__(self, key: str):
+        old = self._values.get(key)
+        super().__delitem__(key)
+        self._forget_encoded(key, old)
+
+    def clear(self):
+        super().clear()
+        self._encoded_values = None
+
     def value_size(self) -> int:
         size = pyilint.ilint_size(len(self))
-        for key in self:
-            size += (ILStringTag.compute_string_tag_size(key) +
-                     ILStringTag.compute_string_tag_size(self[key]))
+        encode = self._value_encoder()
+        for key, value in self._values.items():
+            size += len(encode(key)) + len(encode(value))
         return size
 
     def deserialize_value(self, tag_factory: ILTagFactory, tag_size: int, reader: io.IOBase) -> None:
@@ -814,22 +1659,28 @@ class ILStringDictionaryTag(ILTag, RestrictDictMixin[str, str]):
             raise ILTagCorruptedError('Corrupted tag.')
         count, _ = pyilint.ilint_decode_from_stream(reader)
         self.clear()
-        for i in range(count):
-            key = tag_factory.deserialize(reader)
-            if not ILStringTag.is_standard_string(key):
-                raise ILTagCorruptedError(
-                    'Corrupted tag. One of the keys is not a string.')
-            value = tag_factory.deserialize(reader)
-            if not ILStringTag.is_standard_string(value):
-                raise ILTagCorruptedError(
-                    'Corrupted tag. One of the keys is not a string.')
-            self[key.value] = value.value
+        decode_key = _key_decoder(tag_factory)
+        items = []
+        try:
+            for i in range(count):
+                key = decode_key(_deserialize_key(reader))
+                value = ILStringTag.from_utf8(
+                    ILStringTag.deserialize_utf8_from_components(reader))
+                items.append((key, value))
+        except ValueError:
+            raise ILTagCorruptedError('Corrupted utf-8 string.')
+        self.update(items, False)
 
     def serialize_value(self, writer: io.IOBase) -> None:
         pyilint.ilint_encode_to_stream(len(self), writer)
-        for key in self:
-            ILStringTag.serialize_tag_from_components(key, writer)
-            ILStringTag.serialize_tag_from_components(self[key], writer)
+        encode = self._value_encoder()
+        for key, value in self._values.items():
+            writer.write(encode(key))
+            writer.write(encode(value))
+
+
+# Containers that reuse their children in ILStandardTagFactory.deserialize_into()
+_REUSED_CONTAINERS = (ILTagArrayTag, ILTagSequenceTag, ILDictionaryTag)
 
 
 class ILStandardTagFactory(ILTagFactory):
@@ -881,9 +1732,309 @@ class ILStandardTagFactory(ILTagFactory):
         ILTAG_STRDICT_ID: ILStringDictionaryTag
     }
 
-    def __init__(self, strict: bool = False) -> None:
+    # Classes known to report all changes to their values.
+    _ENCODED_CLASSES = frozenset(_CLASS_MAP.values()) | {ILRawTag}
+
+    # Maximum size in bytes of the keys kept by intern_key().
+    MAX_INTERNED_KEY_SIZE = 128
+
+    # Number of times a layout must be seen before it is learned.
+    ADAPTIVE_THRESHOLD = 3
+
+    # Maximum number of layouts learned by each factory.
+    MAX_ADAPTIVE_SHAPES = 8
+
+    # Maximum number of layouts counted before they are learned.
+    MAX_ADAPTIVE_CANDIDATES = 1024
+
+    # Number of dictionaries between two verifications of the hit ratio of
+    # the adaptive mode.
+    ADAPTIVE_WINDOW = 1024
+
+    # Minimum ratio of dictionaries decoded by the learned layouts in each
+    # window. The adaptive mode stops below it.
+    ADAPTIVE_MIN_HIT_RATIO = 0.5
+
+    # Values of the integer tags that have flyweight instances.
+    FLYWEIGHT_INT_VALUES = range(-128, 256)
+
+    # Flyweight instances indexed by tag id and encoded payload. The instances
+    # of ILTAG_ILINT64_ID are indexed by value. Created on first use.
+    _FLYWEIGHTS = None
+
+    def __init__(self, strict: bool = False, keep_encoded: bool = False, columnar: bool = False,
+                 flyweights: bool = False, spill_threshold: int = None,
+                 validate_utf8: bool = True, key_table_size: int = 4096,
+                 adaptive: bool = False) -> None:
+        """
+        Creates a new instance of this class.
+
+        Parameters:
+        - `strict`: If True, unknown tags are not accepted;
+        - `keep_encoded`: If True, the standard tags will keep a reference to their 
+          original encoded payload. It allows the serialization of unmodified tags 
+          to copy it instead of encoding the value again at the cost of some memory.
+          See `ILTag.encoded_value` for further details;
+        - `columnar`: If True, the elements of `ILTagArrayTag` are stored in an
+          `ILTagColumn` when all of them are implicit fixed-size numeric tags
+          with the same id. See `ILTagColumn` for further details;
+        - `flyweights`: If True, `ILNullTag`, `ILBoolTag` and the integer tags
+          with values in `FLYWEIGHT_INT_VALUES` are deserialized as shared
+          frozen instances instead of new ones. Any attempt to modify them
+          raises `ILTagStateError`. See `flyweight()` for further details;
+        - `spill_threshold`: If not None, the payloads of `ILRawTag` and
+          `ILByteArrayTag` larger than this number of bytes are copied into
+          temporary files instead of memory. See `FilePayload` for further
+          details. Other tags larger than it are deserialized directly from
+          the reader without loading their payloads into memory first. It is
+          ignored if the reader implements `read_view()`;
+        - `validate_utf8`: If False, the UTF-8 bytes of `ILStringTag` are not
+          verified during the deserialization. Invalid strings will raise
+          `ILTagCorruptedError` on the first access to their values instead;
+        - `key_table_size`: The maximum number of entries in the table used
+          to intern dictionary keys. See `intern_key()` for further details;
+        - `adaptive`: If True, the layouts of the top-level `ILDictionaryTag`s
+          seen at least `ADAPTIVE_THRESHOLD` times are learned and the
+          top-level dictionaries with the same layout are deserialized by
+          decoders generated for it. See `adaptive_shapes` for further
+          details. It is ignored if `flyweights` or `columnar` is True, if
+          there are sinks and for readers that implement `read_view()`, as
+          the generated decoders create neither flyweights, columns nor views;
+        """
         super().__init__(strict)
+        self.keep_encoded = keep_encoded
+        self.columnar = columnar
+        self.flyweights = flyweights
+        self.spill_threshold = spill_threshold
+        self.validate_utf8 = validate_utf8
+        self.key_table_size = key_table_size
+        self._keys = {}
         self._class_map = ILStandardTagFactory._CLASS_MAP.copy()
+        self._sinks = {}
+        # Number of payloads passed to the sinks.
+        self._sunk = 0
+        self.adaptive = adaptive
+        self.adaptive_hits = 0
+        self.adaptive_misses = 0
+        self._shapes = []
+        self._shape_counts = {}
+        self._adaptive_seen = 0
+        self._adaptive_window_hits = 0
+        self._adaptive_stopped = False
+        # Protects the learned layouts and the adaptive counters.
+        self._adaptive_lock = threading.Lock()
+        # Its attribute nested is True while the children of a top-level tag
+        # are deserialized by the current thread.
+        self._adaptive_local = threading.local()
+
+    @staticmethod
+    def _flyweight_tables() -> dict:
+        tables = ILStandardTagFactory._FLYWEIGHTS
+        if tables is None:
+            tables = {ILTAG_NULL_ID: {b'': ILNullTag().freeze()}}
+            tables[ILTAG_BOOL_ID] = {t.encoded_value: t for t in (
+                ILBoolTag(False).freeze(), ILBoolTag(True).freeze())}
+            for tag_id in range(ILTAG_INT8_ID, ILTAG_UINT64_ID + 1):
+                tag_class = ILStandardTagFactory._CLASS_MAP[tag_id]
+                table = {}
+                for v in ILStandardTagFactory.FLYWEIGHT_INT_VALUES:
+                    try:
+                        tag = tag_class(v).freeze()
+                    except ValueError:
+                        continue
+                    table[tag.encoded_value] = tag
+                tables[tag_id] = table
+            tables[ILTAG_ILINT64_ID] = [
+                ILILInt64Tag(v).freeze() for v in ILStandardTagFactory.FLYWEIGHT_INT_VALUES if v >= 0]
+            ILStandardTagFactory._FLYWEIGHTS = tables
+        return tables
+
+    @staticmethod
+    def flyweight(tag_id: int, value=None) -> ILTag:
+        """
+        Returns the shared frozen instance of an implicit tag with the given
+        value or None if there is no shared instance for it. Only `ILNullTag`,
+        `ILBoolTag` and the integer tags with values in `FLYWEIGHT_INT_VALUES`
+        have shared instances.
+
+        Parameters:
+        - `tag_id`: The tag id;
+        - `value`: The value of the tag. It is ignored by ILTAG_NULL_ID;
+        """
+        table = ILStandardTagFactory._flyweight_tables().get(tag_id)
+        if table is None:
+            return None
+        if tag_id == ILTAG_NULL_ID:
+            return table[b'']
+        if tag_id == ILTAG_BOOL_ID:
+            return table[b'\x01' if value else b'\x00']
+        if not isinstance(value, int) or value not in ILStandardTagFactory.FLYWEIGHT_INT_VALUES:
+            return None
+        if tag_id == ILTAG_ILINT64_ID:
+            return table[value] if value >= 0 else None
+        size = ILStandardTagFactory.ILTAG_IMPLICIT_SIZES[tag_id]
+        tag = table.get(value.to_bytes(size, 'big', signed=value < 0))
+        if tag is not None and tag.value == value:
+            return tag
+        return None
+
+    def _deserialize_flyweight(self, tag_id: int, reader: io.IOBase) -> ILTag:
+        """
+        Deserializes the payload of an implicit tag as a flyweight instance if
+        possible. Returns None if `tag_id` has no flyweight instances.
+        """
+        tables = ILStandardTagFactory._flyweight_tables()
+        table = tables.get(tag_id)
+        if table is None:
+            return None
+        if tag_id == ILTAG_ILINT64_ID:
+            value, _ = pyilint.ilint_decode_from_stream(reader)
+            if value < len(table):
+                return table[value]
+            return ILILInt64Tag(value)
+        tag_size = ILStandardTagFactory.ILTAG_IMPLICIT_SIZES[tag_id]
+        value = read_bytes(tag_size, reader)
+        tag = table.get(value)
+        if tag is None:
+            tag = self.create(tag_id)
+            tag.deserialize_value(self, tag_size, io.BytesIO(value))
+        return tag
+
+    def _deserialize_sink(self, tag: ILTag, tag_size: int, reader: io.IOBase) -> ILTag:
+        """
+        Passes the payload to the sink registered for the tag id.
+        """
+        sink, chunk_size = self._sinks[tag.id]
+        if tag.__class__.deserialize_value is not ILRawTag.deserialize_value:
+            tag = ILRawTag(tag.id)
+        read_view = getattr(reader, 'read_view', None)
+
+        def chunks():
+            remaining = tag_size
+            while remaining > 0:
+                n = min(remaining, chunk_size)
+                if read_view is not None:
+                    yield read_view(n)
+                else:
+                    yield read_bytes(n, reader)
+                remaining -= n
+        payload = chunks()
+        self._sunk += 1
+        value = sink(tag, tag_size, payload)
+        # Skips the chunks not consumed by the sink
+        for _ in payload:
+            pass
+        tag.value = value
+        return tag
+
+    def _deserialize_spilled(self, tag: ILTag, tag_size: int, reader: io.IOBase, tag_offset: int) -> None:
+        """
+        Deserializes a payload larger than `spill_threshold`.
+        """
+        if tag.__class__ in (ILRawTag, ILByteArrayTag):
+            tag.value = FilePayload.spill(reader, tag_size)
+            return
+        value_reader = LimitedReaderWrapper(reader, tag_size)
+        tag.deserialize_value(self, tag_size, value_reader)
+        if value_reader.remaining != 0:
+            raise ILTagCorruptedError(
+                f'The tag at {tag_offset} with id {tag.id} and size {tag_size} could not be deserialized by the class {tag.__class__}. {value_reader.remaining} bytes were not used.')
+
+    @property
+    def adaptive_shapes(self) -> list:
+        """
+        The schemas of the layouts learned in the adaptive mode, the most
+        recently used first. `adaptive_hits` and `adaptive_misses` count the
+        top-level `ILDictionaryTag`s deserialized with and without the
+        decoders of these layouts since the first one was learned.
+
+        The adaptive mode stops by itself if less than `ADAPTIVE_MIN_HIT_RATIO`
+        of the dictionaries of a window of `ADAPTIVE_WINDOW` dictionaries are
+        deserialized by these decoders. `reset_adaptive()` restarts it.
+        """
+        return [schema for schema, _ in self._shapes]
+
+    def reset_adaptive(self) -> None:
+        """
+        Discards the learned layouts, resets the adaptive counters and
+        restarts the adaptive mode if it has stopped.
+        """
+        with self._adaptive_lock:
+            self._shapes = []
+            self._shape_counts = {}
+            self.adaptive_hits = 0
+            self.adaptive_misses = 0
+            self._adaptive_seen = 0
+            self._adaptive_window_hits = 0
+            self._adaptive_stopped = False
+
+    def _deserialize_shaped(self, value) -> ILTag:
+        """
+        Deserializes the payload of an `ILDictionaryTag` with the decoders
+        of the learned layouts. Returns None if none of them matches.
+        """
+        shapes = self._shapes
+        tag = None
+        if shapes:
+            for i, (schema, decode) in enumerate(shapes):
+                tag = decode(value)
+                if tag is not None:
+                    break
+        with self._adaptive_lock:
+            self._adaptive_seen += 1
+            if tag is not None:
+                if i > 0 and shapes is self._shapes:
+                    self._shapes = [shapes[i]] + shapes[:i] + shapes[i + 1:]
+                self.adaptive_hits += 1
+                self._adaptive_window_hits += 1
+            elif shapes:
+                self.adaptive_misses += 1
+            if self._adaptive_seen >= ILStandardTagFactory.ADAPTIVE_WINDOW:
+                if (self._adaptive_window_hits < ILStandardTagFactory.ADAPTIVE_WINDOW *
+                        ILStandardTagFactory.ADAPTIVE_MIN_HIT_RATIO):
+                    self._adaptive_stopped = True
+                self._adaptive_seen = 0
+                self._adaptive_window_hits = 0
+        return tag
+
+    def _learn_shape(self, tag: ILTag) -> None:
+        """
+        Counts the layout of a deserialized `ILDictionaryTag` and generates
+        its decoder once it is seen `ADAPTIVE_THRESHOLD` times. The layouts
+        are counted by the keys and ids of the direct children, thus the
+        whole tree is inspected only when a layout is about to be learned.
+        """
+        if len(self._shapes) >= ILStandardTagFactory.MAX_ADAPTIVE_SHAPES:
+            return
+        key = tuple([(k, v.id) for k, v in tag._values.items()])
+        with self._adaptive_lock:
+            self._count_shape(key, tag)
+
+    def _count_shape(self, key: tuple, tag: ILTag) -> None:
+        """
+        Counts a layout and learns it if needed. It must be called with
+        `_adaptive_lock` held.
+        """
+        if len(self._shapes) >= ILStandardTagFactory.MAX_ADAPTIVE_SHAPES:
+            return
+        counts = self._shape_counts
+        count = counts.get(key, 0)
+        if count is None:
+            # Known to have no schema
+            return
+        count += 1
+        if count < ILStandardTagFactory.ADAPTIVE_THRESHOLD:
+            if len(counts) >= ILStandardTagFactory.MAX_ADAPTIVE_CANDIDATES:
+                counts.clear()
+            counts[key] = count
+            return
+        from .schema import infer_schema
+        schema = infer_schema(tag)
+        if schema is None or schema in self.adaptive_shapes:
+            counts[key] = None
+            return
+        counts.pop(key, None)
+        self._shapes = [(schema, schema.compile_tag_decoder())] + self._shapes
 
     def create(self, id: int) -> 'ILTag':
         if id in self._class_map:
@@ -892,36 +2043,239 @@ class ILStandardTagFactory(ILTagFactory):
             return None
 
     def deserialize(self, reader: io.IOBase) -> 'ILTag':
+        if (not self.adaptive or self._adaptive_stopped or self.flyweights or
+                self.columnar or self._sinks or hasattr(reader, 'read_view')):
+            return self._deserialize(reader, None, None)
+        local = self._adaptive_local
+        if getattr(local, 'nested', False):
+            return self._deserialize(reader, None, None)
+        # Only the top-level tags use the adaptive mode
+        local.nested = True
+        try:
+            return self._deserialize(reader, None, None, True)
+        finally:
+            local.nested = False
+
+    def deserialize_into(self, reader: io.IOBase, tag: ILTag) -> ILTag:
+        """
+        Deserializes a tag from the reader reusing `tag` and the tags inside
+        it whenever their ids match the ids of the deserialized tags. Reused
+        tags get their values overwritten in place, containers keep their
+        lists and dictionaries and only the tags that do not match are
+        replaced by new ones. It allows the deserialization of a stream of
+        tags with the same shape without the creation of new trees. This
+        method is thread safe as long as `tag` is not used by other threads.
+
+        Frozen tags and instances of classes other than the ones created by
+        this factory are never reused.
+
+        Returns `tag` if it was reused or a new tag otherwise.
+
+        Parameters:
+        - `reader`: The reader;
+        - `tag`: The tag to be reused. It may be None;
+        """
+        return self._deserialize(reader, tag, set())
+
+    def _reusable(self, tag: ILTag, tag_id: int, reused: set) -> bool:
+        """
+        Returns True if `tag` can be reused to deserialize a tag with the
+        given id.
+        """
+        if tag.id != tag_id or id(tag) in reused or tag_id in self._sinks:
+            return False
+        # Frozen tags have their own classes.
+        cls = tag.__class__
+        if cls not in ILStandardTagFactory._ENCODED_CLASSES:
+            return False
+        tag_type = self._class_map.get(tag_id)
+        return tag_type is cls or (tag_type is None and cls is ILRawTag)
+
+    def _deserialize_children_into(self, tag: ILTag, tag_size: int, reader: io.IOBase, reused: set) -> None:
+        """
+        Deserializes the payload of a container created by this factory
+        reusing its children.
+        """
+        tag._before_change()
+        tag._own_all()
+        values = tag._values
+        cls = tag.__class__
+        if cls is ILDictionaryTag:
+            count, _ = pyilint.ilint_decode_from_stream(reader)
+            decode_key = _key_decoder(self)
+            items = []
+            for i in range(count):
+                key = decode_key(_deserialize_key(reader))
+                items.append((key, self._deserialize(
+                    reader, values.get(key), reused)))
+            if len(values) != len(items) or any(
+                    k != item[0] for k, item in zip(values, items)):
+                values.clear()
+            values.update(items)
+            return
+        if values.__class__ is not list:
+            values = tag._values = []
+        children = []
+        if cls is ILTagSequenceTag:
+            while reader.tell() < tag_size:
+                old = values[len(children)] if len(children) < len(values) else None
+                children.append(self._deserialize(reader, old, reused))
+        else:
+            if tag_size < 1:
+                raise ILTagCorruptedError('Corrupted tag.')
+            count, _ = pyilint.ilint_decode_from_stream(reader)
+            for i in range(count):
+                old = values[i] if i < len(values) else None
+                children.append(self._deserialize(reader, old, reused))
+        values[:] = children
+
+    def _deserialize(self, reader: io.IOBase, existing: ILTag, reused: set,
+                     adaptive: bool = False) -> ILTag:
+        """
+        Deserializes a tag from the reader. If `reused` is not None, it
+        reuses `existing` if possible and registers the ids of the reused
+        tags in `reused`. If `adaptive` is True, an `ILDictionaryTag` is
+        deserialized with the adaptive mode.
+        """
         tag_offset = reader.tell()
         try:
             tag_id, _ = pyilint.ilint_decode_from_stream(reader)
-            tag = self.create(tag_id)
-            if tag is None:
-                if self.strict or iltags_is_implicit(tag_id):
-                    raise ILTagUnknownError(
-                        f'Unknown tag with id {id} at {tag_offset}.')
-                else:
-                    tag = ILRawTag(tag_id)
+            if existing is not None and self._reusable(existing, tag_id, reused):
+                tag = existing
+                reused.add(id(tag))
+            else:
+                reused = None
+                if self.flyweights and tag_id < 16:
+                    tag = self._deserialize_flyweight(tag_id, reader)
+                    if tag is not None:
+                        return tag
+                tag = self.create(tag_id)
+                if tag is None:
+                    if (self.strict and tag_id not in self._sinks) or iltags_is_implicit(tag_id):
+                        raise ILTagUnknownError(
+                            f'Unknown tag with id {tag_id} at {tag_offset}.')
+                    else:
+                        tag = ILRawTag(tag_id)
 
             if iltags_is_implicit(tag_id):
                 tag_size = ILStandardTagFactory.ILTAG_IMPLICIT_SIZES[tag_id]
             else:
                 tag_size, _ = pyilint.ilint_decode_from_stream(reader)
 
+            if tag_id in self._sinks:
+                return self._deserialize_sink(tag, tag_size, reader)
+            read_view = getattr(reader, 'read_view', None)
             if tag_id == ILTAG_ILINT64_ID:
                 tag.deserialize_value(self, tag_size, reader)
+            elif (read_view is None and self.spill_threshold is not None and
+                    tag_size > self.spill_threshold):
+                self._deserialize_spilled(tag, tag_size, reader, tag_offset)
             else:
-                value_reader = io.BytesIO(read_bytes(tag_size, reader))
-                tag.deserialize_value(self, tag_size, value_reader)
+                learn = False
+                sunk = self._sunk
+                if read_view is not None:
+                    value = read_view(tag_size)
+                    value_reader = MemoryReader(value)
+                else:
+                    value = read_bytes(tag_size, reader)
+                    value_reader = io.BytesIO(value)
+                if (self.columnar and tag.__class__ is ILTagArrayTag and
+                        tag.deserialize_column(value)):
+                    value_reader.seek(tag_size)
+                elif reused is not None and tag.__class__ in _REUSED_CONTAINERS:
+                    self._deserialize_children_into(
+                        tag, tag_size, value_reader, reused)
+                elif adaptive and tag.__class__ is ILDictionaryTag:
+                    shaped = self._deserialize_shaped(value)
+                    if shaped is None:
+                        tag.deserialize_value(self, tag_size, value_reader)
+                        learn = True
+                    else:
+                        tag = shaped
+                        value_reader.seek(tag_size)
+                else:
+                    tag.deserialize_value(self, tag_size, value_reader)
                 left_behind = tag_size - value_reader.tell()
                 if left_behind != 0:
                     raise ILTagCorruptedError(
                         f'The tag at {tag_offset} with id {tag_id} and size {tag_size} could not be deserialized by the class {tag.__class__}. {left_behind} bytes were not used.')
+                # The payload of a child passed to a sink is not its value
+                if (self.keep_encoded and tag_id >= 16 and sunk == self._sunk and
+                        tag.__class__ in ILStandardTagFactory._ENCODED_CLASSES):
+                    tag.set_encoded_value(value)
+                if learn:
+                    self._learn_shape(tag)
             return tag
         except (ValueError, EOFError):
             raise ILTagCorruptedError(
                 f'Corrupted tag at {tag_offset}.')
 
+    def intern_key(self, utf8: bytes) -> str:
+        """
+        Converts the UTF-8 bytes of a dictionary key into an interned string.
+        The strings are kept in a table indexed by their UTF-8 bytes, thus
+        the keys of dictionaries decoded by this factory share the same string
+        instances and are decoded only once. Keys longer than
+        `MAX_INTERNED_KEY_SIZE` bytes and new keys after the table reaches
+        `key_table_size` entries are neither interned nor kept in the table.
+
+        It raises `ILTagCorruptedError` if `utf8` is not a valid UTF-8 string.
+
+        Parameters:
+        - `utf8`: The UTF-8 bytes of the key;
+        """
+        key = self._keys.get(utf8)
+        if key is None:
+            key = _decode_key(utf8)
+            if (len(self._keys) < self.key_table_size and
+                    len(utf8) <= ILStandardTagFactory.MAX_INTERNED_KEY_SIZE):
+                key = sys.intern(key)
+                self._keys[utf8] = key
+        return key
+
+    def register_sink(self, id: int, sink: Callable, chunk_size: int = COPY_CHUNK_SIZE):
+        """
+        Registers a sink that consumes the payloads of the tags with the given
+        id while they are read, instead of collecting them into memory. This
+        method is not thread safe.
+
+        The sink is called as `sink(tag, size, chunks)` for each tag, where
+        `tag` is the new tag, `size` is the size of its payload and `chunks`
+        is an iterator over the payload in chunks of at most `chunk_size`
+        bytes. The chunks are `memoryview` slices if the reader implements
+        `read_view()`. Chunks not consumed by the sink are skipped. The value
+        returned by the sink, such as a `FilePayload` with a copy of the
+        payload, becomes the value of the tag. If it is None, the tag gets its
+        default value.
+
+        The tag is created by this factory if its class stores the payload as
+        is, like `ILRawTag` and `ILByteArrayTag`, otherwise an `ILRawTag` is
+        used. Tags with a sink are never rejected as unknown. With
+        `keep_encoded`, the original payloads of the containers of these tags
+        are not kept, as they do not match their values anymore.
+
+        The payload of a container is usually read into memory before its
+        children are deserialized, thus sinks bound the memory used by tags
+        nested inside containers only if the reader implements `read_view()`
+        or if the containers are larger than `spill_threshold`, which makes
+        them be deserialized directly from the reader.
+
+        Parameters:
+        - `id`: The tag id. It cannot be an id for an implicit tag;
+        - `sink`: The sink or None to remove the current sink;
+        - `chunk_size`: The maximum size of the chunks;
+        """
+        if iltags_is_implicit(id):
+            raise ValueError(
+                'It is not possible to register a sink for an implicit tag.')
+        if chunk_size < 1:
+            raise ValueError('The chunk size must be positive.')
+        if sink is None:
+            self._sinks.pop(id, None)
+        else:
+            self._sinks[id] = (sink, chunk_size)
+        self.reset_adaptive()
+
     def register_custom(self, id: int, tag_type):
         """
         Register a custom class to parse a given tag id. This method is not thread safe.
@@ -944,6 +2298,121 @@ class ILStandardTagFactory(ILTagFactory):
                     raise TypeError(
                         'The function or constructor must return an instance of ILTag.')
                 self._class_map[id] = tag_type
+                self.reset_adaptive()
             else:
                 raise TypeError(
                     'The function or constructor must return an instance of ILTag.')
+
+
+class ILCachingTagFactory(ILTagFactory):
+    """
+    This class wraps another tag factory and keeps the most recently
+    deserialized tags indexed by their serializations. Deserializing a tag
+    that is already in the cache costs only a copy of its serialization and
+    a dictionary lookup. It is useful when the same small tags are received
+    many times.
+
+    Entries are compared by their whole serializations, thus different tags
+    are never confused. Only explicit tags with payloads up to
+    `max_tag_size` bytes are cached, all other tags are deserialized by the
+    wrapped factory directly. Readers must be seekable.
+    """
+
+    def __init__(self, factory: ILTagFactory, max_entries: int = 1024,
+                 max_tag_size: int = 4096, frozen: bool = True) -> None:
+        """
+        Creates a new instance of this class.
+
+        Parameters:
+        - `factory`: The factory used to deserialize the tags;
+        - `max_entries`: The maximum number of tags in the cache. The least
+          recently used ones are discarded first;
+        - `max_tag_size`: The maximum size of the payload of the cached tags;
+        - `frozen`: If True, all deserializations of the same tag return the
+          same frozen instance. Otherwise they return new deep copies of the
+          cached tag that share nothing with it or with each other;
+        """
+        if max_entries < 1:
+            raise ValueError('The maximum number of entries must be positive.')
+        super().__init__(factory.strict)
+        self.factory = factory
+        self.max_entries = max_entries
+        self.max_tag_size = max_tag_size
+        self.frozen = frozen
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        """
+        Removes all tags from the cache and resets the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def create(self, id: int) -> 'ILTag':
+        return self.factory.create(id)
+
+    def deserialize(self, reader: io.IOBase) -> 'ILTag':
+        tag_offset = reader.tell()
+        try:
+            tag_id, _ = pyilint.ilint_decode_from_stream(reader)
+            if not iltags_is_implicit(tag_id):
+                tag_size, _ = pyilint.ilint_decode_from_stream(reader)
+        except (ValueError, EOFError):
+            raise ILTagCorruptedError(f'Corrupted tag at {tag_offset}.')
+        if iltags_is_implicit(tag_id) or tag_size > self.max_tag_size:
+            reader.seek(tag_offset)
+            return self.factory.deserialize(reader)
+
+        serialized = bytearray()
+        pyilint.ilint_encode(tag_id, serialized)
+        pyilint.ilint_encode(tag_size, serialized)
+        try:
+            serialized += read_bytes(tag_size, reader)
+        except EOFError:
+            raise ILTagCorruptedError(f'Corrupted tag at {tag_offset}.')
+        serialized = bytes(serialized)
+
+        entries = self._entries
+        with self._lock:
+            tag = entries.get(serialized)
+            if tag is not None:
+                entries.move_to_end(serialized)
+                self.hits += 1
+                return tag if self.frozen else self._deep_copy(tag)
+            self.misses += 1
+        # The values have the same types returned by the wrapped factory and
+        # hold no views of the caller's buffer
+        tag = self.factory.deserialize(io.BytesIO(serialized))
+        if self.frozen:
+            tag.freeze()
+        with self._lock:
+            entries[serialized] = tag
+            if len(entries) > self.max_entries:
+                entries.popitem(last=False)
+        return tag if self.frozen else self._deep_copy(tag)
+
+    @staticmethod
+    def _deep_copy(tag: ILTag) -> ILTag:
+        """
+        Returns a copy of the given tag whose children are all private copies.
+        The cached tag itself is only read, thus it is never changed by the
+        returned copy.
+        """
+        ret = tag.copy()
+        stack = [ret]
+        while stack:
+            t = stack.pop()
+            if iltags_is_container(t.__class__):
+                t._own_children()
+                stack.extend(t.value_children())
+            elif isinstance(t, (RestrictListMixin, RestrictDictMixin)):
+                t._own_all()
+        return ret
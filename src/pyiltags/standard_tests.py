@@ -31,9 +31,19 @@
 from io import SEEK_END
 from typing import Callable, Type
 import codecs
+import hashlib
 import unittest
 import random
+import sys
+import threading
+import unittest.mock
 from .standard import *
+from . import standard
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 # Text example extracted from O Alienista by Machado de Assis.
 STRING_SAMPLES = """
@@ -158,6 +168,36 @@ class TestILTagIds(unittest.TestCase):
         self.assertEqual(ILTAG_STRDICT_ID, 31)
 
 
+class TestSlots(unittest.TestCase):
+
+    def test_no_dict(self):
+        for tag in BASIC_TAG_SAMPLES:
+            if not isinstance(tag, (RestrictListMixin, RestrictDictMixin)):
+                self.assertFalse(hasattr(tag, '__dict__'), tag.__class__)
+                with self.assertRaises(AttributeError):
+                    tag.unknown_attribute = 1
+
+    def test_custom_subclass(self):
+        class CustomTag(ILUInt8Tag):
+            def __init__(self, value: int = 0) -> None:
+                super().__init__(value, 1234)
+                self.extra = 'extra'
+
+        t = CustomTag(12)
+        self.assertEqual(1234, t.id)
+        self.assertEqual(12, t.value)
+        self.assertEqual('extra', t.extra)
+        writer = io.BytesIO()
+        t.serialize(writer)
+        t2 = CustomTag()
+        writer.seek(4)
+        t2.deserialize_value(None, 1, writer)
+        self.assertEqual(12, t2.value)
+        t.freeze()
+        self.assertTrue(t.frozen)
+        self.assertEqual('extra', t.extra)
+
+
 class TestILNullTag(unittest.TestCase):
 
     def test_contructor(self):
@@ -596,6 +636,52 @@ class TestILStringTag(unittest.TestCase):
         self.assertRaises(ILTagCorruptedError, t.deserialize_value,
                           None, 3, io.BytesIO(b'\xF0\x90\x8D'))
 
+    def test_lazy_value(self):
+        sample = 'Blade Runner - O Caçador de Andróides'
+        sample_utf8 = codecs.encode(sample, 'utf-8')
+        # ASCII strings are verified without decoding them, the others keep
+        # the string decoded by the verification
+        for utf8, decoded in [(sample_utf8, sample), (b'abc', None)]:
+            t = ILStringTag()
+            t.deserialize_value(None, len(utf8), io.BytesIO(utf8))
+            self.assertEqual(decoded, t._value)
+            self.assertEqual(len(utf8), t.value_size())
+            writer = io.BytesIO()
+            t.serialize_value(writer)
+            self.assertEqual(utf8, writer.getvalue())
+            self.assertEqual(decoded, t._value)
+            self.assertEqual(utf8.decode('utf-8'), t.value)
+            self.assertIs(t.value, t.value)
+
+            t = ILStringTag()
+            t.utf8 = bytearray(utf8)
+            self.assertEqual(decoded, t._value)
+            self.assertEqual(utf8, t.utf8)
+            self.assertIsInstance(t.utf8, bytes)
+            self.assertEqual(utf8.decode('utf-8'), t.value)
+
+        # Validation may be skipped by the factory
+        f = ILStandardTagFactory(validate_utf8=False)
+        self.assertFalse(f.validate_utf8)
+        t = ILStringTag()
+        t.deserialize_value(f, 3, io.BytesIO(b'\xF0\x90\x8D'))
+        self.assertEqual(b'\xF0\x90\x8D', t.utf8)
+        with self.assertRaises(ILTagCorruptedError):
+            t.value
+        self.assertRaises(ILTagCorruptedError, t.deserialize_value,
+                          ILStandardTagFactory(), 3, io.BytesIO(b'\xF0\x90\x8D'))
+        t.deserialize_value(f, len(sample_utf8), io.BytesIO(sample_utf8))
+        self.assertIsNone(t._value)
+        self.assertEqual(sample, t.value)
+
+    def test_assert_utf8(self):
+        self.assertIsNone(ILStringTag.assert_utf8(b''))
+        self.assertIsNone(ILStringTag.assert_utf8(b'abc'))
+        self.assertEqual('Andróides', ILStringTag.assert_utf8(
+            codecs.encode('Andróides', 'utf-8')))
+        for v in [b'\xF0\x90\x8D', b'abc\xFF']:
+            self.assertRaises(ValueError, ILStringTag.assert_utf8, v)
+
     def test_serialize_value(self):
         t = ILStringTag()
 
@@ -669,6 +755,34 @@ class TestILStringTag(unittest.TestCase):
             writer.seek(0)
             self.assertEqual(exp.read(), writer.read())
 
+    def test_encode_tag_from_components(self):
+        for s in STRING_SAMPLES:
+            for id in (ILTAG_STRING_ID, 0xFFFFFFFF):
+                writer = io.BytesIO()
+                ILStringTag(s, id).serialize(writer)
+                encoded = ILStringTag.encode_tag_from_components(s, id)
+                self.assertIsInstance(encoded, bytes)
+                self.assertEqual(writer.getvalue(), encoded)
+
+    def test_deserialize_utf8_from_components(self):
+        writer = io.BytesIO()
+        ILStringTag.serialize_tag_from_components('abc', writer)
+        ILStringTag.serialize_tag_from_components('', writer)
+        ILStringTag.serialize_tag_from_components('xyz', writer, 1234)
+        ILNullTag().serialize(writer)
+        reader = io.BytesIO(writer.getvalue())
+        self.assertEqual(b'abc', ILStringTag.deserialize_utf8_from_components(reader))
+        self.assertEqual(b'', ILStringTag.deserialize_utf8_from_components(reader))
+        self.assertRaises(ILTagCorruptedError,
+                          ILStringTag.deserialize_utf8_from_components, reader)
+        reader.seek(7)
+        self.assertEqual(b'xyz', ILStringTag.deserialize_utf8_from_components(
+            reader, 1234))
+        self.assertRaises(ILTagCorruptedError,
+                          ILStringTag.deserialize_utf8_from_components, reader)
+        self.assertRaises(ILTagCorruptedError, ILStringTag.deserialize_utf8_from_components,
+                          io.BytesIO(writer.getvalue()[:3]))
+
     def test_is_standard_string(self):
         self.assertTrue(ILStringTag.is_standard_string(ILStringTag()))
 
@@ -875,6 +989,105 @@ class TestILIntArrayTag(unittest.TestCase):
             writer.seek(0)
             self.assertEqual(reader.read(), writer.read())
 
+    def test_storage(self):
+        t = ILIntArrayTag([1, 2, 2**64 - 1])
+        self.assertIsInstance(t._values, array.array)
+        self.assertEqual(8, t._values.itemsize)
+        self.assertEqual([1, 2, 2**64 - 1], t[:])
+        self.assertEqual('[1, 2, 18446744073709551615]', repr(t))
+
+        t[1] = 5
+        self.assertEqual(5, t[1])
+        self.assertRaises(ValueError, t.__setitem__, 1, -1)
+        self.assertRaises(TypeError, t.__setitem__, 1, 1.0)
+        self.assertEqual(t.pop(), 2**64 - 1)
+        t.clear()
+        self.assertEqual(0, len(t))
+
+    def test_append(self):
+        t = ILIntArrayTag()
+        t.append(0)
+        t.append(2**64 - 1)
+        self.assertRaises(ValueError, t.append, -1)
+        self.assertRaises(ValueError, t.append, 2**64)
+        self.assertRaises(TypeError, t.append, '')
+        self.assertRaises(TypeError, t.append, 1.0)
+        self.assertEqual([0, 2**64 - 1], t[:])
+
+    def test_extend(self):
+        t = ILIntArrayTag()
+        t.extend([1, 2])
+        t.extend((3, 4))
+        t.extend(range(5, 7))
+        t.extend(array.array('B', [7]))
+        t.extend(array.array('Q', [8]))
+        t.extend(i for i in [9])
+        self.assertEqual(list(range(1, 10)), t[:])
+
+        # Invalid values leave the tag unchanged
+        self.assertRaises(ValueError, t.extend, [10, -1])
+        self.assertRaises(ValueError, t.extend, [10, 2**64])
+        self.assertRaises(ValueError, t.extend, array.array('b', [-1]))
+        self.assertRaises(TypeError, t.extend, [10, 1.0])
+        self.assertRaises(TypeError, t.extend, array.array('d', [1.0]))
+        self.assertEqual(list(range(1, 10)), t[:])
+
+        # Without validation
+        t.extend([10, 11], False)
+        t.extend((12,), False)
+        self.assertEqual(list(range(1, 13)), t[:])
+
+        t = ILOIDTag(range(3))
+        self.assertEqual(ILTAG_OID_ID, t.id)
+        self.assertEqual([0, 1, 2], t[:])
+
+    def test_bulk_operations(self):
+        t = ILIntArrayTag([5, 1, 4])
+        t.insert(1, 3)
+        self.assertRaises(ValueError, t.insert, 0, -1)
+        self.assertRaises(TypeError, t.insert, 0, 1.0)
+        self.assertEqual([5, 3, 1, 4], t[:])
+        t.sort()
+        self.assertEqual([1, 3, 4, 5], t[:])
+        t.sort(reverse=True)
+        self.assertEqual([5, 4, 3, 1], t[:])
+        self.assertIsInstance(t._values, array.array)
+        t[1:3] = [10, 11, 12]
+        self.assertEqual([5, 10, 11, 12, 1], t[:])
+        self.assertRaises(ValueError, t.__setitem__, slice(0, 1), [-1])
+        del t[1:4]
+        self.assertEqual([5, 1], t[:])
+
+    @unittest.skipIf(numpy is None, 'NumPy is not available.')
+    def test_extend_numpy(self):
+        t = ILIntArrayTag(numpy.arange(4, dtype=numpy.uint64))
+        t.extend(numpy.array([4, 5], dtype=numpy.int32))
+        t.extend(numpy.array([2**64 - 1], dtype=numpy.uint64))
+        t.extend(numpy.arange(0, 8, 2, dtype=numpy.uint16)[::2])
+        self.assertEqual([0, 1, 2, 3, 4, 5, 2**64 - 1, 0, 4], t[:])
+        self.assertRaises(ValueError, t.extend,
+                          numpy.array([1, -1], dtype=numpy.int64))
+        self.assertRaises(TypeError, t.extend,
+                          numpy.array([1.0], dtype=numpy.float64))
+        self.assertEqual(9, len(t))
+
+    def test_deserialize_value_corrupted(self):
+        t = ILIntArrayTag()
+        for serialized in [b'\x02\x01', b'\x01\x01\x01', b'\x01\xF9\x00\x01',
+                           b'\xF8']:
+            self.assertRaises(ILTagCorruptedError, t.deserialize_value, None,
+                              len(serialized), io.BytesIO(serialized))
+
+    def test_deserialize_large(self):
+        values = list(range(0, 2**64, 2**50))
+        t = ILIntArrayTag(values)
+        writer = io.BytesIO()
+        t.serialize(writer)
+        writer.seek(0)
+        d = ILStandardTagFactory().deserialize(writer)
+        self.assertIsInstance(d._values, array.array)
+        self.assertEqual(values, d[:])
+
 
 class ILTagComparatorMixin:
     def assertILTagEqual(self, a: ILTag, b: ILTag):
@@ -918,6 +1131,16 @@ class TestILTagArrayTag(unittest.TestCase, ILTagComparatorMixin):
         self.assertRaises(TypeError, t.assert_value_type, 1.0)
         self.assertRaises(TypeError, t.assert_value_type, [])
 
+    def test_assert_values_type(self):
+        for t in [ILTagArrayTag(), ILTagSequenceTag()]:
+            t.assert_values_type(BASIC_TAG_SAMPLES)
+            self.assertRaises(TypeError, t.assert_values_type,
+                              BASIC_TAG_SAMPLES + [1])
+            self.assertRaises(TypeError, t.__class__, BASIC_TAG_SAMPLES + [1])
+            t.extend(BASIC_TAG_SAMPLES)
+            self.assertRaises(TypeError, t.extend, [ILNullTag(), None])
+            self.assertEqual(len(BASIC_TAG_SAMPLES), len(t))
+
     def test_value_size(self):
 
         t = ILTagArrayTag()
@@ -976,6 +1199,270 @@ class TestILTagArrayTag(unittest.TestCase, ILTagComparatorMixin):
             self.assertEqual(exp.read(), writer.read())
 
 
+    def test_serialize_deep(self):
+        depth = sys.getrecursionlimit() * 2
+        leaf = ILUInt8Tag(1)
+        exp = b'\x03\x01'
+        tag = leaf
+        for i in range(depth):
+            payload = io.BytesIO()
+            if i % 3 == 0:
+                tag = ILTagArrayTag([tag, leaf])
+                pyilint.ilint_encode_to_stream(2, payload)
+                payload.write(exp)
+                payload.write(b'\x03\x01')
+            elif i % 3 == 1:
+                tag = ILTagSequenceTag([tag])
+                payload.write(exp)
+            else:
+                d = ILDictionaryTag()
+                d['k'] = tag
+                tag = d
+                pyilint.ilint_encode_to_stream(1, payload)
+                ILStringTag.serialize_tag_from_components('k', payload)
+                payload.write(exp)
+            header = io.BytesIO()
+            pyilint.ilint_encode_to_stream(tag.id, header)
+            pyilint.ilint_encode_to_stream(payload.tell(), header)
+            exp = header.getvalue() + payload.getvalue()
+
+        writer = io.BytesIO()
+        tag.serialize(writer)
+        self.assertEqual(exp, writer.getvalue())
+        self.assertEqual(len(exp), writer.tell())
+
+
+class TestILTagColumn(unittest.TestCase, ILTagComparatorMixin):
+
+    SAMPLES = [
+        (ILInt8Tag, [-128, 0, 127]),
+        (ILUInt8Tag, [0, 1, 255]),
+        (ILInt16Tag, [-32768, 1, 32767]),
+        (ILUInt16Tag, [0, 1, 65535]),
+        (ILInt32Tag, [-2**31, 1, 2**31 - 1]),
+        (ILUInt32Tag, [0, 1, 2**32 - 1]),
+        (ILInt64Tag, [-2**63, 1, 2**63 - 1]),
+        (ILUInt64Tag, [0, 1, 2**64 - 1]),
+        (ILBinary32Tag, [-1.5, 0.0, 2.25]),
+        (ILBinary64Tag, [-1.5, 0.0, 1e300]),
+    ]
+
+    def test_constructor(self):
+        c = ILTagColumn(ILTAG_INT16_ID, [1, 2, 3])
+        self.assertEqual(ILTAG_INT16_ID, c.tag_id)
+        self.assertEqual(3, c.element_size)
+        self.assertEqual(3, len(c))
+        self.assertEqual([1, 2, 3], c.values.tolist())
+        self.assertRaises(ValueError, ILTagColumn, ILTAG_INT16_ID, [2**15])
+        self.assertRaises(ValueError, ILTagColumn, ILTAG_ILINT64_ID)
+        self.assertRaises(ValueError, ILTagColumn, ILTAG_STRING_ID)
+
+    def test_serialize(self):
+        for tag_class, values in self.SAMPLES:
+            exp = ILTagArrayTag([tag_class(v) for v in values])
+            t = ILTagArrayTag(ILTagColumn(exp[0].id, values))
+            self.assertIsNotNone(t.column)
+            self.assertEqual(exp.value_size(), t.value_size())
+            self.assertILTagEqual(exp, t)
+            w = io.BytesIO()
+            t.serialize(w)
+            self.assertEqual(exp.tag_size(), w.tell())
+
+    def test_from_payload(self):
+        for tag_class, values in self.SAMPLES:
+            exp = ILTagArrayTag([tag_class(v) for v in values])
+            w = io.BytesIO()
+            exp.serialize_value(w)
+            c = ILTagColumn.from_payload(w.getvalue())
+            self.assertEqual(exp[0].id, c.tag_id)
+            self.assertEqual(values, c.values.tolist())
+
+        # Not supported
+        for values in [[], [ILILInt64Tag(1)], [ILInt8Tag(1), ILUInt8Tag(1)],
+                       [ILInt8Tag(1), ILStringTag('a')], [ILStringTag('a')]]:
+            w = io.BytesIO()
+            ILTagArrayTag(values).serialize_value(w)
+            self.assertIsNone(ILTagColumn.from_payload(w.getvalue()))
+
+    def test_list_interface(self):
+        t = ILTagArrayTag(ILTagColumn(ILTAG_INT32_ID, [1, 2, 3]))
+        self.assertEqual(3, len(t))
+        e = t[1]
+        self.assertIsInstance(e, ILInt32Tag)
+        self.assertEqual(2, e.value)
+        self.assertTrue(e.frozen)
+        self.assertRaises(ILTagStateError, setattr, e, 'value', 5)
+        self.assertEqual([1, 2, 3], [e.value for e in t])
+        self.assertEqual([2, 3], [e.value for e in t[1:]])
+        self.assertIn(ILInt32Tag(3), t)
+        self.assertNotIn(ILInt32Tag(4), t)
+        self.assertNotIn(ILUInt32Tag(3), t)
+
+        t[0] = ILInt32Tag(10)
+        e = ILInt32Tag(4)
+        t.append(e)
+        # Only the value is stored
+        e.value = 5
+        self.assertEqual(4, t[3].value)
+        self.assertIsNot(e, t[3])
+        e = t.pop(0)
+        self.assertEqual(10, e.value)
+        self.assertTrue(e.frozen)
+        self.assertIsNotNone(t.column)
+        self.assertEqual([2, 3, 4], t.column.values.tolist())
+
+        # Other tags convert the column back into a list
+        t.append(ILStringTag('x'))
+        self.assertIsNone(t.column)
+        self.assertEqual(4, len(t))
+        self.assertFalse(t[0].frozen)
+        self.assertEqual('x', t[3].value)
+
+        t = ILTagArrayTag(ILTagColumn(ILTAG_INT32_ID, [1, 2, 3]))
+        t[1] = ILInt64Tag(5)
+        self.assertIsNone(t.column)
+        self.assertEqual(ILTAG_INT64_ID, t[1].id)
+
+        t = ILTagArrayTag(ILTagColumn(ILTAG_INT32_ID, [1, 2, 3]))
+        t.clear()
+        self.assertEqual(0, len(t))
+        self.assertEqual(1, t.value_size())
+
+    def test_without_numpy(self):
+        with unittest.mock.patch.object(standard, 'numpy', None):
+            self.test_serialize()
+            self.test_from_payload()
+
+    @unittest.skipIf(numpy is None, 'NumPy is not available.')
+    def test_numpy(self):
+        for tag_class, values in self.SAMPLES:
+            tag_id = tag_class().id
+            dtype = ILTagColumn.DTYPES[tag_id]
+            a = numpy.array(values, dtype)
+            t = ILTagArrayTag.from_numpy(a)
+            self.assertEqual(tag_id, t.column.tag_id)
+            self.assertEqual(values, t.column.values.tolist())
+            exp = ILTagArrayTag([tag_class(v) for v in values])
+            self.assertILTagEqual(exp, t)
+            self.assertTrue(numpy.array_equal(a, t.to_numpy()))
+            self.assertEqual(numpy.dtype(dtype), t.to_numpy().dtype)
+            # From the list representation
+            self.assertTrue(numpy.array_equal(a, exp.to_numpy()))
+
+        # Explicit tag id and non-contiguous input
+        t = ILTagArrayTag.from_numpy(
+            numpy.arange(10, dtype=numpy.int64)[::3], ILTAG_UINT8_ID, 1234)
+        self.assertEqual(1234, t.id)
+        self.assertEqual(ILTAG_UINT8_ID, t.column.tag_id)
+        self.assertEqual([0, 3, 6, 9], t.column.values.tolist())
+        t = ILTagArrayTag.from_numpy(numpy.array([1, 2], '>f8'))
+        self.assertEqual(ILTAG_BINARY64_ID, t.column.tag_id)
+        self.assertEqual([1.0, 2.0], t.column.values.tolist())
+
+        self.assertRaises(ValueError, ILTagArrayTag.from_numpy,
+                          numpy.array([256]), ILTAG_UINT8_ID)
+        self.assertRaises(ValueError, ILTagArrayTag.from_numpy,
+                          numpy.array([-1]), ILTAG_UINT64_ID)
+        self.assertRaises(TypeError, ILTagArrayTag.from_numpy,
+                          numpy.array([1.5]), ILTAG_INT32_ID)
+        self.assertRaises(ValueError, ILTagArrayTag.from_numpy,
+                          numpy.array([1.0], numpy.float16))
+        self.assertRaises(ValueError, ILTagArrayTag.from_numpy,
+                          numpy.array(['a']))
+        self.assertRaises(ValueError, ILTagArrayTag(
+            [ILInt8Tag(1), ILStringTag('a')]).to_numpy)
+        self.assertRaises(ValueError, ILTagArrayTag.from_numpy,
+                          numpy.zeros((2, 2), numpy.int32))
+        self.assertRaises(ValueError, ILTagArrayTag.from_numpy,
+                          numpy.int32(1))
+        self.assertRaises(ValueError, ILTagArrayTag.from_numpy, [1, 2])
+
+        # Empty arrays
+        a = ILTagArrayTag().to_numpy()
+        self.assertEqual(0, a.size)
+        self.assertEqual(numpy.dtype('f8'), a.dtype)
+        a = ILTagArrayTag().to_numpy(ILTAG_INT16_ID)
+        self.assertEqual(numpy.dtype('i2'), a.dtype)
+        a = ILTagArrayTag(ILTagColumn(ILTAG_UINT8_ID)).to_numpy()
+        self.assertEqual(0, a.size)
+        self.assertEqual(numpy.dtype('u1'), a.dtype)
+        t = ILTagArrayTag.from_numpy(numpy.zeros(0, numpy.uint32))
+        self.assertEqual(0, len(t))
+        self.assertEqual(numpy.dtype('u4'), t.to_numpy().dtype)
+        self.assertRaises(ValueError, ILTagArrayTag().to_numpy, ILTAG_STRING_ID)
+
+        with unittest.mock.patch.object(standard, 'numpy', None):
+            self.assertRaises(ImportError, ILTagArrayTag().to_numpy)
+            self.assertRaises(ImportError, ILTagArrayTag(
+                ILTagColumn(ILTAG_UINT8_ID, [1])).to_numpy)
+            self.assertRaises(ImportError, ILTagArrayTag.from_numpy, a)
+
+    def test_bulk_operations(self):
+        t = ILTagArrayTag(ILTagColumn(ILTAG_INT32_ID, [1, 2, 3]))
+        t.extend([ILInt32Tag(4), ILInt32Tag(5)])
+        t.insert(0, ILInt32Tag(0))
+        t[1:3] = [ILInt32Tag(10)]
+        del t[-1]
+        self.assertIsNotNone(t.column)
+        self.assertEqual([0, 10, 3, 4], t.column.values.tolist())
+
+        t.extend([ILInt32Tag(6), ILStringTag('a')])
+        self.assertIsNone(t.column)
+        self.assertEqual(6, len(t))
+
+        t = ILTagArrayTag(ILTagColumn(ILTAG_INT32_ID, [1, 2, 3]))
+        t.insert(0, ILInt8Tag(1))
+        self.assertIsNone(t.column)
+        self.assertEqual(4, len(t))
+
+        t = ILTagArrayTag(ILTagColumn(ILTAG_INT32_ID, [1, 2, 3]))
+        t[0:1] = [ILInt8Tag(1)]
+        self.assertIsNone(t.column)
+        self.assertEqual(ILTAG_INT8_ID, t[0].id)
+
+        t = ILTagArrayTag(ILTagColumn(ILTAG_INT32_ID, [3, 1, 2]))
+        t.sort(key=lambda x: x.value)
+        self.assertIsNone(t.column)
+        self.assertEqual([1, 2, 3], [x.value for x in t])
+
+    def test_tree_digest(self):
+        values = [1.0, 2.0, 3.0]
+        exp = ILTagArrayTag([ILBinary64Tag(v) for v in values])
+        t = ILTagArrayTag(ILTagColumn(ILTAG_BINARY64_ID, values))
+        self.assertEqual(exp.tree_digest(hashlib.sha256),
+                         t.tree_digest(hashlib.sha256))
+        self.assertEqual(exp.digest(hashlib.sha256()),
+                         t.digest(hashlib.sha256()))
+
+    def test_factory(self):
+        inner = ILTagArrayTag([ILBinary64Tag(float(v)) for v in range(100)])
+        doc = ILTagArrayTag([inner, ILTagArrayTag([ILInt8Tag(1), ILStringTag('a')]),
+                             ILTagArrayTag()])
+        w = io.BytesIO()
+        doc.serialize(w)
+        serialized = w.getvalue()
+
+        t = ILStandardTagFactory().deserialize(io.BytesIO(serialized))
+        self.assertIsNone(t[0].column)
+        for keep_encoded in [False, True]:
+            f = ILStandardTagFactory(keep_encoded=keep_encoded, columnar=True)
+            t = f.deserialize(io.BytesIO(serialized))
+            self.assertIsNone(t.column)
+            self.assertIsNotNone(t[0].column)
+            self.assertEqual(ILTAG_BINARY64_ID, t[0].column.tag_id)
+            self.assertIsNone(t[1].column)
+            self.assertIsNone(t[2].column)
+            self.assertILTagEqual(doc, t)
+
+        # Corrupted elements are not accepted
+        w = io.BytesIO()
+        ILTagArrayTag([ILUInt8Tag(1), ILUInt8Tag(2)]).serialize(w)
+        serialized = w.getvalue()
+        f = ILStandardTagFactory(columnar=True)
+        self.assertRaises(ILTagCorruptedError, f.deserialize,
+                          io.BytesIO(serialized[:-2] + b'\x04\x02'))
+
+
 class TestILTagSequenceTag(unittest.TestCase, ILTagComparatorMixin):
     def test_constructor(self):
         t = ILTagSequenceTag()
@@ -1271,6 +1758,22 @@ class TestILOIDTag(unittest.TestCase):
 
 class TestILDictionaryTag(unittest.TestCase, ILTagComparatorMixin):
 
+    def test_update(self):
+        t = ILDictionaryTag()
+        t.update({'a': ILNullTag(), 'b': ILUInt8Tag(1)})
+        self.assertEqual(['a', 'b'], list(t))
+        self.assertRaises(TypeError, t.update, {'c': ILNullTag(), 'd': 1})
+        self.assertRaises(TypeError, t.update, {'c': ILNullTag(), 1: ILNullTag()})
+        self.assertEqual(['a', 'b'], list(t))
+        self.assertEqual(1, t.get('b').value)
+
+        t = ILStringDictionaryTag()
+        t.update({'a': '1', 'b': '2'})
+        self.assertEqual([('a', '1'), ('b', '2')], list(t.items()))
+        self.assertRaises(TypeError, t.update, {'c': '3', 'd': 4})
+        self.assertRaises(TypeError, t.update, {'c': '3', 4: '4'})
+        self.assertEqual(2, len(t))
+
     def test_constructor(self):
         t = ILDictionaryTag()
         self.assertEqual(ILTAG_DICT_ID, t.id)
@@ -1362,6 +1865,32 @@ class TestILDictionaryTag(unittest.TestCase, ILTagComparatorMixin):
             writer.seek(0)
             self.assertEqual(exp.read(), writer.read())
 
+    def test_encoded_keys(self):
+        t = ILDictionaryTag()
+        self.assertIsNone(t._encoded_keys)
+        t['hot'] = ILNullTag()
+        for i in range(100):
+            t[f'key {i}'] = ILNullTag()
+            t.serialize_value(io.BytesIO())
+            del t[f'key {i}']
+            # The removed keys are not kept
+            self.assertEqual({'hot'}, set(t._encoded_keys))
+        self.assertEqual(ILStringTag.encode_tag_from_components('hot'),
+                         t._encoded_keys['hot'])
+
+        # Each instance has its own serializations
+        c = t.copy()
+        self.assertIsNone(c._encoded_keys)
+        c['other'] = ILNullTag()
+        c.serialize_value(io.BytesIO())
+        self.assertEqual({'hot', 'other'}, set(c._encoded_keys))
+        self.assertEqual({'hot'}, set(t._encoded_keys))
+
+        t.clear()
+        self.assertIsNone(t._encoded_keys)
+        t.serialize_value(io.BytesIO())
+        self.assertEqual({}, t._encoded_keys)
+
 
 class TestILStringDictionaryTag(unittest.TestCase):
 
@@ -1470,6 +1999,336 @@ class TestILStringDictionaryTag(unittest.TestCase):
             writer.seek(0)
             self.assertEqual(exp.read(), writer.read())
 
+    def test_serialize_value_after_change(self):
+        t = ILStringDictionaryTag()
+        for k in STRING_KEY_SAMPLES:
+            t[k] = k + '-val'
+        writer = io.BytesIO()
+        t.serialize_value(writer)
+        self.assertEqual(writer.tell(), t.value_size())
+
+        # The cached serializations of the values must not leak
+        for i in range(100):
+            for k in STRING_KEY_SAMPLES:
+                t[k] = f'{k}-{i}'
+            self.assertLessEqual(len(t._encoded_values),
+                                 2 * len(t) + 16)
+            exp = io.BytesIO()
+            pyilint.ilint_encode_to_stream(len(t), exp)
+            for k in STRING_KEY_SAMPLES:
+                ILStringTag.serialize_tag_from_components(k, exp)
+                ILStringTag.serialize_tag_from_components(t[k], exp)
+            writer = io.BytesIO()
+            t.serialize_value(writer)
+            self.assertEqual(exp.getvalue(), writer.getvalue())
+            self.assertEqual(writer.tell(), t.value_size())
+
+    def test_encoded_values_removed(self):
+        t = ILStringDictionaryTag()
+        t['a'] = 'x'
+        t['b'] = 'y'
+        t.serialize_value(io.BytesIO())
+        self.assertEqual({'a', 'b', 'x', 'y'}, set(t._encoded_values))
+        t['a'] = 'z'
+        self.assertEqual({'a', 'b', 'y'}, set(t._encoded_values))
+        del t['b']
+        self.assertEqual({'a'}, set(t._encoded_values))
+        t.serialize_value(io.BytesIO())
+        self.assertEqual({'a', 'z'}, set(t._encoded_values))
+        c = t.copy()
+        self.assertIsNone(c._encoded_values)
+        t.clear()
+        self.assertIsNone(t._encoded_values)
+
+
+class TestFrozenStandardTags(unittest.TestCase, ILTagComparatorMixin):
+
+    def create_samples(self):
+        d = ILDictionaryTag()
+        for key, tag in SAMPLE_DICT:
+            d[key] = tag
+        sd = ILStringDictionaryTag()
+        sd['a'] = 'b'
+        samples = BASIC_TAG_SAMPLES + [
+            ILTagArrayTag(BASIC_TAG_SAMPLES), ILTagSequenceTag(BASIC_TAG_SAMPLES), d, sd]
+        ret = []
+        f = ILStandardTagFactory()
+        for tag in samples:
+            writer = io.BytesIO()
+            tag.serialize(writer)
+            writer.seek(0)
+            ret.append((writer.getvalue(), f.deserialize(writer)))
+        return ret
+
+    def test_freeze(self):
+        for serialized, tag in self.create_samples():
+            tag.freeze()
+            self.assertTrue(tag.frozen)
+            writer = io.BytesIO()
+            tag.serialize(writer)
+            self.assertEqual(serialized, writer.getvalue())
+            self.assertEqual(len(serialized), tag.tag_size())
+            self.assertEqual(hash(tag), hash(tag.freeze()))
+            writer.seek(0)
+            other = ILStandardTagFactory().deserialize(writer)
+            self.assertNotEqual(tag, other)
+            self.assertEqual(tag, other.freeze())
+
+    def test_mutation(self):
+        samples = self.create_samples()
+        for _, tag in samples:
+            tag.freeze()
+
+        def set_value(tag, value):
+            tag.value = value
+
+        for _, tag in samples:
+            if isinstance(tag, (ILBoolTag, ILBaseIntTag, ILILInt64Tag)):
+                self.assertRaises(ILTagStateError, set_value, tag, 1)
+            elif isinstance(tag, ILBaseFloatTag):
+                self.assertRaises(ILTagStateError, set_value, tag, 1.0)
+            elif isinstance(tag, (ILRawTag, ILBinary128Tag)):
+                self.assertRaises(ILTagStateError, set_value, tag, None)
+            elif isinstance(tag, ILStringTag):
+                self.assertRaises(ILTagStateError, set_value, tag, 'a')
+            elif isinstance(tag, (ILIntArrayTag, ILTagArrayTag, ILTagSequenceTag)):
+                self.assertRaises(ILTagStateError, tag.clear)
+                self.assertRaises(ILTagStateError, tag.pop)
+            elif isinstance(tag, (ILDictionaryTag, ILStringDictionaryTag)):
+                self.assertRaises(ILTagStateError, tag.clear)
+            elif isinstance(tag, ILRangeTag):
+                with self.assertRaises(ILTagStateError):
+                    tag.first = 1
+            elif isinstance(tag, ILVersionTag):
+                with self.assertRaises(ILTagStateError):
+                    tag.major = 1
+            if not isinstance(tag, ILNullTag):
+                self.assertRaises(ILTagStateError, tag.deserialize_value,
+                                  ILStandardTagFactory(), tag.value_size(),
+                                  io.BytesIO(tag.encoded_value))
+        d = samples[-2][1]
+        with self.assertRaises(ILTagStateError):
+            d['x'] = ILNullTag()
+        with self.assertRaises(ILTagStateError):
+            d[STRING_KEY_SAMPLES[1]].value = True
+
+    def test_dict_key(self):
+        cache = {}
+        for _, tag in self.create_samples():
+            cache[tag.freeze()] = tag
+        for serialized, tag in self.create_samples():
+            self.assertIs(cache[tag.freeze()].__class__, tag.__class__)
+        self.assertIn(ILUInt8Tag(2).freeze(), cache)
+        self.assertNotIn(ILUInt8Tag(3).freeze(), cache)
+        self.assertNotIn(ILInt8Tag(2).freeze(), cache)
+
+
+class TestCopyOnWrite(unittest.TestCase):
+
+    def create_tree(self) -> ILDictionaryTag:
+        d = ILDictionaryTag()
+        d['a'] = ILTagArrayTag([ILUInt8Tag(1), ILStringTag('x')])
+        d['b'] = ILTagSequenceTag([ILIntArrayTag([1, 2]), ILVersionTag(1, 2)])
+        d['c'] = ILStringTag('c')
+        return d
+
+    def serialize(self, tag: ILTag) -> bytes:
+        writer = io.BytesIO()
+        tag.serialize(writer)
+        return writer.getvalue()
+
+    def test_copy(self):
+        for _, tag in TestFrozenStandardTags().create_samples():
+            c = tag.copy()
+            self.assertIsNot(c, tag)
+            self.assertIs(c.__class__, tag.__class__)
+            self.assertEqual(self.serialize(tag), self.serialize(c))
+            self.assertEqual(tag.freeze(), c.freeze())
+            self.assertIs(tag, tag.copy())
+
+    def test_copy_isolation(self):
+        orig = self.create_tree()
+        serialized = self.serialize(orig)
+        c = orig.copy()
+        c['a'][1].value = 'y'
+        c['a'].append(ILNullTag())
+        c['b'][0].append(3)
+        c['b'][1].major = 9
+        c['d'] = ILNullTag()
+        self.assertEqual(serialized, self.serialize(orig))
+        self.assertEqual('y', c['a'][1].value)
+        self.assertEqual([1, 2, 3], list(c['b'][0]))
+        self.assertEqual(9, c['b'][1].major)
+
+        c = orig.copy()
+        copied = self.serialize(c)
+        orig['a'][0].value = 7
+        orig['b'][0].clear()
+        del orig['c']
+        self.assertEqual(copied, self.serialize(c))
+        self.assertEqual(serialized, copied)
+
+    def test_copy_sharing(self):
+        orig = self.create_tree()
+        c = orig.copy()
+        self.assertIs(orig._values, c._values)
+        c['c'].value = 'd'
+        self.assertIsNot(orig._values, c._values)
+        self.assertIs(orig._values['a'], c._values['a'])
+        self.assertIs(orig._values['b'], c._values['b'])
+        self.assertEqual('c', orig['c'].value)
+
+    def test_copy_keep_encoded(self):
+        serialized = self.serialize(self.create_tree())
+        orig = ILStandardTagFactory(keep_encoded=True).deserialize(
+            io.BytesIO(serialized))
+        c = orig.copy()
+        self.assertIsNotNone(c.encoded_value)
+        c['a'][0].value = 2
+        self.assertIsNone(c.encoded_value)
+        self.assertIsNone(c['a'].encoded_value)
+        self.assertIsNotNone(orig.encoded_value)
+        self.assertIsNotNone(orig['a'].encoded_value)
+        self.assertEqual(serialized, self.serialize(orig))
+        orig['c'].value = 'd'
+        self.assertIsNone(orig.encoded_value)
+
+    def test_copy_freeze(self):
+        orig = self.create_tree()
+        c = orig.copy().freeze()
+        self.assertFalse(orig.frozen)
+        self.assertFalse(orig['a'].frozen)
+        self.assertFalse(orig['a'][1].frozen)
+        orig['a'][1].value = 'y'
+        self.assertEqual('x', c['a'][1].value)
+
+    def test_copy_column(self):
+        orig = ILTagArrayTag(ILTagColumn(ILTAG_UINT8_ID, [1, 2, 3]))
+        c = orig.copy()
+        c.append(ILUInt8Tag(4))
+        c[0] = ILUInt8Tag(5)
+        self.assertEqual([1, 2, 3], list(orig.column.values))
+        self.assertEqual([5, 2, 3, 4], list(c.column.values))
+        c = orig.copy()
+        c.append(ILNullTag())
+        self.assertIsNone(c.column)
+        self.assertEqual(3, len(orig.column))
+
+    def test_copy_iterate_immutable_values(self):
+        orig = ILIntArrayTag([1, 2])
+        c = orig.copy()
+        list(c)
+        c.append(3)
+        list(orig)
+        orig[0] = 9
+        self.assertEqual([9, 2], list(orig))
+        self.assertEqual([1, 2, 3], list(c))
+
+        orig = ILOIDTag([1, 2])
+        c = orig.copy()
+        list(c)
+        c.append(3)
+        self.assertEqual([1, 2], list(orig))
+        self.assertEqual([1, 2, 3], list(c))
+
+        orig = ILStringDictionaryTag()
+        orig['a'] = 'x'
+        c = orig.copy()
+        list(c.items())
+        c['b'] = 'y'
+        list(orig.values())
+        orig['a'] = 'z'
+        self.assertEqual({'a': 'z'}, dict(orig.items()))
+        self.assertEqual({'a': 'x', 'b': 'y'}, dict(c.items()))
+
+        orig = ILTagArrayTag(ILTagColumn(ILTAG_UINT8_ID, [1, 2, 3]))
+        c = orig.copy()
+        list(c)
+        c.append(ILUInt8Tag(4))
+        self.assertEqual([1, 2, 3], list(orig.column.values))
+        self.assertEqual([1, 2, 3, 4], list(c.column.values))
+
+    def test_evolve(self):
+        orig = self.create_tree()
+        serialized = self.serialize(orig)
+        e = orig.evolve(['a', 1], ILStringTag('y'))
+        self.assertEqual(serialized, self.serialize(orig))
+        self.assertEqual('y', e['a'][1].value)
+        self.assertIs(orig._values['b'], e._values['b'])
+        self.assertIs(orig._values['c'], e._values['c'])
+        e = orig.evolve(['b', 0, 1], 5)
+        self.assertEqual([1, 5], list(e['b'][0]))
+        self.assertEqual([1, 2], list(orig['b'][0]))
+        e = orig.evolve(['d'], ILNullTag())
+        self.assertNotIn('d', orig)
+        self.assertIn('d', e)
+        self.assertRaises(ValueError, orig.evolve, [], ILNullTag())
+        self.assertRaises(KeyError, orig.evolve, ['x', 0], ILNullTag())
+        self.assertRaises(TypeError, orig.evolve, ['a', 0], 1)
+
+
+class TestTagDigest(unittest.TestCase):
+
+    def test_digest(self):
+        d = ILDictionaryTag()
+        for key, tag in SAMPLE_DICT:
+            d[key] = tag
+        d['big'] = ILByteArrayTag(b'x' * 100000)
+        for tag in BASIC_TAG_SAMPLES + [d, ILTagArrayTag(BASIC_TAG_SAMPLES)]:
+            writer = io.BytesIO()
+            tag.serialize(writer)
+            for name in ['sha256', 'sha3_512', 'md5']:
+                exp = hashlib.new(name, writer.getvalue()).digest()
+                self.assertEqual(exp, tag.digest(hashlib.new(name)))
+
+
+    def test_tree_digest(self):
+        def td_leaf(t):
+            writer = io.BytesIO()
+            t.serialize(writer)
+            return hashlib.sha256(b'\x00' + writer.getvalue()).digest()
+
+        a = ILUInt8Tag(1)
+        b = ILStringTag('b')
+        t = ILTagArrayTag([a, b])
+        exp = hashlib.sha256(b'\x01\x15\x02' + td_leaf(a) +
+                             td_leaf(b)).digest()
+        self.assertEqual(exp, t.tree_digest(hashlib.sha256))
+
+        t = ILTagSequenceTag([a, b])
+        exp = hashlib.sha256(b'\x01\x16' + td_leaf(a) +
+                             td_leaf(b)).digest()
+        self.assertEqual(exp, t.tree_digest(hashlib.sha256))
+
+        t = ILDictionaryTag()
+        t['a'] = a
+        t['b'] = b
+        exp = hashlib.sha256(b'\x01\x1e\x02\x11\x01a' + td_leaf(a) +
+                             b'\x11\x01b' + td_leaf(b)).digest()
+        self.assertEqual(exp, t.tree_digest(hashlib.sha256))
+
+    def test_tree_digest_cache(self):
+        state = ILDictionaryTag()
+        for i in range(100):
+            state[f'account{i}'] = ILTagArrayTag(
+                [ILUInt64Tag(i), ILStringTag(f'name{i}')])
+        exp = state.tree_digest(hashlib.sha256)
+        self.assertEqual(exp, state.tree_digest(hashlib.sha256, True))
+
+        state['account50'][0].value = 1234
+        exp = state.tree_digest(hashlib.sha256)
+        for t in state.value_children():
+            self.assertIsNotNone(t[1]._digest)
+        self.assertIsNone(state['account50']._digest)
+        self.assertIsNone(state['account50'][0]._digest)
+        self.assertIsNone(state._digest)
+        self.assertEqual(exp, state.tree_digest(hashlib.sha256, True))
+
+        state['account100'] = ILNullTag()
+        self.assertIsNone(state._digest)
+        self.assertEqual(state.tree_digest(hashlib.sha256),
+                         state.tree_digest(hashlib.sha256, True))
+
 
 class TestILStandardTagFactory(unittest.TestCase, ILTagComparatorMixin):
 
@@ -1587,6 +2446,639 @@ class TestILStandardTagFactory(unittest.TestCase, ILTagComparatorMixin):
         reader.seek(0)
         self.assertRaises(ILTagUnknownError, f.deserialize, reader)
 
+    def test_deserialize_keep_encoded(self):
+        d = ILDictionaryTag()
+        for key, tag in SAMPLE_DICT:
+            d[key] = tag
+        d['bytes'] = ILByteArrayTag(b'xyz')
+        d['array'] = ILTagArrayTag([ILStringTag('abc'), ILUInt8Tag(1),
+                                    ILTagSequenceTag([ILByteArrayTag(b'123')])])
+        writer = io.BytesIO()
+        d.serialize(writer)
+        serialized = writer.getvalue()
+
+        t = ILStandardTagFactory().deserialize(io.BytesIO(serialized))
+        self.assertIsNone(t.encoded_value)
+        self.assertIsNone(t['array'].encoded_value)
+
+        f = ILStandardTagFactory(keep_encoded=True)
+        self.assertTrue(f.keep_encoded)
+        t = f.deserialize(io.BytesIO(serialized))
+        self.assertEqual(serialized[-len(t.encoded_value):], t.encoded_value)
+        self.assertEqual(len(t.encoded_value), t.value_size())
+        self.assertIsNotNone(t['array'].encoded_value)
+        self.assertIsNotNone(t['array'][0].encoded_value)
+        self.assertIsNone(t['array'][1].encoded_value)
+        writer = io.BytesIO()
+        t.serialize(writer)
+        self.assertEqual(serialized, writer.getvalue())
+
+        # Change a nested value
+        t['array'][2][0].value = b'4567'
+        d['array'][2][0].value = b'4567'
+        self.assertIsNone(t.encoded_value)
+        self.assertIsNone(t['array'].encoded_value)
+        self.assertIsNone(t['array'][2].encoded_value)
+        self.assertIsNotNone(t['array'][0].encoded_value)
+        self.assertIsNotNone(t['bytes'].encoded_value)
+        exp = io.BytesIO()
+        d.serialize(exp)
+        writer = io.BytesIO()
+        t.serialize(writer)
+        self.assertEqual(exp.getvalue(), writer.getvalue())
+
+        # Change an implicit value
+        t = f.deserialize(io.BytesIO(serialized))
+        t['array'][1].value = 2
+        self.assertIsNone(t.encoded_value)
+        self.assertIsNone(t['array'].encoded_value)
+
+        # Change the structure
+        t = f.deserialize(io.BytesIO(serialized))
+        del t[STRING_KEY_SAMPLES[0]]
+        self.assertIsNone(t.encoded_value)
+        self.assertIsNotNone(t['array'].encoded_value)
+        del d[STRING_KEY_SAMPLES[0]]
+        d['array'][2][0].value = b'123'
+        exp = io.BytesIO()
+        d.serialize(exp)
+        writer = io.BytesIO()
+        t.serialize(writer)
+        self.assertEqual(exp.getvalue(), writer.getvalue())
+
+        # Custom tags are not cached
+        class Tag1234(ILRawTag):
+            def __init__(self, value: bytes = None) -> None:
+                super().__init__(1234, value)
+        f.register_custom(1234, Tag1234)
+        writer = io.BytesIO()
+        Tag1234(b'123').serialize(writer)
+        writer.seek(0)
+        self.assertIsNone(f.deserialize(writer).encoded_value)
+
+    def test_deserialize_memory_reader(self):
+        d = ILDictionaryTag()
+        for key, tag in SAMPLE_DICT:
+            d[key] = tag
+        d['bytes'] = ILByteArrayTag(b'xyz' * 100)
+        d['array'] = ILTagArrayTag([ILBigDecimalTag(b'123', 2), ILUInt8Tag(1),
+                                    ILTagSequenceTag([ILRawTag(1234, b'abc')])])
+        writer = io.BytesIO()
+        d.serialize(writer)
+        serialized = writer.getvalue()
+
+        for keep_encoded in [False, True]:
+            buff = bytearray(serialized)
+            f = ILStandardTagFactory(keep_encoded=keep_encoded)
+            t = f.deserialize(MemoryReader(buff))
+            for v in [t['bytes'].value, t['array'][0].value, t['array'][2][0].value]:
+                self.assertIsInstance(v, memoryview)
+                self.assertIs(buff, v.obj)
+            self.assertEqual(2, t['array'][0].scale)
+            self.assertIsInstance(t[STRING_KEY_SAMPLES[1]].value, bool)
+            writer = io.BytesIO()
+            t.serialize(writer)
+            self.assertEqual(serialized, writer.getvalue())
+
+            self.assertIs(t, t.materialize())
+            for v in [t['bytes'].value, t['array'][0].value, t['array'][2][0].value]:
+                self.assertIsInstance(v, bytes)
+            if keep_encoded:
+                self.assertIsInstance(t.encoded_value, bytes)
+                self.assertIsInstance(t['array'].encoded_value, bytes)
+            buff[:] = bytes(len(buff))
+            writer = io.BytesIO()
+            t.serialize(writer)
+            self.assertEqual(serialized, writer.getvalue())
+
+        t = ILStandardTagFactory(keep_encoded=True).deserialize(
+            MemoryReader(bytearray(serialized)))
+        self.assertEqual(t.freeze(), ILStandardTagFactory().deserialize(
+            io.BytesIO(serialized)).freeze())
+        self.assertEqual(hash(t), hash(ILStandardTagFactory().deserialize(
+            io.BytesIO(serialized)).freeze()))
+
+    def test_deserialize_spill_threshold(self):
+        d = ILDictionaryTag()
+        d['name'] = ILStringTag('name')
+        d['big'] = ILByteArrayTag(bytes(range(256)) * 40)
+        d['raw'] = ILRawTag(1234, b'x' * 2000)
+        d['array'] = ILTagArrayTag([ILByteArrayTag(b'small'), ILBigIntegerTag(b'1' * 2000),
+                                    ILBigDecimalTag(b'2' * 2000, 3)])
+        writer = io.BytesIO()
+        d.serialize(writer)
+        serialized = writer.getvalue()
+
+        f = ILStandardTagFactory(spill_threshold=1000)
+        self.assertEqual(1000, f.spill_threshold)
+        for reader in [io.BytesIO(serialized), io.BufferedReader(io.BytesIO(serialized))]:
+            t = f.deserialize(reader)
+            self.assertEqual(len(serialized), reader.tell())
+            self.assertIsInstance(t['big'].value, FilePayload)
+            self.assertIsInstance(t['raw'].value, FilePayload)
+            self.assertIsInstance(t['array'][0].value, bytes)
+            self.assertIsInstance(t['array'][1].value, bytes)
+            self.assertIsInstance(t['array'][2].value, bytes)
+            self.assertEqual(d['big'].value, t['big'].value.read())
+            writer = io.BytesIO()
+            t.serialize(writer)
+            self.assertEqual(serialized, writer.getvalue())
+
+        # MemoryReader is never spilled
+        t = f.deserialize(MemoryReader(serialized))
+        self.assertIsInstance(t['big'].value, memoryview)
+
+        # Corrupted payloads
+        for size in [len(serialized) - 1, len(serialized) - 3000]:
+            self.assertRaises(ILTagCorruptedError, f.deserialize,
+                              io.BytesIO(serialized[:size]))
+        w = io.BytesIO()
+        ILTagArrayTag([ILByteArrayTag(b'x' * 2000)]).serialize(w)
+        corrupted = bytearray(w.getvalue())
+        corrupted[2] = 0
+        self.assertRaises(ILTagCorruptedError, f.deserialize,
+                          io.BytesIO(corrupted))
+
+    def test_flyweight(self):
+        self.assertIs(ILStandardTagFactory.flyweight(ILTAG_NULL_ID),
+                      ILStandardTagFactory.flyweight(ILTAG_NULL_ID))
+        for tag_id, value in [(ILTAG_BOOL_ID, True), (ILTAG_BOOL_ID, False),
+                              (ILTAG_INT8_ID, -128), (ILTAG_UINT8_ID, 255),
+                              (ILTAG_INT16_ID, -1), (ILTAG_UINT64_ID, 200),
+                              (ILTAG_ILINT64_ID, 0), (ILTAG_ILINT64_ID, 255)]:
+            tag = ILStandardTagFactory.flyweight(tag_id, value)
+            self.assertEqual(tag_id, tag.id)
+            self.assertEqual(value, tag.value)
+            self.assertTrue(tag.frozen)
+            self.assertIs(tag, ILStandardTagFactory.flyweight(tag_id, value))
+        for tag_id, value in [(ILTAG_INT8_ID, 200), (ILTAG_UINT8_ID, -1),
+                              (ILTAG_INT32_ID, 256), (ILTAG_ILINT64_ID, -1),
+                              (ILTAG_ILINT64_ID, 256), (ILTAG_BINARY32_ID, 1.0),
+                              (ILTAG_STRING_ID, 'a'), (ILTAG_INT8_ID, 'a')]:
+            self.assertIsNone(ILStandardTagFactory.flyweight(tag_id, value))
+
+    def test_deserialize_flyweights(self):
+        samples = [ILNullTag(), ILBoolTag(True), ILBoolTag(False), ILInt8Tag(-3),
+                   ILUInt8Tag(200), ILInt16Tag(-200), ILUInt32Tag(7), ILInt64Tag(255),
+                   ILUInt64Tag(256), ILILInt64Tag(1), ILILInt64Tag(250),
+                   ILILInt64Tag(2**64 - 1), ILBinary32Tag(1.0), ILStringTag('a')]
+        a = ILTagArrayTag(samples + samples)
+        writer = io.BytesIO()
+        a.serialize(writer)
+        serialized = writer.getvalue()
+
+        t = ILStandardTagFactory().deserialize(io.BytesIO(serialized))
+        self.assertFalse(any(v.frozen for v in t))
+
+        f = ILStandardTagFactory(flyweights=True)
+        self.assertTrue(f.flyweights)
+        t = f.deserialize(io.BytesIO(serialized))
+        self.assertILTagEqual(a, t)
+        count = len(samples)
+        for i, v in enumerate(t[:count]):
+            shared = ILStandardTagFactory.flyweight(
+                v.id, getattr(v, 'value', None)) is not None
+            self.assertEqual(shared, v.frozen)
+            self.assertEqual(shared, v is t[i + count])
+        writer = io.BytesIO()
+        t.serialize(writer)
+        self.assertEqual(serialized, writer.getvalue())
+        with self.assertRaises(ILTagStateError):
+            t[1].value = False
+        t[3] = ILInt8Tag(4)
+        self.assertEqual(-3, t[count + 3].value)
+
+        # Corrupted values
+        for serialized in [bytes([ILTAG_BOOL_ID, 2]), bytes([ILTAG_UINT8_ID]),
+                           bytes([ILTAG_ILINT64_ID, 0xFF, 1])]:
+            self.assertRaises(ILTagCorruptedError, f.deserialize,
+                              io.BytesIO(serialized))
+
+    def test_register_sink(self):
+        f = ILStandardTagFactory(strict=True)
+        received = []
+
+        def sink(tag, size, chunks):
+            chunks = list(chunks)
+            received.append((tag.id, size, chunks))
+            self.assertTrue(all(len(c) <= 100 for c in chunks))
+            return b''.join(chunks)[:2]
+
+        f.register_sink(ILTAG_BYTE_ARRAY_ID, sink, 100)
+        f.register_sink(1234, sink, 100)
+        f.register_sink(ILTAG_BDEC_ID, lambda tag, size, chunks: None)
+        for id in [0, 15]:
+            self.assertRaises(ValueError, f.register_sink, id, sink)
+        self.assertRaises(ValueError, f.register_sink, 16, sink, 0)
+
+        a = ILTagArrayTag([ILByteArrayTag(bytes(range(250))), ILStringTag('abc'),
+                           ILRawTag(1234, b'xyz'), ILBigDecimalTag(b'12', 3),
+                           ILByteArrayTag(b'')])
+        writer = io.BytesIO()
+        a.serialize(writer)
+        serialized = writer.getvalue()
+        for reader in [io.BytesIO(serialized), MemoryReader(serialized)]:
+            received.clear()
+            t = f.deserialize(reader)
+            self.assertEqual(len(serialized), reader.tell())
+            self.assertEqual(3, len(received))
+            self.assertEqual((ILTAG_BYTE_ARRAY_ID, 250), received[0][:2])
+            self.assertEqual(bytes(range(250)), b''.join(received[0][2]))
+            self.assertEqual((1234, 3, [b'xyz']), received[1])
+            self.assertEqual((ILTAG_BYTE_ARRAY_ID, 0, []), received[2])
+            self.assertIsInstance(t[0], ILByteArrayTag)
+            self.assertEqual(b'\x00\x01', t[0].value)
+            self.assertEqual('abc', t[1].value)
+            self.assertIs(ILRawTag, t[2].__class__)
+            self.assertEqual(b'xy', t[2].value)
+            self.assertIs(ILRawTag, t[3].__class__)
+            self.assertIsNone(t[3].value)
+
+        # Chunks not consumed by the sink are skipped
+        f.register_sink(ILTAG_BYTE_ARRAY_ID, lambda tag, size, chunks: next(chunks, None), 10)
+        t = f.deserialize(io.BytesIO(serialized))
+        self.assertEqual(bytes(range(10)), t[0].value)
+        self.assertEqual('abc', t[1].value)
+        self.assertRaises(ILTagCorruptedError, f.deserialize,
+                          io.BytesIO(serialized[:-20]))
+
+        f.register_sink(ILTAG_BYTE_ARRAY_ID, None)
+        f.register_sink(ILTAG_BDEC_ID, None)
+        f.register_sink(1234, None)
+        writer = io.BytesIO()
+        a[0].serialize(writer)
+        writer.seek(0)
+        self.assertEqual(bytes(range(250)), f.deserialize(writer).value)
+        self.assertRaises(ILTagUnknownError, f.deserialize, io.BytesIO(serialized))
+
+    def test_register_sink_keep_encoded(self):
+        f = ILStandardTagFactory(keep_encoded=True)
+        f.register_sink(ILTAG_BYTE_ARRAY_ID, lambda tag, size, chunks: b'ref')
+        d = ILDictionaryTag()
+        d['attachment'] = ILTagArrayTag([ILByteArrayTag(bytes(1000))])
+        d['name'] = ILTagArrayTag([ILStringTag('abc')])
+        writer = io.BytesIO()
+        d.serialize(writer)
+        t = f.deserialize(io.BytesIO(writer.getvalue()))
+        self.assertEqual(b'ref', t['attachment'][0].value)
+        self.assertIsNone(t.encoded_value)
+        self.assertIsNone(t['attachment'].encoded_value)
+        self.assertIsNotNone(t['name'].encoded_value)
+        exp = ILDictionaryTag()
+        exp['attachment'] = ILTagArrayTag([ILByteArrayTag(b'ref')])
+        exp['name'] = ILTagArrayTag([ILStringTag('abc')])
+        self.assertILTagEqual(exp, t)
+        self.assertEqual(exp.tag_size(), t.tag_size())
+        writer = io.BytesIO()
+        t.serialize(writer)
+        self.assertEqual(self.serialize(exp), writer.getvalue())
+
+    def test_intern_key(self):
+        f = ILStandardTagFactory(key_table_size=2)
+        self.assertEqual(2, f.key_table_size)
+        a = f.intern_key(bytes(b'key a'))
+        self.assertEqual('key a', a)
+        self.assertIs(a, f.intern_key(bytes(b'key a')))
+        self.assertIs(sys.intern('key a'), a)
+        self.assertIs(f.intern_key(codecs.encode('chave ç', 'utf-8')),
+                      f.intern_key(codecs.encode('chave ç', 'utf-8')))
+        # The table is full
+        self.assertEqual('key c', f.intern_key(b'key c'))
+        self.assertIsNot(f.intern_key(b'key c'), f.intern_key(b'key c'))
+        self.assertEqual(2, len(f._keys))
+        # Large keys are not kept
+        f = ILStandardTagFactory()
+        large = b'k' * (ILStandardTagFactory.MAX_INTERNED_KEY_SIZE + 1)
+        self.assertEqual(large.decode(), f.intern_key(large))
+        self.assertEqual(0, len(f._keys))
+        self.assertRaises(ILTagCorruptedError, f.intern_key, b'\xF0\x90\x8D')
+
+    def test_deserialize_interned_keys(self):
+        records = ILTagArrayTag()
+        for i in range(3):
+            d = ILDictionaryTag()
+            d['name'] = ILStringTag(f'name {i}')
+            d['value'] = ILUInt32Tag(i)
+            sd = ILStringDictionaryTag()
+            sd['name'] = f'name {i}'
+            records.append(d)
+            records.append(sd)
+        writer = io.BytesIO()
+        records.serialize(writer)
+        f = ILStandardTagFactory()
+        for _ in range(2):
+            writer.seek(0)
+            t = f.deserialize(writer)
+            self.assertILTagEqual(records, t)
+            for r in t:
+                self.assertIs(list(f._keys.values())[0], list(r)[0])
+        self.assertEqual(['name', 'value'], list(f._keys.values()))
+
+    def create_record(self, i: int) -> ILDictionaryTag:
+        d = ILDictionaryTag()
+        d['name'] = ILStringTag(f'name {i}')
+        d['value'] = ILUInt32Tag(i)
+        d['items'] = ILTagArrayTag([ILILInt64Tag(j) for j in range(i)])
+        d['extra'] = ILTagSequenceTag([ILRawTag(1234, bytes(i))] * (i % 3))
+        return d
+
+    def serialize(self, tag: ILTag) -> bytes:
+        writer = io.BytesIO()
+        tag.serialize(writer)
+        return writer.getvalue()
+
+    def test_deserialize_into(self):
+        for keep_encoded in (False, True):
+            f = ILStandardTagFactory(keep_encoded=keep_encoded)
+            t = f.deserialize(io.BytesIO(self.serialize(self.create_record(3))))
+            name = t['name']
+            items = t['items']
+            first = items[0]
+            for i in (4, 2, 1, 5):
+                exp = self.create_record(i)
+                r = f.deserialize_into(io.BytesIO(self.serialize(exp)), t)
+                self.assertIs(t, r)
+                self.assertILTagEqual(exp, t)
+                self.assertIs(name, t['name'])
+                self.assertIs(items, t['items'])
+                self.assertEqual(self.serialize(exp), self.serialize(t))
+                self.assertEqual(exp.tag_size(), t.tag_size())
+            self.assertIs(first, items[0])
+
+    def test_deserialize_into_shape_change(self):
+        f = ILStandardTagFactory()
+        t = self.create_record(2)
+        name = t['name']
+
+        # Different key order
+        exp = ILDictionaryTag()
+        exp['value'] = ILUInt32Tag(1)
+        exp['name'] = ILStringTag('x')
+        self.assertIs(t, f.deserialize_into(
+            io.BytesIO(self.serialize(exp)), t))
+        self.assertILTagEqual(exp, t)
+        self.assertEqual(['value', 'name'], list(t))
+        self.assertIs(name, t['name'])
+
+        # Different types
+        exp = ILDictionaryTag()
+        exp['value'] = ILStringTag('1')
+        exp['name'] = ILNullTag()
+        self.assertIs(t, f.deserialize_into(
+            io.BytesIO(self.serialize(exp)), t))
+        self.assertILTagEqual(exp, t)
+
+        # Different ids and classes
+        exp = ILStringTag('abc')
+        r = f.deserialize_into(io.BytesIO(self.serialize(exp)), t)
+        self.assertIsNot(t, r)
+        self.assertILTagEqual(exp, r)
+        r = f.deserialize_into(io.BytesIO(self.serialize(exp)), None)
+        self.assertILTagEqual(exp, r)
+        f.register_custom(1234, lambda: ILRawTag(1234))
+        t = ILRawTag(1234, b'abc')
+        r = f.deserialize_into(io.BytesIO(self.serialize(ILRawTag(1234))), t)
+        self.assertIsNot(t, r)
+        self.assertEqual(b'abc', t.value)
+
+        # Frozen
+        t = self.create_record(2).freeze()
+        exp = self.create_record(3)
+        r = f.deserialize_into(io.BytesIO(self.serialize(exp)), t)
+        self.assertIsNot(t, r)
+        self.assertILTagEqual(exp, r)
+        self.assertILTagEqual(self.create_record(2), t)
+
+    def test_deserialize_into_shared(self):
+        f = ILStandardTagFactory()
+
+        # The same tag twice
+        s = ILStringTag('a')
+        t = ILTagArrayTag([s, s])
+        exp = ILTagArrayTag([ILStringTag('b'), ILStringTag('c')])
+        self.assertIs(t, f.deserialize_into(
+            io.BytesIO(self.serialize(exp)), t))
+        self.assertILTagEqual(exp, t)
+        self.assertIsNot(t[0], t[1])
+
+        # Copies are not affected
+        t = self.create_record(3)
+        c = t.copy()
+        f.deserialize_into(io.BytesIO(self.serialize(self.create_record(4))), t)
+        self.assertILTagEqual(self.create_record(4), t)
+        self.assertILTagEqual(self.create_record(3), c)
+
+        # Containers of the reused tag are updated
+        t = self.create_record(3)
+        outer = ILTagArrayTag([t])
+        f = ILStandardTagFactory(keep_encoded=True)
+        outer = f.deserialize(io.BytesIO(self.serialize(outer)))
+        f.deserialize_into(io.BytesIO(self.serialize(self.create_record(4))),
+                           outer[0])
+        self.assertILTagEqual(
+            ILTagArrayTag([self.create_record(4)]),
+            f.deserialize(io.BytesIO(self.serialize(outer))))
+
+    def test_deserialize_into_corrupted(self):
+        f = ILStandardTagFactory()
+        t = self.create_record(3)
+        serialized = self.serialize(self.create_record(4))
+        self.assertRaises(ILTagCorruptedError, f.deserialize_into,
+                          io.BytesIO(serialized[:-1]), t)
+        self.assertRaises(ILTagCorruptedError, f.deserialize_into,
+                          io.BytesIO(b''), t)
+
+    def create_adaptive_stream(self) -> list:
+        tags = []
+        for i in range(20):
+            d = ILDictionaryTag()
+            d['id'] = ILUInt32Tag(i)
+            d['name'] = ILStringTag(f'name {i}')
+            if i % 5 == 4:
+                # A different layout
+                d['extra'] = ILNullTag()
+            d['values'] = ILTagArrayTag([ILILInt64Tag(j) for j in range(i % 3 + 1)])
+            d['attributes'] = ILStringDictionaryTag()
+            d['attributes']['a'] = str(i)
+            tags.append(d)
+            tags.append(ILStringTag('x'))
+        return tags
+
+    def test_deserialize_adaptive(self):
+        tags = self.create_adaptive_stream()
+        writer = io.BytesIO()
+        for t in tags:
+            t.serialize(writer)
+        serialized = writer.getvalue()
+
+        f = ILStandardTagFactory(adaptive=True)
+        self.assertTrue(f.adaptive)
+        self.assertEqual([], f.adaptive_shapes)
+        for _ in range(2):
+            reader = io.BytesIO(serialized)
+            for exp in tags:
+                t = f.deserialize(reader)
+                self.assertILTagEqual(exp, t)
+                self.assertEqual(exp.tag_size(), t.tag_size())
+        self.assertEqual(2, len(f.adaptive_shapes))
+        self.assertGreater(f.adaptive_hits, 20)
+        self.assertLess(f.adaptive_misses, 10)
+        # Only the dictionaries are counted
+        self.assertLessEqual(f.adaptive_hits + f.adaptive_misses, 40)
+
+        f.reset_adaptive()
+        self.assertEqual([], f.adaptive_shapes)
+        self.assertEqual(0, f.adaptive_hits)
+        self.assertEqual(0, f.adaptive_misses)
+
+        # Disabled
+        for f in (ILStandardTagFactory(),
+                  ILStandardTagFactory(adaptive=True, flyweights=True),
+                  ILStandardTagFactory(adaptive=True, columnar=True)):
+            reader = io.BytesIO(serialized)
+            for exp in tags:
+                self.assertILTagEqual(exp, f.deserialize(reader))
+            self.assertEqual([], f.adaptive_shapes)
+            self.assertEqual(0, f.adaptive_hits)
+
+    def test_deserialize_adaptive_result_types(self):
+        d = ILDictionaryTag()
+        d['data'] = ILByteArrayTag(b'abc')
+        d['raw'] = ILRawTag(1234, b'xyz')
+        d['samples'] = ILTagArrayTag([ILUInt8Tag(i) for i in range(4)])
+        serialized = self.serialize(d)
+        count = ILStandardTagFactory.ADAPTIVE_THRESHOLD * 3
+
+        # The results do not depend on the number of times the layout was seen
+        f = ILStandardTagFactory(adaptive=True, columnar=True)
+        for _ in range(count):
+            t = f.deserialize(io.BytesIO(serialized))
+            self.assertIsNotNone(t['samples'].column)
+            self.assertILTagEqual(d, t)
+        self.assertEqual([], f.adaptive_shapes)
+
+        f = ILStandardTagFactory(adaptive=True)
+        for _ in range(count):
+            t = f.deserialize(MemoryReader(serialized))
+            self.assertIs(memoryview, t['data'].value.__class__)
+            self.assertIs(memoryview, t['raw'].value.__class__)
+            self.assertILTagEqual(d, t)
+        self.assertEqual([], f.adaptive_shapes)
+        for _ in range(count):
+            t = f.deserialize(io.BytesIO(serialized))
+            self.assertIs(bytes, t['data'].value.__class__)
+            self.assertIs(bytes, t['raw'].value.__class__)
+            self.assertILTagEqual(d, t)
+
+    def test_deserialize_adaptive_threads(self):
+        d = ILDictionaryTag()
+        d['name'] = ILStringTag('abc')
+        d['items'] = ILTagArrayTag([ILUInt8Tag(1)])
+        serialized = self.serialize(d)
+        f = ILStandardTagFactory(adaptive=True)
+        for _ in range(ILStandardTagFactory.ADAPTIVE_THRESHOLD):
+            f.deserialize(io.BytesIO(serialized))
+        self.assertEqual(1, len(f.adaptive_shapes))
+        errors = []
+
+        def run():
+            try:
+                for _ in range(200):
+                    self.assertILTagEqual(d, f.deserialize(io.BytesIO(serialized)))
+            except BaseException as e:
+                errors.append(e)
+        threads = [threading.Thread(target=run) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual([], errors)
+        # No top-level decode skipped the adaptive mode or lost its count
+        self.assertEqual(800, f.adaptive_hits)
+        self.assertEqual(0, f.adaptive_misses)
+
+    def test_deserialize_adaptive_top_level(self):
+        d = ILDictionaryTag()
+        d['name'] = ILStringTag('abc')
+        inner = ILDictionaryTag()
+        inner['child'] = d
+        t = ILTagArrayTag([inner, inner])
+        writer = io.BytesIO()
+        for _ in range(5):
+            t.serialize(writer)
+            inner.serialize(writer)
+        reader = io.BytesIO(writer.getvalue())
+        f = ILStandardTagFactory(adaptive=True)
+        for _ in range(5):
+            self.assertILTagEqual(t, f.deserialize(reader))
+            self.assertILTagEqual(inner, f.deserialize(reader))
+        # Only the top-level dictionaries are learned and matched
+        self.assertEqual(1, len(f.adaptive_shapes))
+        self.assertEqual(2, f.adaptive_hits)
+        self.assertEqual(0, f.adaptive_misses)
+
+    def test_deserialize_adaptive_stop(self):
+        writer = io.BytesIO()
+        for i in range(ILStandardTagFactory.ADAPTIVE_WINDOW):
+            d = ILDictionaryTag()
+            d[f'key {i}'] = ILNullTag()
+            d.serialize(writer)
+        serialized = writer.getvalue()
+        f = ILStandardTagFactory(adaptive=True)
+        d = ILDictionaryTag()
+        d['name'] = ILNullTag()
+        for _ in range(3):
+            f.deserialize(io.BytesIO(self.serialize(d)))
+        self.assertEqual(1, len(f.adaptive_shapes))
+        reader = io.BytesIO(serialized)
+        for _ in range(ILStandardTagFactory.ADAPTIVE_WINDOW):
+            f.deserialize(reader)
+        self.assertTrue(f._adaptive_stopped)
+        misses = f.adaptive_misses
+        reader.seek(0)
+        f.deserialize(reader)
+        self.assertEqual(misses, f.adaptive_misses)
+        f.reset_adaptive()
+        self.assertFalse(f._adaptive_stopped)
+
+    def test_deserialize_adaptive_fallback(self):
+        d = ILDictionaryTag()
+        d['name'] = ILStringTag('abc')
+        writer = io.BytesIO()
+        d.serialize(writer)
+        serialized = writer.getvalue()
+        f = ILStandardTagFactory(adaptive=True)
+        for _ in range(5):
+            f.deserialize(io.BytesIO(serialized))
+        self.assertEqual(1, len(f.adaptive_shapes))
+
+        # Invalid strings are handled by the generic decoder
+        invalid = serialized[:-1] + b'\xff'
+        self.assertRaises(ILTagCorruptedError, f.deserialize,
+                          io.BytesIO(invalid))
+        f.validate_utf8 = False
+        t = f.deserialize(io.BytesIO(invalid))
+        self.assertRaises(ILTagCorruptedError, getattr, t['name'], 'value')
+        f.validate_utf8 = True
+        self.assertRaises(ILTagCorruptedError, f.deserialize,
+                          io.BytesIO(serialized[:-1]))
+
+        # Custom classes and sinks discard the learned layouts
+        f.register_custom(ILTAG_STRING_ID, lambda: ILRawTag(ILTAG_STRING_ID))
+        self.assertEqual([], f.adaptive_shapes)
+        for _ in range(5):
+            t = f.deserialize(io.BytesIO(serialized))
+            self.assertIsInstance(t['name'], ILRawTag)
+        self.assertEqual([], f.adaptive_shapes)
+
+        f = ILStandardTagFactory(adaptive=True)
+        for _ in range(5):
+            f.deserialize(io.BytesIO(serialized))
+        f.register_sink(ILTAG_STRING_ID, lambda tag, size, chunks: b'sink')
+        self.assertEqual([], f.adaptive_shapes)
+        t = f.deserialize(io.BytesIO(serialized))
+        self.assertEqual(b'sink', t['name'].value)
+
     def test_register_custom(self):
         class Tag1234(ILRawTag):
             def __init__(self, value: bytes = None) -> None:
@@ -1611,3 +3103,137 @@ class TestILStandardTagFactory(unittest.TestCase, ILTagComparatorMixin):
 
         self.assertRaises(TypeError, f.register_custom,
                           1235, lambda x: ILInt16Tag(id=1235))
+
+
+class TestILCachingTagFactory(unittest.TestCase, ILTagComparatorMixin):
+
+    def create_samples(self):
+        samples = []
+        for i in range(4):
+            d = ILStringDictionaryTag()
+            d['id'] = str(i)
+            samples.append(d)
+        return samples
+
+    def serialize(self, *tags) -> bytes:
+        writer = io.BytesIO()
+        for t in tags:
+            t.serialize(writer)
+        return writer.getvalue()
+
+    def test_constructor(self):
+        inner = ILStandardTagFactory(strict=True)
+        f = ILCachingTagFactory(inner)
+        self.assertIs(inner, f.factory)
+        self.assertTrue(f.strict)
+        self.assertEqual(1024, f.max_entries)
+        self.assertEqual(4096, f.max_tag_size)
+        self.assertTrue(f.frozen)
+        self.assertEqual(0, f.hits)
+        self.assertEqual(0, f.misses)
+        self.assertEqual(0, len(f))
+        self.assertRaises(ValueError, ILCachingTagFactory, inner, 0)
+        self.assertIsInstance(f.create(ILTAG_STRING_ID), ILStringTag)
+
+    def test_deserialize_frozen(self):
+        samples = self.create_samples()
+        f = ILCachingTagFactory(ILStandardTagFactory())
+        reader = io.BytesIO(self.serialize(*samples, *samples))
+        first = [f.deserialize(reader) for _ in samples]
+        second = [f.deserialize(reader) for _ in samples]
+        for exp, a, b in zip(samples, first, second):
+            self.assertILTagEqual(exp, a)
+            self.assertTrue(a.frozen)
+            self.assertIs(a, b)
+        self.assertEqual(len(samples), f.hits)
+        self.assertEqual(len(samples), f.misses)
+        self.assertEqual(len(samples), len(f))
+
+        # Views of the caller's buffer are not kept
+        buff = bytearray(self.serialize(ILRawTag(1234, b'abc')))
+        t = f.deserialize(MemoryReader(buff))
+        buff[-1] = 0
+        self.assertEqual(b'abc', bytes(t.value))
+
+        f.clear()
+        self.assertEqual(0, f.hits)
+        self.assertEqual(0, f.misses)
+        self.assertEqual(0, len(f))
+
+    def test_deserialize_copies(self):
+        sample = self.create_samples()[0]
+        f = ILCachingTagFactory(ILStandardTagFactory(), frozen=False)
+        reader = io.BytesIO(self.serialize(sample, sample, sample))
+        a = f.deserialize(reader)
+        b = f.deserialize(reader)
+        self.assertFalse(a.frozen)
+        self.assertIsNot(a, b)
+        a['id'] = 'changed'
+        b['other'] = 'x'
+        self.assertILTagEqual(sample, f.deserialize(reader))
+        self.assertEqual(2, f.hits)
+        self.assertEqual(1, f.misses)
+
+        # Changes to the children of the copies do not reach the cache
+        sample = ILTagArrayTag([ILIntArrayTag([1, 2, 3]), ILStringTag('a')])
+        serialized = self.serialize(sample)
+        a = f.deserialize(io.BytesIO(serialized))
+        list(a[0])
+        a[0].append(99)
+        a[1].value = 'b'
+        b = f.deserialize(io.BytesIO(serialized))
+        self.assertILTagEqual(sample, b)
+        self.assertIsNot(a[0]._values, b[0]._values)
+        b[0].append(4)
+        self.assertEqual([1, 2, 3, 99], list(a[0]))
+        self.assertILTagEqual(sample, f.deserialize(io.BytesIO(serialized)))
+
+    def test_deserialize_value_types(self):
+        tags = [ILRawTag(1234, b'abc'), ILByteArrayTag(b'abc')]
+        for frozen in (True, False):
+            f = ILCachingTagFactory(ILStandardTagFactory(), frozen=frozen)
+            for exp in tags:
+                serialized = self.serialize(exp)
+                for _ in range(2):
+                    t = f.deserialize(io.BytesIO(serialized))
+                    self.assertIs(bytes, t.value.__class__)
+
+    def test_deserialize_eviction(self):
+        samples = self.create_samples()
+        f = ILCachingTagFactory(ILStandardTagFactory(), max_entries=2)
+        serialized = [self.serialize(t) for t in samples]
+        a = f.deserialize(io.BytesIO(serialized[0]))
+        f.deserialize(io.BytesIO(serialized[1]))
+        # Makes the first the most recently used
+        self.assertIs(a, f.deserialize(io.BytesIO(serialized[0])))
+        f.deserialize(io.BytesIO(serialized[2]))
+        self.assertEqual(2, len(f))
+        self.assertIs(a, f.deserialize(io.BytesIO(serialized[0])))
+        self.assertEqual(2, f.hits)
+        f.deserialize(io.BytesIO(serialized[1]))
+        self.assertEqual(2, f.hits)
+        self.assertEqual(4, f.misses)
+
+    def test_deserialize_not_cached(self):
+        f = ILCachingTagFactory(ILStandardTagFactory(), max_tag_size=4)
+        tags = [ILUInt8Tag(1), ILILInt64Tag(1234567), ILRawTag(1234, b'12345'),
+                ILRawTag(1234, b'1234')]
+        reader = io.BytesIO(self.serialize(*tags))
+        for exp in tags:
+            t = f.deserialize(reader)
+            self.assertILTagEqual(exp, t)
+        self.assertEqual(0, f.hits)
+        self.assertEqual(1, f.misses)
+        self.assertEqual(1, len(f))
+
+    def test_deserialize_corrupted(self):
+        f = ILCachingTagFactory(ILStandardTagFactory())
+        serialized = self.serialize(ILStringTag('abc'))
+        self.assertRaises(ILTagCorruptedError, f.deserialize,
+                          io.BytesIO(serialized[:-1]))
+        self.assertRaises(ILTagCorruptedError, f.deserialize,
+                          io.BytesIO(b''))
+        serialized = self.serialize(ILTagArrayTag([ILUInt8Tag(1)]))
+        self.assertRaises(ILTagCorruptedError, f.deserialize,
+                          io.BytesIO(serialized[:2] + b'\xff' + serialized[3:]))
+        self.assertEqual(0, len(f))
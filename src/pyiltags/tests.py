@@ -32,3 +32,5 @@ from .io_tests import *
 from .util_tests import *
 from .base_tests import *
 from .standard_tests import *
+from .schema_tests import *
+from .dataclass_tests import *
@@ -28,8 +28,15 @@
 # CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
-from typing import Generic, Tuple, TypeVar
-import collections
+from typing import Callable, Generic, Iterable, List, Tuple, TypeVar
+import array
+import copy
+import pyilint
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 T = TypeVar('T')
 KT = TypeVar('KT')
@@ -92,6 +99,258 @@ def assert_int_bounds(value: int, size: int, signed: bool) -> None:
             f'The value must be between {bounds[0]} and {bounds[1]}.')
 
 
+def _to_uint64_array(values: Iterable[int]) -> array.array:
+    if isinstance(values, array.array) and values.typecode == 'Q':
+        return values
+    try:
+        return array.array('Q', values)
+    except OverflowError:
+        raise ValueError('The values must be unsigned 64-bit integers.')
+
+
+def _ilint_body_size(v: int) -> int:
+    """
+    Returns the number of bytes after the header of an ILInt that is larger
+    than or equal to `pyilint.ILINT_BASE`.
+    """
+    return ((v - pyilint.ILINT_BASE).bit_length() + 7) >> 3 or 1
+
+
+def ilint_size_array(values: Iterable[int]) -> int:
+    """
+    Returns the total size of the given values encoded as **ILInt**s.
+
+    Parameters:
+    - `values`: The values. It may be any iterable of integers, an `array.array`
+      or a NumPy array;
+    """
+    if numpy is not None:
+        v = _to_uint64_ndarray(values)
+        return int(v.size + _ilint_body_sizes_numpy(v).sum(dtype=numpy.uint64))
+    base = pyilint.ILINT_BASE
+    size = 0
+    for v in _to_uint64_array(values):
+        size += 1 if v < base else 1 + _ilint_body_size(v)
+    return size
+
+
+def ilint_encode_array(values: Iterable[int]) -> bytes:
+    """
+    Encodes all values as a sequence of **ILInt**s. It may raise `ValueError`
+    if any of the values is not an unsigned 64-bit integer.
+
+    Parameters:
+    - `values`: The values. It may be any iterable of integers, an `array.array`
+      or a NumPy array;
+
+    Returns the encoded values.
+    """
+    if numpy is not None:
+        return _ilint_encode_array_numpy(_to_uint64_ndarray(values))
+    values = _to_uint64_array(values)
+    base = pyilint.ILINT_BASE
+    if not values or max(values) < base:
+        return bytes(iter(values))
+    buff = bytearray()
+    append = buff.append
+    for v in values:
+        if v < base:
+            append(v)
+        else:
+            size = _ilint_body_size(v)
+            append(base - 1 + size)
+            buff += (v - base).to_bytes(size, 'big')
+    return bytes(buff)
+
+
+def ilint_decode_array(buff: bytes, count: int, offset: int = 0) -> Tuple[array.array, int]:
+    """
+    Decodes a sequence of **ILInt**s from a buffer. It may raise a `ValueError`
+    if the values cannot be read.
+
+    Parameters:
+    - `buff`: The buffer;
+    - `count`: The number of values to be read;
+    - `offset`: The offset of the first value in the buffer;
+
+    Returns a tuple with an `array.array('Q')` with the values read and
+    the number of bytes used.
+    """
+    if numpy is not None:
+        return _ilint_decode_array_numpy(buff, count, offset)
+    end = offset + count
+    if count == 0 or (end <= len(buff) and max(buff[offset:end]) < pyilint.ILINT_BASE):
+        return (array.array('Q', iter(buff[offset:end])), count)
+    base = pyilint.ILINT_BASE
+    values = array.array('Q')
+    append = values.append
+    pos = offset
+    buff_len = len(buff)
+    try:
+        for _ in range(count):
+            header = buff[pos]
+            if header < base:
+                append(header)
+                pos += 1
+            else:
+                body_start = pos + 1
+                pos = body_start + header - base + 1
+                if pos > buff_len:
+                    raise ValueError('Premature end of ILInt.')
+                if pos - body_start > 1 and buff[body_start] == 0:
+                    raise ValueError('Invalid ILInt encoding.')
+                append(int.from_bytes(buff[body_start:pos], 'big') + base)
+    except IndexError:
+        raise ValueError('Premature end of ILInt.')
+    except OverflowError:
+        raise ValueError('ILInt overflow.')
+    return (values, pos - offset)
+
+
+def _to_uint64_ndarray(values: Iterable[int]):
+    if isinstance(values, numpy.ndarray):
+        if values.dtype.kind == 'u':
+            return values.astype(numpy.uint64, copy=False)
+        if values.dtype.kind in 'ib':
+            if values.size and values.min() < 0:
+                raise ValueError(
+                    'The values must be unsigned 64-bit integers.')
+            return values.astype(numpy.uint64, copy=False)
+        raise TypeError('The values must be unsigned 64-bit integers.')
+    return numpy.frombuffer(_to_uint64_array(values), numpy.uint64)
+
+
+# Largest value of the body of an ILInt with 1 to 7 bytes.
+_ILINT_BODY_LIMITS = [(1 << (8 * i)) - 1 for i in range(1, 8)]
+
+
+def _ilint_body_sizes_numpy(values):
+    """
+    Returns the number of bytes after the header of each ILInt.
+    """
+    base = numpy.uint64(pyilint.ILINT_BASE)
+    multibyte = values >= base
+    body = numpy.where(multibyte, values - base, 0)
+    sizes = multibyte.astype(numpy.uint8)
+    for limit in _ILINT_BODY_LIMITS:
+        sizes += body > numpy.uint64(limit)
+    return sizes
+
+
+def _ilint_encode_array_numpy(values) -> bytes:
+    base = pyilint.ILINT_BASE
+    body_sizes = _ilint_body_sizes_numpy(values)
+    sizes = body_sizes.astype(numpy.int64) + 1
+    starts = numpy.cumsum(sizes) - sizes
+    buff = numpy.zeros(int(sizes.sum()), numpy.uint8)
+    multibyte = body_sizes > 0
+    buff[starts] = numpy.where(
+        multibyte, body_sizes.astype(numpy.uint64) + (base - 1), values)
+    if multibyte.any():
+        body_sizes = body_sizes[multibyte]
+        starts = starts[multibyte]
+        body = values[multibyte] - numpy.uint64(base)
+        # Writes the bytes from the least significant one.
+        for i in range(8):
+            selected = body_sizes > i
+            if not selected.any():
+                break
+            buff[starts[selected] + body_sizes[selected].astype(numpy.int64) - i] = (
+                body[selected] >> numpy.uint64(8 * i)) & numpy.uint64(0xFF)
+    return buff.tobytes()
+
+
+def _ilint_find_headers_numpy(data):
+    """
+    Returns the positions of the headers of the multibyte ILInts in `data`
+    and the sizes of their bodies.
+
+    Every byte larger than or equal to `pyilint.ILINT_BASE` is a header unless
+    it is inside the body of a previous header. Since each body has at most 8
+    bytes, the headers are found by a fixed-point iteration that only looks at
+    the 8 previous candidates. It falls back to a sequential scan if it does
+    not converge quickly.
+    """
+    base = pyilint.ILINT_BASE
+    candidates = numpy.flatnonzero(data >= base)
+    body_sizes = data[candidates].astype(numpy.int64) - (base - 1)
+    ends = candidates + body_sizes
+    # inside[k][i] is True if candidate i + k is inside the body of candidate i.
+    inside = []
+    for k in range(1, 9):
+        mask = candidates[k:] <= ends[:-k]
+        if mask.any():
+            inside.append((k, mask))
+    headers = numpy.ones(candidates.size, bool)
+    for _ in range(16):
+        covered = numpy.zeros(candidates.size, bool)
+        for k, mask in inside:
+            covered[k:] |= headers[:-k] & mask
+        if not (covered == headers).any():
+            break
+        headers = ~covered
+    else:
+        headers = numpy.zeros(candidates.size, bool)
+        pos = 0
+        for i, (c, end) in enumerate(zip(candidates.tolist(), ends.tolist())):
+            if c >= pos:
+                headers[i] = True
+                pos = end + 1
+    return (candidates[headers], body_sizes[headers])
+
+
+def _ilint_decode_array_numpy(buff: bytes, count: int, offset: int) -> Tuple[array.array, int]:
+    base = pyilint.ILINT_BASE
+    data = numpy.frombuffer(buff, numpy.uint8, offset=offset)[:9 * count]
+    if len(data) >= count and not (data[:count] >= base).any():
+        ret = array.array('Q')
+        ret.frombytes(data[:count].astype('=u8').tobytes())
+        return (ret, count)
+    limit = len(data)
+    headers, body_sizes = _ilint_find_headers_numpy(data)
+    truncated = numpy.flatnonzero(headers + body_sizes >= limit)
+    if truncated.size:
+        limit = int(headers[truncated[0]])
+        headers = headers[:truncated[0]]
+        body_sizes = body_sizes[:truncated[0]]
+    in_body = numpy.zeros(limit + 1, numpy.int32)
+    in_body[headers + 1] = 1
+    in_body[headers + 1 + body_sizes] -= 1
+    positions = numpy.flatnonzero(
+        numpy.cumsum(in_body[:limit], dtype=numpy.int32) == 0)
+    if len(positions) < count:
+        raise ValueError('Premature end of ILInt.')
+    positions = positions[:count]
+
+    values = data[positions].astype(numpy.uint64)
+    multibyte = numpy.flatnonzero(values >= numpy.uint64(base))
+    if multibyte.size:
+        starts = positions[multibyte] + 1
+        body_sizes = values[multibyte].astype(numpy.int64) - (base - 1)
+        if ((body_sizes > 1) & (data[starts] == 0)).any():
+            raise ValueError('Invalid ILInt encoding.')
+        body = numpy.zeros(multibyte.size, numpy.uint64)
+        for size in range(1, 9):
+            selected = numpy.flatnonzero(body_sizes == size)
+            if not selected.size:
+                continue
+            selected_starts = starts[selected]
+            v = data[selected_starts].astype(numpy.uint64)
+            for i in range(1, size):
+                v <<= numpy.uint64(8)
+                v |= data[selected_starts + i]
+            body[selected] = v
+        if (body > numpy.uint64(pyilint.MAX_UINT64 - base)).any():
+            raise ValueError('ILInt overflow.')
+        values[multibyte] = body + numpy.uint64(base)
+        last_size = int(body_sizes[-1]) + 1 if multibyte[-1] == count - 1 else 1
+    else:
+        last_size = 1
+    ret = array.array('Q')
+    ret.frombytes(values.astype('=u8', copy=False).tobytes())
+    return (ret, int(positions[-1]) + last_size)
+
+
 class RestrictListMixin(Generic[T]):
     """
     This Mixin class adds a simple restricted type list operation to
@@ -103,23 +362,162 @@ class RestrictListMixin(Generic[T]):
 
     This functionality was added to avoid potencial type errors in
     this library.
+
+    The values may be shared with another instance after `_share_values()`.
+    In this case, `_values` is copied before the first change and, if
+    `_has_mutable_values()` returns True, each value is copied with
+    `_copy_value()` before it is returned to the caller.
+
+    Because of that, reading mutable values from an instance that shares
+    them (including the original instance) replaces them by private copies
+    in place. Those reads change the internal state of the instance and are
+    not thread-safe.
     """
 
+    # If not None, the default implementations of `assert_value_type()` and
+    # `assert_values_type()` accept only instances of this class.
+    VALUE_CLASS = None
+
     def __init__(self) -> None:
         self._values = []
+        self._shared = None
 
     def assert_value_type(self, value: T):
-        pass
+        value_class = self.VALUE_CLASS
+        if value_class is not None and not isinstance(value, value_class):
+            raise TypeError(f'Only {value_class.__name__}s are allowed.')
+
+    def assert_values_type(self, values: List[T]):
+        """
+        Verifies all values of a batch at once. If `VALUE_CLASS` is set, it
+        verifies each distinct class of the values only once. Otherwise, it
+        calls `assert_value_type()` for each value. Subclasses may override
+        it with a faster implementation.
+
+        Parameters:
+        - `values`: The list of values to be verified;
+        """
+        value_class = self.VALUE_CLASS
+        if value_class is None:
+            for v in values:
+                self.assert_value_type(v)
+            return
+        for cls in set(map(type, values)):
+            if not issubclass(cls, value_class):
+                raise TypeError(f'Only {value_class.__name__}s are allowed.')
+
+    def _before_change(self):
+        """
+        Called before any change to the list. By default, it only calls
+        `_own_values()`.
+        """
+        self._own_values()
+
+    def _share_values(self, other: 'RestrictListMixin'):
+        """
+        Makes this instance share the values of `other` until one of them
+        is modified.
+        """
+        self._values = other._values
+        self._shared = other._shared = True
+
+    def _has_mutable_values(self) -> bool:
+        """
+        Returns True if the values must be copied with `_copy_value()` when
+        they are shared. It returns False by default.
+        """
+        return False
+
+    def _copy_value(self, value: T) -> T:
+        """
+        Returns a copy of a shared value. It returns the value itself by
+        default.
+        """
+        return value
+
+    def _own_values(self):
+        """
+        Ensures that `_values` is not shared with other instances. The
+        values inside it may still be shared.
+        """
+        if self._shared is True:
+            self._values = copy.copy(self._values)
+            # Ids of the values that are not shared.
+            self._shared = set() if self._has_mutable_values() else None
+
+    def _own_value(self, key: int) -> T:
+        """
+        Returns the value at the given index after replacing it by a copy if
+        it is shared.
+        """
+        value = self._values[key]
+        if id(value) not in self._shared:
+            value = self._copy_value(value)
+            self._values[key] = value
+            self._shared.add(id(value))
+        return value
+
+    def _own_all(self):
+        """
+        Ensures that neither `_values` nor the values inside it are shared.
+        """
+        if self._shared is None:
+            return
+        self._own_values()
+        if self._shared is not None:
+            for i in range(len(self._values)):
+                self._own_value(i)
+        self._shared = None
+
+    def _add_owned(self, values: Iterable[T]):
+        if self._shared is not None:
+            self._shared.update(map(id, values))
 
     def append(self, value: T):
+        self._before_change()
         self.assert_value_type(value)
         self._values.append(value)
+        self._add_owned((value,))
+
+    def extend(self, values: Iterable[T], validate: bool = True):
+        """
+        Appends all values at once. Nothing is added if any of the values is
+        rejected.
+
+        Parameters:
+        - `values`: The values to be added;
+        - `validate`: If False, the values are not verified. It should be
+          used only if the values are known to be valid;
+        """
+        self._before_change()
+        if not isinstance(values, list):
+            values = list(values)
+        if validate:
+            self.assert_values_type(values)
+        self._values.extend(values)
+        self._add_owned(values)
+
+    def insert(self, key: int, value: T):
+        self._before_change()
+        self.assert_value_type(value)
+        self._values.insert(key, value)
+        self._add_owned((value,))
 
     def clear(self):
+        self._before_change()
         self._values.clear()
+        self._shared = None
 
     def pop(self, key: int = -1) -> T:
-        return self._values.pop(key)
+        self._before_change()
+        value = self._values.pop(key)
+        if self._shared is not None and id(value) not in self._shared:
+            value = self._copy_value(value)
+        return value
+
+    def sort(self, key: Callable = None, reverse: bool = False):
+        self._before_change()
+        self._values.sort(key=key, reverse=reverse)
 
     def __bool__(self) -> bool:
         return bool(self._values)
@@ -128,13 +526,32 @@ class RestrictListMixin(Generic[T]):
         return len(self._values)
 
     def __getitem__(self, key: int) -> T:
-        return self._values[key]
+        if self._shared is None or not self._has_mutable_values():
+            return self._values[key]
+        self._own_values()
+        if isinstance(key, slice):
+            return [self._own_value(i) for i in range(*key.indices(len(self._values)))]
+        return self._own_value(key)
 
     def __setitem__(self, key: int, value: T):
-        self.assert_value_type(value)
-        self._values[key] = value
+        self._before_change()
+        if isinstance(key, slice):
+            value = list(value)
+            self.assert_values_type(value)
+            self._values[key] = value
+            self._add_owned(value)
+        else:
+            self.assert_value_type(value)
+            self._values[key] = value
+            self._add_owned((value,))
+
+    def __delitem__(self, key: int):
+        self._before_change()
+        del self._values[key]
 
     def __iter__(self):
+        if self._shared is not None and self._has_mutable_values():
+            self._own_all()
         return iter(self._values)
 
     def __repr__(self) -> str:
@@ -156,10 +573,15 @@ class RestrictDictMixin(Generic[KT, T]):
 
     This functionality was added to avoid potencial type errors in
     this library.
+
+    The values may be shared with another instance after `_share_values()`
+    in the same way as `RestrictListMixin`. As there, reading shared mutable
+    values replaces them by private copies and is not thread-safe.
     """
 
     def __init__(self) -> None:
-        self._values = collections.OrderedDict()
+        self._values = {}
+        self._shared = None
 
     def assert_value_type(self, value: T):
         pass
@@ -167,8 +589,94 @@ class RestrictDictMixin(Generic[KT, T]):
     def assert_key_type(self, key: T):
         pass
 
+    def assert_items_type(self, items: List[Tuple[KT, T]]):
+        """
+        Verifies all key/value pairs of a batch at once. By default, it calls
+        `assert_key_type()` and `assert_value_type()` for each pair but
+        subclasses may override it with a faster implementation.
+
+        Parameters:
+        - `items`: The list of key/value pairs to be verified;
+        """
+        for key, value in items:
+            self.assert_key_type(key)
+            self.assert_value_type(value)
+
+    def _before_change(self):
+        """
+        Called before any change to the dictionary. By default, it only calls
+        `_own_values()`.
+        """
+        self._own_values()
+
+    _share_values = RestrictListMixin._share_values
+    _has_mutable_values = RestrictListMixin._has_mutable_values
+    _copy_value = RestrictListMixin._copy_value
+    _own_values = RestrictListMixin._own_values
+    _own_value = RestrictListMixin._own_value
+    _add_owned = RestrictListMixin._add_owned
+
+    def _own_all(self):
+        """
+        Ensures that neither `_values` nor the values inside it are shared.
+        """
+        if self._shared is None:
+            return
+        self._own_values()
+        if self._shared is not None:
+            for key in self._values:
+                self._own_value(key)
+        self._shared = None
+
     def clear(self):
+        self._before_change()
         self._values.clear()
+        self._shared = None
+
+    def update(self, values=(), validate: bool = True):
+        """
+        Adds or replaces all key/value pairs at once. Nothing is changed if any
+        of the pairs is rejected.
+
+        Parameters:
+        - `values`: A mapping or an iterable of key/value pairs;
+        - `validate`: If False, the pairs are not verified. It should be
+          used only if the pairs are known to be valid;
+        """
+        self._before_change()
+        if hasattr(values, 'keys'):
+            items = [(k, values[k]) for k in values.keys()]
+        else:
+            items = list(values)
+        if validate:
+            self.assert_items_type(items)
+        self._values.update(items)
+        if self._shared is not None:
+            self._shared.update(id(v) for _, v in items)
+
+    def get(self, key: KT, default: T = None) -> T:
+        if key in self._values:
+            return self[key]
+        return default
+
+    def setdefault(self, key: KT, default: T = None) -> T:
+        if key in self._values:
+            return self[key]
+        self[key] = default
+        return default
+
+    def keys(self):
+        return self._values.keys()
+
+    def values(self):
+        if self._shared is not None and self._has_mutable_values():
+            self._own_all()
+        return self._values.values()
+
+    def items(self):
+        if self._shared is not None and self._has_mutable_values():
+            self._own_all()
+        return self._values.items()
 
     def __bool__(self) -> bool:
         return bool(self._values)
@@ -177,15 +685,21 @@ class RestrictDictMixin(Generic[KT, T]):
         return len(self._values)
 
     def __delitem__(self, key: KT):
+        self._before_change()
         del self._values[key]
 
     def __getitem__(self, key: KT) -> T:
-        return self._values[key]
+        if self._shared is None or not self._has_mutable_values():
+            return self._values[key]
+        self._own_values()
+        return self._own_value(key)
 
     def __setitem__(self, key: KT, value: T):
+        self._before_change()
         self.assert_key_type(key)
         self.assert_value_type(value)
         self._values[key] = value
+        self._add_owned((value,))
 
     def __iter__(self):
         return iter(self._values)
@@ -29,8 +29,10 @@
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 import unittest
+import unittest.mock
 import random
 from .util import *
+from . import util
 
 
 class TestUtil(unittest.TestCase):
@@ -124,6 +126,66 @@ class TestUtil(unittest.TestCase):
                           9223372036854775808, 8, True)
 
 
+class TestILIntArrayCodec(unittest.TestCase):
+
+    @staticmethod
+    def encode(values) -> bytes:
+        buff = bytearray()
+        for v in values:
+            pyilint.ilint_encode(v, buff)
+        return bytes(buff)
+
+    def samples(self):
+        yield []
+        yield [0, 1, 0xF7]
+        yield [0xF8, 0xF8 + 0xFF, 0xF8 + 0x100, 2**64 - 1, 0]
+        for size in range(1, 65):
+            yield [random.randrange(0, 2**size) for _ in range(20)]
+
+    def check_codec(self):
+        for values in self.samples():
+            exp = self.encode(values)
+            self.assertEqual(len(exp), ilint_size_array(values))
+            self.assertEqual(exp, ilint_encode_array(values))
+            self.assertEqual(exp, ilint_encode_array(array.array('Q', values)))
+            decoded, size = ilint_decode_array(exp, len(values))
+            self.assertIsInstance(decoded, array.array)
+            self.assertEqual(values, decoded.tolist())
+            self.assertEqual(len(exp), size)
+            decoded, size = ilint_decode_array(
+                b'\xFF\xFF' + exp + b'\xFF', len(values), 2)
+            self.assertEqual(values, decoded.tolist())
+            self.assertEqual(len(exp), size)
+
+        self.assertRaises(ValueError, ilint_encode_array, [-1])
+        self.assertRaises(ValueError, ilint_encode_array, [2**64])
+        self.assertRaises(TypeError, ilint_encode_array, [1.0])
+        self.assertRaises(ValueError, ilint_decode_array, b'\x01', 2)
+        self.assertRaises(ValueError, ilint_decode_array, b'\x01\xF9\x01', 2)
+        self.assertRaises(ValueError, ilint_decode_array,
+                          b'\x01\xF9\x00\x01', 2)
+        self.assertRaises(ValueError, ilint_decode_array, b'\xFF' * 9, 1)
+
+    def test_codec(self):
+        self.check_codec()
+
+    def test_codec_without_numpy(self):
+        with unittest.mock.patch.object(util, 'numpy', None):
+            self.check_codec()
+
+    @unittest.skipIf(util.numpy is None, 'NumPy is not available.')
+    def test_codec_numpy_input(self):
+        values = [0, 0xF8, 2**64 - 1]
+        exp = self.encode(values)
+        np = util.numpy
+        self.assertEqual(exp, ilint_encode_array(np.array(values, np.uint64)))
+        self.assertEqual(len(exp), ilint_size_array(np.array(values, np.uint64)))
+        self.assertEqual(self.encode([1, 300]),
+                         ilint_encode_array(np.array([1, 300], np.int16)))
+        self.assertRaises(ValueError, ilint_encode_array, np.array([1, -1]))
+        self.assertRaises(TypeError, ilint_encode_array, np.array([1.0]))
+
+
 class TestRestrictListMixin(unittest.TestCase):
 
     class A:
@@ -254,6 +316,98 @@ class TestRestrictListMixin(unittest.TestCase):
             self.assertFalse(i in l)
             self.assertTrue(100 + i in l)
 
+    def test_assert_values_type(self):
+        l = TestRestrictListMixin.ExampleRestrictListMixin()
+        l.assert_values_type([])
+        l.assert_values_type([1, 2, 3])
+        self.assertRaises(TypeError, l.assert_values_type, [1, 2, None])
+
+        l = RestrictListMixin()
+        l.VALUE_CLASS = int
+        l.assert_value_type(True)
+        l.assert_values_type([1, True, 3])
+        self.assertRaises(TypeError, l.assert_value_type, 1.0)
+        self.assertRaises(TypeError, l.assert_values_type, [1, 2, 1.0])
+
+    def test_extend(self):
+        l = TestRestrictListMixin.ExampleRestrictListMixin()
+        l.extend([1, 2])
+        l.extend(range(3, 5))
+        l.extend(i for i in [5])
+        self.assertEqual([1, 2, 3, 4, 5], l._values)
+
+        # Nothing is added if one of the values is invalid
+        self.assertRaises(TypeError, l.extend, [6, '7'])
+        self.assertEqual([1, 2, 3, 4, 5], l._values)
+
+        l.extend(['6'], False)
+        self.assertEqual([1, 2, 3, 4, 5, '6'], l._values)
+
+    def test_insert(self):
+        l = TestRestrictListMixin.ExampleRestrictListMixin()
+        l.insert(0, 1)
+        l.insert(0, 0)
+        l.insert(-1, 2)
+        self.assertEqual([0, 2, 1], l._values)
+        self.assertRaises(TypeError, l.insert, 0, '')
+        self.assertEqual([0, 2, 1], l._values)
+
+    def test_slices(self):
+        l = TestRestrictListMixin.ExampleRestrictListMixin()
+        l.extend(range(10))
+        self.assertEqual([2, 3], l[2:4])
+        self.assertEqual([0, 3, 6, 9], l[::3])
+
+        l[2:4] = [20, 30, 40]
+        self.assertEqual([0, 1, 20, 30, 40, 4, 5, 6, 7, 8, 9], l._values)
+        l[::5] = (i for i in [100, 101, 102])
+        self.assertEqual([100, 1, 20, 30, 40, 101, 5, 6, 7, 8, 102], l._values)
+        self.assertRaises(TypeError, l.__setitem__, slice(0, 2), [1, ''])
+        self.assertEqual([100, 1, 20, 30, 40, 101, 5, 6, 7, 8, 102], l._values)
+
+        del l[0]
+        del l[1:4]
+        del l[::2]
+        self.assertEqual([101, 6, 8], l._values)
+
+    def test_sort(self):
+        l = TestRestrictListMixin.ExampleRestrictListMixin()
+        l.extend([3, 1, 2])
+        l.sort()
+        self.assertEqual([1, 2, 3], l._values)
+        l.sort(reverse=True)
+        self.assertEqual([3, 2, 1], l._values)
+        l.sort(key=lambda x: x % 3)
+        self.assertEqual([3, 1, 2], l._values)
+
+    def test_share_values(self):
+        class Box:
+            def __init__(self, v):
+                self.v = v
+
+        class BoxList(RestrictListMixin):
+            def _has_mutable_values(self):
+                return True
+
+            def _copy_value(self, value):
+                return Box(value.v)
+
+        a = BoxList()
+        a.extend([Box(1), Box(2)])
+        b = BoxList()
+        b._share_values(a)
+        self.assertIs(a._values, b._values)
+        b.append(Box(3))
+        self.assertIsNot(a._values, b._values)
+        self.assertEqual(2, len(a))
+        self.assertIs(a._values[0], b._values[0])
+        b[0].v = 10
+        self.assertEqual(1, a[0].v)
+        self.assertIs(b[0], b[0])
+        self.assertIs(b[2], b._values[2])
+        self.assertEqual([10, 2, 3], [x.v for x in b])
+        self.assertEqual([1, 2], [x.v for x in a])
+
 
 class TestRestrictDictMixin(unittest.TestCase):
 
@@ -386,3 +540,52 @@ class TestRestrictDictMixin(unittest.TestCase):
 
         for k in keys[5:]:
             self.assertFalse(k in d)
+
+    def test_constructor(self):
+        d = TestRestrictDictMixin.StrIntRestrictDictMixin()
+        self.assertIs(dict, type(d._values))
+
+    def test_assert_items_type(self):
+        d = TestRestrictDictMixin.StrIntRestrictDictMixin()
+        d.assert_items_type([])
+        d.assert_items_type([('a', 1), ('b', 2)])
+        self.assertRaises(TypeError, d.assert_items_type, [('a', 1), (1, 2)])
+        self.assertRaises(TypeError, d.assert_items_type,
+                          [('a', 1), ('b', '2')])
+
+    def test_update(self):
+        d = TestRestrictDictMixin.StrIntRestrictDictMixin()
+        d.update({'a': 1, 'b': 2})
+        d.update([('c', 3), ('a', 4)])
+        d.update((k, v) for k, v in [('d', 5)])
+        d.update(d)
+        self.assertEqual({'a': 4, 'b': 2, 'c': 3, 'd': 5}, d._values)
+        self.assertEqual(['a', 'b', 'c', 'd'], list(d))
+
+        # Nothing is changed if one of the pairs is invalid
+        self.assertRaises(TypeError, d.update, {'e': 6, 'f': '7'})
+        self.assertRaises(TypeError, d.update, [('e', 6), (7, 7)])
+        self.assertEqual({'a': 4, 'b': 2, 'c': 3, 'd': 5}, d._values)
+
+        d.update({'e': '6'}, False)
+        self.assertEqual('6', d['e'])
+
+    def test_get_setdefault(self):
+        d = TestRestrictDictMixin.StrIntRestrictDictMixin()
+        d['a'] = 1
+        self.assertEqual(1, d.get('a'))
+        self.assertIsNone(d.get('b'))
+        self.assertEqual(2, d.get('b', 2))
+
+        self.assertEqual(1, d.setdefault('a', 10))
+        self.assertEqual(3, d.setdefault('c', 3))
+        self.assertEqual(3, d['c'])
+        self.assertRaises(TypeError, d.setdefault, 'd')
+        self.assertNotIn('d', d)
+
+    def test_views(self):
+        d = TestRestrictDictMixin.StrIntRestrictDictMixin()
+        d.update([('b', 2), ('a', 1), ('c', 3)])
+        self.assertEqual(['b', 'a', 'c'], list(d.keys()))
+        self.assertEqual([2, 1, 3], list(d.values()))
+        self.assertEqual([('b', 2), ('a', 1), ('c', 3)], list(d.items()))